@@ -1,9 +1,9 @@
-import eventlet
-eventlet.monkey_patch()
-
-from flask import Flask, request, jsonify, send_file
+from contextlib import ExitStack
+from functools import wraps
+from flask import Flask, Response, g, make_response, request, jsonify, send_file
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
+import copy
 import os
 import json
 import time
@@ -17,10 +17,32 @@ import base64
 from services.transcription_service import TranscriptionService
 from services.gemini_service import GeminiService
 from services.live_transcription_service import LiveTranscriptionService
+from services.diarization import farmer_transcript
+from services.live_capture import LiveCapture, maybe_prune_captures
+from services.pipelined_extraction import PipelinedExtractor
+from services.session_store import claim, get_session_store, maybe_prune_sessions, new_record
+from services.work_scheduler import get_work_scheduler, work_class
+from utils.admission import AdmissionController, Rejected
+from utils.emit_scheduler import TranscriptEmitter
+from utils.job_progress import PROGRESS_ID_PATTERN, format_sse, get_progress_hub
+from utils.local_broker import LocalBrokerManager
+from utils.metrics import AUDIO_BYTES, LIVE_BUFFER_BYTES, LIVE_STREAMS, render_metrics, timed
+from utils.profiling import PROFILE_MODES, profile_path, profile_request
+from utils.tracing import current_job_id, trace_job
+from utils.transcoding import UnsupportedAudioFormat
 from config.settings import (
+    DEFAULT_SURVEY_SCHEMA,
     GCS_BUCKET_NAME,
     get_gcp_project_id,
     GCP_LOCATION,
+    LIVE_CAPTURE_ENABLED,
+    LIVE_SESSION_HEARTBEAT_SECONDS,
+    LIVE_STATS_INTERVAL_SECONDS,
+    PIPELINED_EXTRACTION,
+    PREPROCESSING_CHAINS,
+    PROFILING_ENABLED,
+    SOCKETIO_MESSAGE_QUEUE,
+    WORKER_ID,
     validate_environment,
 )
 
@@ -29,6 +51,16 @@ app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["SECRET_KEY"] = "singaji-setu-secret"
 
 CORS(app, resources={r"/*": {"origins": "*"}})
+# Several workers share Socket.IO events through a message queue; clients
+# must be routed stickily (see README) so audio reaches its recognizer
+socketio_options = {}
+if SOCKETIO_MESSAGE_QUEUE and SOCKETIO_MESSAGE_QUEUE.startswith("local://"):
+    socketio_options["client_manager"] = LocalBrokerManager(SOCKETIO_MESSAGE_QUEUE)
+elif SOCKETIO_MESSAGE_QUEUE:
+    socketio_options["message_queue"] = SOCKETIO_MESSAGE_QUEUE
+
+# Socket.IO handlers run in plain threads; live streams run on the asyncio
+# engine (services/live_engine.py), so no eventlet/gevent monkey patching
 socketio = SocketIO(
     app,
     cors_allowed_origins="*",
@@ -38,6 +70,7 @@ socketio = SocketIO(
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=10000000,
+    **socketio_options,
 )
 
 # Global state
@@ -48,34 +81,55 @@ app_state = {
     "gemini_result": None,
     "transcription_service": None,
     "gemini_service": None,
-    "live_service": None,
-    "live_transcript": "",
+    "live_sessions": {},  # sid -> {"session_id", "record", "service", "emitter", "capture", ...}
+    "live_capture_id": None,  # recording of the last finished live session
 }
 
+# Heavy requests and live streams are admitted against in-flight work, the
+# work scheduler's queue and memory (utils/admission.py)
+admission = AdmissionController(
+    queued_calls=lambda: sum(stats["queued"] for stats in get_work_scheduler().stats().values())
+)
+
 
 def get_default_schema():
     """Return default survey schema for farmer interviews"""
-    return {
-        "farmer_name": "",
-        "village": "",
-        "district": "",
-        "state": "",
-        "age": "",
-        "gender": "",
-        "education": "",
-        "family_size": "",
-        "land_size_acres": "",
-        "crops_grown": [],
-        "irrigation_method": "",
-        "farming_experience_years": "",
-        "annual_income": "",
-        "challenges_faced": [],
-        "government_schemes_used": [],
-        "technology_adoption": "",
-        "market_access": "",
-        "suggestions": "",
-        "contact_number": "",
-    }
+    return copy.deepcopy(DEFAULT_SURVEY_SCHEMA)
+
+
+def get_preprocessing_option():
+    """Read the optional preprocessing chain name from form data or query string."""
+    name = request.form.get("preprocessing") or request.args.get("preprocessing")
+    if name and name not in PREPROCESSING_CHAINS:
+        raise ValueError(
+            f"Unknown preprocessing chain '{name}'. "
+            f"Available: {', '.join(sorted(PREPROCESSING_CHAINS))}"
+        )
+    return name
+
+
+def get_flag(name):
+    """Read a boolean option from form data or query string."""
+    value = request.form.get(name) or request.args.get(name) or ""
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def get_progress_id():
+    """Client-chosen id for progress events of this request (form field or query), if valid."""
+    progress_id = request.form.get("progress_id") or request.args.get("progress_id")
+    if progress_id and not PROGRESS_ID_PATTERN.match(progress_id):
+        print(f"Ignoring invalid progress_id '{progress_id}'")
+        return None
+    return progress_id
+
+
+def find_live_capture(capture_id):
+    """A live capture that is still recording, or a finished one from disk."""
+    for session in app_state["live_sessions"].values():
+        capture = session.get("capture")
+        if capture and capture.capture_id == capture_id:
+            return capture
+    return LiveCapture.load(capture_id)
 
 
 def init_services():
@@ -114,9 +168,153 @@ def init_services():
         return False
 
 
+def get_tenant():
+    """Tenant (team) the request's Speech/Gemini calls are fair-shared under (X-Tenant header)."""
+    return (request.headers.get("X-Tenant") or "").strip()[:64] or None
+
+
+# Requests traced as jobs; the job id is returned in the X-Job-Id header.
+# They pass admission control, and their Speech/Gemini calls are scheduled
+# as interactive work.
+TRACED_ENDPOINTS = {
+    "process_audio",
+    "test_transcription",
+    "transcribe",
+    "analyze",
+    "retranscribe_live_capture",
+}
+
+
+@app.before_request
+def admit_request():
+    """Fast-reject heavy requests under overload, before their upload is read."""
+    if request.endpoint in TRACED_ENDPOINTS:
+        try:
+            g.admission_ticket = admission.admit(request.endpoint)
+        except Rejected as e:
+            # The upload is not read, so only a progress_id in the query string is known here
+            progress_id = request.args.get("progress_id")
+            if progress_id and PROGRESS_ID_PATTERN.match(progress_id):
+                get_progress_hub().publish(progress_id, "error", {"error": str(e), "status": 429})
+            response = jsonify({"error": str(e), "reason": e.reason, "retry_after": e.retry_after})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response
+
+
+@app.before_request
+def start_request_trace():
+    if request.endpoint in TRACED_ENDPOINTS:
+        g.trace_stack = ExitStack()
+        g.job_span = g.trace_stack.enter_context(
+            trace_job(
+                f"{request.method} {request.path}",
+                request_id=request.headers.get("X-Request-Id", ""),
+            )
+        )
+        g.trace_stack.enter_context(work_class("interactive", get_tenant()))
+
+
+@app.after_request
+def add_job_id_header(response):
+    job_span = g.get("job_span")
+    if job_span:
+        job_span.set_attribute("http.status_code", response.status_code)
+        response.headers["X-Job-Id"] = job_span.trace.trace_id
+    return response
+
+
+@app.teardown_request
+def end_request_trace(error=None):
+    trace_stack = g.pop("trace_stack", None)
+    if trace_stack:
+        trace_stack.close()
+    ticket = g.pop("admission_ticket", None)
+    if ticket:
+        ticket.release()
+
+
+def traced_event(handler):
+    """Trace a Socket.IO handler as a job, tagged with the client sid; its calls are live work."""
+    def wrapper(*args, **kwargs):
+        with trace_job(f"socket.{handler.__name__}", sid=request.sid), work_class("live", get_tenant()):
+            return handler(*args, **kwargs)
+    wrapper.__name__ = handler.__name__
+    return wrapper
+
+
+def get_profile_mode():
+    """Profile mode requested with ?profile= or the X-Profile header, if profiling is enabled."""
+    if not PROFILING_ENABLED:
+        return None
+    value = (request.args.get("profile") or request.headers.get("X-Profile") or "").lower()
+    if value in ("1", "true", "yes"):
+        return "cpu"
+    return value if value in PROFILE_MODES else None
+
+
+def profiled(view):
+    """Profile the view when requested; the profile id is returned in X-Profile-Id."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = get_profile_mode()
+        if not mode:
+            return view(*args, **kwargs)
+        profile_id = current_job_id() or uuid.uuid4().hex
+        with profile_request(mode, profile_id) as profiler:
+            response = make_response(view(*args, **kwargs))
+        if profiler:
+            response.headers["X-Profile-Id"] = profile_id
+            if profiler.other_jobs:
+                # tracemalloc is process-wide: other requests' allocations are in the summary
+                response.headers["X-Profile-Shared"] = str(len(profiler.other_jobs))
+        return response
+    return wrapper
+
+
+def reports_progress(view):
+    """Publish a final ``done``/``error`` progress event when the view returns."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        progress_id = get_progress_id()
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception as e:
+            if progress_id:
+                get_progress_hub().publish(progress_id, "error", {"error": str(e)})
+            raise
+        if progress_id:
+            event = "done" if response.status_code < 400 else "error"
+            get_progress_hub().publish(progress_id, event, {"status": response.status_code})
+        return response
+    return wrapper
+
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "ok"})
+    """Liveness plus current load; ``status`` is ``overloaded`` while new work is rejected."""
+    load = admission.load(live_streams=len(app_state["live_sessions"]))
+    return jsonify({
+        "status": "overloaded" if load["overloaded"] else "ok",
+        "load": load,
+        "scheduler": get_work_scheduler().stats(),
+    })
+
+
+# Live gauges are read from the session table when /metrics is scraped
+LIVE_STREAMS.set_function(lambda: len(app_state["live_sessions"]))
+LIVE_BUFFER_BYTES.set_function(
+    lambda: sum(
+        session["service"].buffer_stats()["depth_bytes"]
+        for session in list(app_state["live_sessions"].values())
+    )
+)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/api/test", methods=["POST"])
@@ -140,6 +338,11 @@ def test_transcription():
         if "audio" not in request.files:
             return jsonify({"error": "No audio file"}), 400
 
+        try:
+            preprocessing = get_preprocessing_option()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         file = request.files["audio"]
         file_content = file.read()
 
@@ -152,18 +355,22 @@ def test_transcription():
         audio_buffer.name = file.filename
 
         # Test transcription
-        transcript = app_state["transcription_service"].transcribe_full_file(
-            audio_buffer, language_code="hi-IN"
+        transcription = app_state["transcription_service"].transcribe_full_file(
+            audio_buffer, language_code="hi-IN", preprocessing=preprocessing
         )
 
         return jsonify(
             {
                 "success": True,
-                "transcript": transcript or "No speech detected",
+                "transcript": transcription.transcript or "No speech detected",
                 "file_info": {"name": file.filename, "size": len(file_content)},
+                "preprocessing": transcription.preprocessing,
             }
         )
 
+    except UnsupportedAudioFormat as e:
+        print(f"Unsupported audio format: {e}")
+        return jsonify({"error": str(e)}), 415
     except Exception as e:
         print(f"Test transcription error: {e}")
         import traceback
@@ -183,16 +390,19 @@ def reset_session():
         "gemini_result": None,
         "transcription_service": app_state["transcription_service"],
         "gemini_service": app_state["gemini_service"],
-        "live_service": None,
-        "live_transcript": "",
+        "live_sessions": app_state["live_sessions"],
+        "live_capture_id": None,
     }
     return jsonify({"success": True, "message": "Session reset"})
 
 
 @app.route("/api/process", methods=["POST"])
+@profiled
+@reports_progress
 def process_audio():
     """Upload + Transcribe + Analyze in one go"""
     print("=== Process request received ===")
+    extractor = None
     try:
         print("Starting process_audio function...")
 
@@ -219,6 +429,11 @@ def process_audio():
         if not file.filename:
             return jsonify({"error": "No file selected"}), 400
 
+        try:
+            preprocessing = get_preprocessing_option()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         print(f"Processing file: {file.filename}")
 
         # Read and validate file content
@@ -239,11 +454,57 @@ def process_audio():
             f"File extension: {file.filename.split('.')[-1] if '.' in file.filename else 'unknown'}"
         )
 
+        farmer_only = get_flag("farmer_only")
+        diarize = get_flag("diarize") or farmer_only
+        refine = get_flag("refine")
+        schema_json = json.dumps(get_default_schema(), indent=2)
+
+        # Pipelined mode: Gemini starts on finished chunks while later ones are recognized
+        # (not with farmer_only, which needs the speaker roles of the whole interview,
+        # nor with refine, which changes chunk text after it is recognized)
+        if (PIPELINED_EXTRACTION or get_flag("pipelined")) and not farmer_only and not refine:
+            extractor = PipelinedExtractor(app_state["gemini_service"], schema_json)
+
+        # Chunk transcripts are pushed to /api/process/<progress_id>/events as they finish
+        progress_id = get_progress_id()
+        hub = get_progress_hub()
+
+        def on_chunk_done(chunk_index, chunk_count, time_label, chunk_transcript):
+            if progress_id:
+                hub.publish(progress_id, "chunk", {
+                    "chunk_index": chunk_index,
+                    "chunk_count": chunk_count,
+                    "time_range": time_label,
+                    "transcript": chunk_transcript or "",
+                    "failed": chunk_transcript is None,
+                })
+
+        def on_chunk(chunk_index, chunk_transcript):
+            if extractor:
+                extractor.feed(chunk_index, chunk_transcript)
+            if progress_id:
+                # Chunks 0..chunk_index are final: the client can show them as stable
+                hub.publish(progress_id, "stable", {"through_chunk": chunk_index})
+
         try:
-            transcript = app_state["transcription_service"].transcribe_full_file(
-                audio_buffer, language_code="hi-IN"
+            transcription = app_state["transcription_service"].transcribe_full_file(
+                audio_buffer,
+                language_code="hi-IN",
+                preprocessing=preprocessing,
+                diarize=diarize,
+                on_chunk=on_chunk,
+                on_chunk_done=on_chunk_done,
             )
+            transcript = transcription.transcript
+            if transcript and refine:
+                # Only the low-confidence spans go to Speech again, with a stronger model
+                transcript = app_state["transcription_service"].refine_low_confidence(
+                    audio_buffer, transcription, language_code="hi-IN", preprocessing=preprocessing
+                ) or transcript
             print(f"Transcription result: '{transcript}'")
+        except UnsupportedAudioFormat as format_error:
+            print(f"Unsupported audio format: {format_error}")
+            return jsonify({"error": str(format_error)}), 415
         except Exception as transcription_error:
             print(f"Transcription exception: {transcription_error}")
             import traceback
@@ -273,6 +534,8 @@ def process_audio():
         print(f"Transcription successful: {len(transcript)} characters")
         app_state["transcript"] = transcript
 
+        speaker_turns = transcription.speaker_turns if diarize else []
+
         # Save transcription to GCS bucket with metadata
         try:
             from datetime import datetime
@@ -295,22 +558,34 @@ Size: {len(file_content)} bytes
                 GCS_BUCKET_NAME
             )
             blob = bucket.blob(filename)
-            blob.upload_from_string(
-                transcription_content.encode("utf-8"),
-                content_type="text/plain; charset=utf-8",
-            )
+            with timed("persist"):
+                blob.upload_from_string(
+                    transcription_content.encode("utf-8"),
+                    content_type="text/plain; charset=utf-8",
+                )
             print(f"Transcription saved to GCS: {filename}")
         except Exception as e:
             print(f"Failed to save transcription to GCS: {e}")
 
-        # Analyze with Gemini
+        # Analyze with Gemini (optionally only the farmer's answers)
         print("Starting AI analysis...")
-        schema = get_default_schema()
-        schema_json = json.dumps(schema, indent=2)
+        result = extraction = None
+        if extractor and extractor.used:
+            result, extraction = extractor.finish()
+            outcome = "merged" if result else "failed, retrying on the full transcript"
+            print(f"Pipelined analysis of {extractor.chunks_received} chunks: {outcome}")
 
-        result = app_state["gemini_service"].generate_json_payload(
-            schema_json, transcript
-        )
+        if not result:
+            analysis_input = transcript
+            if farmer_only and speaker_turns:
+                analysis_input = farmer_transcript(speaker_turns) or transcript
+                print(
+                    f"Sending farmer turns only: {len(analysis_input)} of {len(transcript)} characters"
+                )
+
+            result, extraction = app_state["gemini_service"].extract(
+                schema_json, analysis_input
+            )
 
         if not result:
             return jsonify({"error": "AI analysis failed"}), 500
@@ -340,19 +615,34 @@ Size: {len(file_content)} bytes
                 GCS_BUCKET_NAME
             )
             blob = bucket.blob(filename)
-            blob.upload_from_string(
-                json.dumps(analysis_with_metadata, indent=2, ensure_ascii=False).encode(
-                    "utf-8"
-                ),
-                content_type="application/json; charset=utf-8",
-            )
+            with timed("persist"):
+                blob.upload_from_string(
+                    json.dumps(
+                        analysis_with_metadata, indent=2, ensure_ascii=False
+                    ).encode("utf-8"),
+                    content_type="application/json; charset=utf-8",
+                )
             print(f"Analysis result saved to GCS: {filename}")
         except Exception as e:
             print(f"Failed to save analysis to GCS: {e}")
 
         print("Process completed successfully!")
 
-        return jsonify({"success": True, "transcript": transcript, "result": result})
+        return jsonify(
+            {
+                "success": True,
+                "transcript": transcript,
+                "result": result,
+                "preprocessing": transcription.preprocessing,
+                "speaker_turns": [turn.to_dict() for turn in speaker_turns],
+                "failed_chunks": transcription.failed_chunks,
+                "checkpoint": transcription.checkpoint,
+                "segments": [segment.to_dict() for segment in transcription.segments],
+                "refinement": transcription.refinement,
+                "extraction": extraction,
+                "job_id": current_job_id(),
+            }
+        )
 
     except Exception as e:
         print(f"CRITICAL ERROR in process_audio: {e}")
@@ -372,6 +662,32 @@ Size: {len(file_content)} bytes
             ),
             500,
         )
+    finally:
+        # Partial extractions of a request that failed would keep their Gemini slots
+        if extractor:
+            extractor.close()
+
+
+@app.route("/api/process/<progress_id>/events", methods=["GET"])
+def process_events(progress_id):
+    """Server-Sent Events with the chunk transcripts of a running /api/process request."""
+    if not PROGRESS_ID_PATTERN.match(progress_id):
+        return jsonify({"error": "Invalid progress id"}), 400
+    try:
+        after = int(request.headers.get("Last-Event-ID", -1))
+    except ValueError:
+        after = -1
+
+    def stream():
+        yield "retry: 2000\n\n"
+        for item in get_progress_hub().subscribe(progress_id, after):
+            yield ": keepalive\n\n" if item is None else format_sse(*item)
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/transcribe", methods=["POST"])
@@ -393,7 +709,7 @@ def transcribe():
         # Transcribe
         transcript = app_state["transcription_service"].transcribe_full_file(
             audio_file, language_code="hi-IN"
-        )
+        ).transcript
 
         if transcript:
             app_state["transcript"] = transcript
@@ -418,6 +734,7 @@ def transcribe():
 
 
 @app.route("/api/analyze", methods=["POST"])
+@profiled
 def analyze():
     try:
         print("=== Analyze request ===")
@@ -436,14 +753,14 @@ def analyze():
         schema_json = json.dumps(schema, indent=2)
 
         # Generate payload
-        result = app_state["gemini_service"].generate_json_payload(
+        result, extraction = app_state["gemini_service"].extract(
             schema_json, transcript
         )
 
         if result:
             app_state["gemini_result"] = result
             print("Analysis complete")
-            return jsonify({"success": True, "result": result})
+            return jsonify({"success": True, "result": result, "extraction": extraction})
 
         return jsonify({"error": "Analysis failed"}), 500
 
@@ -492,6 +809,15 @@ def download_file(file_type):
             audio_data = app_state["audio_data"]
             sample_rate = app_state["sample_rate"]
 
+            # After a live session, serve its captured recording
+            if audio_data is None and app_state["live_capture_id"]:
+                try:
+                    capture = LiveCapture.load(app_state["live_capture_id"])
+                    audio_data = capture.pcm()
+                except FileNotFoundError:
+                    return jsonify({"error": "Live capture not found"}), 404
+                sample_rate = capture.pcm_rate
+
             if audio_data is None:
                 return jsonify({"error": "No audio data found"}), 404
 
@@ -513,75 +839,302 @@ def download_file(file_type):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/profiles/<profile_id>/<kind>", methods=["GET"])
+def download_profile(profile_id, kind):
+    """Download a stored request profile (pstats, speedscope or summary)."""
+    path = profile_path(profile_id, kind) if PROFILING_ENABLED else None
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+
+@app.route("/api/live/<capture_id>/retranscribe", methods=["POST"])
+def retranscribe_live_capture(capture_id):
+    """Re-run (part of) a live recording through the batch transcription path"""
+    try:
+        if not init_services():
+            return jsonify({"error": "Service initialization failed"}), 500
+
+        try:
+            capture = find_live_capture(capture_id)
+        except (ValueError, FileNotFoundError):
+            return jsonify({"error": "Live capture not found"}), 404
+
+        options = request.get_json(silent=True) or request.form
+        try:
+            start = float(options.get("start", 0))
+            end = float(options["end"]) if options.get("end") not in (None, "") else None
+            preprocessing = options.get("preprocessing") or None
+            if preprocessing and preprocessing not in PREPROCESSING_CHAINS:
+                raise ValueError(f"Unknown preprocessing chain '{preprocessing}'")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        diarize = str(options.get("diarize", "")).lower() in ("1", "true", "yes", "on")
+        refine = str(options.get("refine", "")).lower() in ("1", "true", "yes", "on")
+
+        print(f"Re-transcribing live capture {capture_id} [{start}s - {end or 'end'}]")
+        service = app_state["transcription_service"]
+        segment_wav = capture.segment_wav(start, end)
+        transcription = service.transcribe_full_file(
+            segment_wav,
+            language_code="hi-IN",
+            preprocessing=preprocessing,
+            diarize=diarize,
+        )
+        transcript = transcription.transcript
+        if transcript and refine:
+            transcript = service.refine_low_confidence(
+                segment_wav, transcription, language_code="hi-IN", preprocessing=preprocessing
+            ) or transcript
+        if not transcript:
+            return jsonify({"error": "No speech detected in segment"}), 500
+
+        return jsonify(
+            {
+                "success": True,
+                "transcript": transcript,
+                "capture": capture.info(),
+                "segment": {"start": start, "end": end},
+                "preprocessing": transcription.preprocessing,
+                "speaker_turns": [turn.to_dict() for turn in transcription.speaker_turns] if diarize else [],
+                "segments": [segment.to_dict() for segment in transcription.segments],
+                "refinement": transcription.refinement,
+            }
+        )
+
+    except UnsupportedAudioFormat as e:
+        return jsonify({"error": str(e)}), 415
+    except Exception as e:
+        print(f"Re-transcription error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
 # WebSocket handlers for live transcription
 @socketio.on('connect')
 def handle_connect():
     print(f'Client connected: {request.sid}')
     emit('connected', {'status': 'ready', 'sid': request.sid})
 
+def save_live_session(session, status='streaming'):
+    """
+    Publish a session's heartbeat and status to the shared store (finals are appended as they come).
+
+    Returns False when another worker has taken the session over; the record is then left alone.
+    """
+    record = session['record']
+    record.update(
+        owner=WORKER_ID if status == 'streaming' else None,
+        heartbeat=time.time(),
+        status=status,
+    )
+    capture = session['capture']
+    if capture and capture.capture_id not in record['capture_ids']:
+        record['capture_ids'].append(capture.capture_id)
+    session['saved_at'] = time.monotonic()
+    try:
+        if not get_session_store().save_owned(record, WORKER_ID):
+            print(f'Live session {record["session_id"]} is owned by another worker now')
+            return False
+    except Exception as e:
+        print(f'Failed to save live session {record["session_id"]}: {e}')
+    return True
+
+def open_live_session(sid, record):
+    """Run a recognizer for the session in ``record`` on this worker, bound to client ``sid``."""
+    # Interims are throttled per client; finals go out as sequenced deltas
+    emitter = TranscriptEmitter(lambda event, payload: socketio.emit(event, payload, to=sid))
+    emitter.finals.extend(record['finals'])  # continue the numbering after a hand-off
+    
+    # Keep every frame on disk for download / batch re-transcription
+    capture = None
+    if LIVE_CAPTURE_ENABLED:
+        maybe_prune_captures()
+        capture = LiveCapture()
+    maybe_prune_sessions()
+    
+    service = LiveTranscriptionService(capture=capture)
+    session = {
+        'session_id': record['session_id'],
+        'record': record,
+        'service': service,
+        'emitter': emitter,
+        'capture': capture,
+        'stats_at': 0.0,
+        'saved_at': 0.0,
+    }
+    
+    def on_transcript(text, is_final):
+        if is_final:
+            seq = emitter.final(text)
+            try:
+                get_session_store().append_final(record['session_id'], seq, text)
+            except Exception as e:
+                print(f'Failed to save final of live session {record["session_id"]}: {e}')
+        else:
+            emitter.interim(text)
+    
+    app_state['live_sessions'][sid] = session
+    save_live_session(session)
+    service.start_streaming(on_transcript, language_code=record['language_code'])
+    return session
+
+def end_live_session(sid, graceful=True, status='stopped'):
+    """Stop and forget the live session of one client; returns it (or None)."""
+    session = app_state['live_sessions'].pop(sid, None)
+    if session:
+        session['service'].stop_streaming(graceful=graceful)
+        session['emitter'].close()
+        save_live_session(session, status)
+    return session
+
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f'Client disconnected: {request.sid}')
-    if app_state.get('live_service'):
-        try:
-            app_state['live_service'].stop_streaming()
-        except:
-            pass
+    try:
+        # The client is gone: cancel its stream instead of draining it, but
+        # keep the session resumable from any worker
+        end_live_session(request.sid, graceful=False, status='released')
+    except:
+        pass
 
 @socketio.on('start_stream')
+@traced_event
 def handle_start_stream():
+    sid = request.sid
     try:
         print('Starting live transcription stream')
         
         if not init_services():
             print('Failed to initialize services')
-            socketio.emit('error', {'message': 'Failed to initialize services'})
+            emit('error', {'message': 'Failed to initialize services'})
             return
         
-        app_state['live_transcript'] = ''
-        app_state['live_service'] = LiveTranscriptionService()
+        try:
+            admission.admit_live_stream(sum(1 for other in app_state['live_sessions'] if other != sid))
+        except Rejected as e:
+            emit('error', {'message': str(e), 'retry_after': e.retry_after})
+            return
         
-        def on_transcript(text, is_final):
-            if is_final:
-                app_state['live_transcript'] += text + ' '
-                print(f'Final: {text}')
-                socketio.emit('transcript_update', {
-                    'transcript': text,
-                    'is_final': True,
-                    'full_transcript': app_state['live_transcript']
-                })
-            else:
-                socketio.emit('transcript_update', {
-                    'transcript': text,
-                    'is_final': False
-                })
+        end_live_session(sid)
         
-        app_state['live_service'].start_streaming(on_transcript, language_code='hi-IN')
-        socketio.emit('stream_started', {'status': 'streaming'})
+        session = open_live_session(sid, new_record(uuid.uuid4().hex, 'hi-IN'))
+        capture = session['capture']
+        emit('stream_started', {
+            'status': 'streaming',
+            'session_id': session['session_id'],
+            'worker_id': WORKER_ID,
+            'capture_id': capture.capture_id if capture else None,
+        })
         
     except Exception as e:
         print(f'Error in start_stream: {e}')
-        socketio.emit('error', {'message': f'Failed to start stream: {str(e)}'})
+        emit('error', {'message': f'Failed to start stream: {str(e)}'})
+
+@socketio.on('resume_stream')
+@traced_event
+def handle_resume_stream(data):
+    """Continue a live session after a reconnect, possibly on a different worker."""
+    sid = request.sid
+    try:
+        session_id = (data or {}).get('session_id')
+        from_seq = int((data or {}).get('from_seq', 0))
+        
+        current = app_state['live_sessions'].get(sid)
+        if not current or current['session_id'] != session_id:
+            # The old connection may still hold the session on this worker
+            for old_sid, session in list(app_state['live_sessions'].items()):
+                if session['session_id'] == session_id:
+                    end_live_session(old_sid, graceful=False, status='released')
+            
+            if not init_services():
+                emit('error', {'message': 'Failed to initialize services'})
+                return
+            
+            try:
+                admission.admit_live_stream(sum(1 for other in app_state['live_sessions'] if other != sid))
+            except Rejected as e:
+                # Retried like a busy session; another worker may have room
+                emit('session_busy', {'session_id': session_id, 'retry_after': e.retry_after})
+                return
+            
+            store = get_session_store()
+            record = store.load(session_id) if session_id else None
+            if not record or record['status'] == 'stopped':
+                emit('error', {'message': 'Live session not found'})
+                return
+            record = claim(store, session_id)
+            if record is None:
+                # Still owned by a live worker; the client retries after the lease
+                emit('session_busy', {'session_id': session_id, 'retry_after': LIVE_SESSION_HEARTBEAT_SECONDS})
+                return
+            
+            end_live_session(sid)
+            current = open_live_session(sid, record)
+            print(f'Resumed live session {session_id} on {WORKER_ID}')
+        
+        emit('stream_resumed', {
+            'session_id': session_id,
+            'worker_id': WORKER_ID,
+            'finals': current['emitter'].since(from_seq),
+        })
+    
+    except Exception as e:
+        print(f'Error in resume_stream: {e}')
+        emit('error', {'message': f'Failed to resume stream: {str(e)}'})
 
 @socketio.on('audio_data')
 def handle_audio_data(data):
     try:
         audio_bytes = base64.b64decode(data['audio'])
-        if app_state['live_service']:
-            app_state['live_service'].add_audio_chunk(audio_bytes)
+        session = app_state['live_sessions'].get(request.sid)
+        if not session:
+            # Audio for a recognizer this worker does not own (restart / misrouted)
+            emit('session_moved', {'worker_id': WORKER_ID})
+            return
+        
+        session['service'].add_audio_chunk(audio_bytes)
+        AUDIO_BYTES.inc(len(audio_bytes), source='live')
+        
+        # Report queue depth so the client can see when the server falls behind
+        now = time.monotonic()
+        if now - session['stats_at'] >= LIVE_STATS_INTERVAL_SECONDS:
+            session['stats_at'] = now
+            emit('stream_stats', {**session['service'].buffer_stats(), 'emit': session['emitter'].stats})
+        if now - session['saved_at'] >= LIVE_SESSION_HEARTBEAT_SECONDS and not save_live_session(session):
+            # Another worker resumed the session while this one stalled: stop the duplicate stream
+            app_state['live_sessions'].pop(request.sid, None)
+            session['service'].stop_streaming(graceful=False)
+            session['emitter'].close()
+            emit('session_moved', {'worker_id': WORKER_ID})
     except Exception as e:
         print(f'Streaming error: {e}')
-        socketio.emit('error', {'message': str(e)})
+        emit('error', {'message': str(e)})
+
+@socketio.on('transcript_resync')
+def handle_transcript_resync(data):
+    """Resend finals a client missed (it detected a gap in the sequence numbers)."""
+    session = app_state['live_sessions'].get(request.sid)
+    if session:
+        from_seq = int((data or {}).get('from_seq', 0))
+        emit('transcript_resync', {'finals': session['emitter'].since(from_seq)})
 
 @socketio.on('stop_stream')
+@traced_event
 def handle_stop_stream():
     try:
-        if app_state['live_service']:
-            app_state['live_service'].stop_streaming()
+        session = end_live_session(request.sid)
+        
+        transcript = session['emitter'].full_transcript.strip() if session else ''
+        capture_id = session['capture'].capture_id if session and session['capture'] else None
+        if capture_id:
+            app_state['live_capture_id'] = capture_id
+            app_state['audio_data'] = None
         
-        transcript = app_state['live_transcript'].strip()
         if not transcript:
-            socketio.emit('error', {'message': 'No transcript generated'})
+            emit('error', {'message': 'No transcript generated'})
             return
         
         app_state['transcript'] = transcript
@@ -602,7 +1155,8 @@ Language: Hindi (hi-IN)
             
             bucket = app_state['transcription_service'].storage_client.bucket(GCS_BUCKET_NAME)
             blob = bucket.blob(filename)
-            blob.upload_from_string(content.encode('utf-8'), content_type='text/plain; charset=utf-8')
+            with timed('persist'):
+                blob.upload_from_string(content.encode('utf-8'), content_type='text/plain; charset=utf-8')
             print(f'Live transcript saved: {filename}')
         except Exception as e:
             print(f'Failed to save live transcript: {e}')
@@ -613,18 +1167,26 @@ Language: Hindi (hi-IN)
         
         if result:
             app_state['gemini_result'] = result
-            socketio.emit('analysis_complete', {'transcript': transcript, 'result': result})
+            emit('analysis_complete', {'transcript': transcript, 'result': result, 'capture_id': capture_id})
         else:
-            socketio.emit('error', {'message': 'Analysis failed'})
+            emit('error', {'message': 'Analysis failed'})
             
     except Exception as e:
         print(f'Stop stream error: {e}')
-        socketio.emit('error', {'message': str(e)})
+        emit('error', {'message': str(e)})
 
 if __name__ == "__main__":
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-    port = int(os.environ.get("PORT", 8080))
+    port = int(os.environ.get("PORT", 5000))
     print(f"Environment PORT: {os.environ.get('PORT', 'Not set')}")
     print(f"Starting Singaji Setu Agent Backend on port {port}...")
     init_services()
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True, allow_unsafe_werkzeug=True)
+    # Workers started by run_workers.py must not fork a reloader
+    socketio.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        debug=True,
+        use_reloader=not os.environ.get("WORKER_ID"),
+        allow_unsafe_werkzeug=True,
+    )
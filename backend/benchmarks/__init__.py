@@ -0,0 +1 @@
+# Benchmarks package for Singaji Setu AGENT
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of the pipeline against local cloud stand-ins.
+
+Runs the real Flask app, TranscriptionService, GeminiService and live engine
+with the fakes from benchmarks/fakes.py (filesystem GCS, Speech with
+configurable latency/quota, deterministic Gemini), on synthetic audio.
+Three cases:
+
+- ``process``: POST /api/process with a WAV upload (upload, transcribe, analyze, persist)
+- ``chunked``: ``transcribe_full_file`` with the default preprocessing chain,
+  i.e. decode + preprocess + per-chunk encode/upload/recognize
+- ``live``: N concurrent live streams on the asyncio engine
+
+With ``--backfill N``, N batch jobs keep transcribing long files in the
+background (scheduled as ``batch`` work of another tenant) while the cases
+run, to check that interactive latency holds up under a saturating backfill.
+
+Each case reports p50/p95 latency, throughput, peak RSS and CPU. The JSON
+report goes to stdout (service logs go to stderr); ``--output`` saves it and
+``--compare`` prints the change against an earlier report.
+
+Usage (from backend/):
+    python -m benchmarks.bench_e2e --durations 60 600 7200 --streams 100 --output after.json
+    python -m benchmarks.bench_e2e --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.bench_live_streams import FRAME, FRAMES_PER_SECOND, FakeAsyncClient
+from benchmarks.fakes import FakeSpeechClient, FakeStorageClient, fake_gemini_llm
+from services.gemini_service import GeminiService
+from services.live_audio_buffer import LiveAudioBuffer
+from services.live_engine import LiveStreamEngine
+from services.live_transcription_service import LiveTranscriptionService
+from services.transcription_service import TranscriptionService
+from services.work_scheduler import get_work_scheduler, work_class
+
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 60
+
+
+def make_wav(duration_s, sample_rate=SAMPLE_RATE):
+    """Mono 16-bit WAV of a modulated tone over noise, generated block by block."""
+    rng = np.random.default_rng(0)
+    buffer = BytesIO()
+    with sf.SoundFile(buffer, "w", sample_rate, 1, format="WAV", subtype="PCM_16") as f:
+        written = 0
+        total = int(duration_s * sample_rate)
+        while written < total:
+            n = min(BLOCK_SECONDS * sample_rate, total - written)
+            t = (np.arange(n) + written) / sample_rate
+            block = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t))
+            block += 0.01 * rng.standard_normal(n)
+            f.write(block.astype(np.float32))
+            written += n
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 3) if values else None
+
+
+class ResourceMonitor:
+    """Peak RSS (sampled) and CPU seconds, including reaped child processes, over a block."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+
+    def _rss(self):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    def __enter__(self):
+        self.peak_rss = self._rss()
+        self._times = os.times()
+        self._wall = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self._rss())
+        end = os.times()
+        self.wall_s = time.perf_counter() - self._wall
+        self.cpu_s = sum(end[:4]) - sum(self._times[:4])
+
+    def report(self):
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "cpu_s": round(self.cpu_s, 2),
+            "cpu_percent": round(100 * self.cpu_s / self.wall_s, 1) if self.wall_s else 0,
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+        }
+
+
+def make_services(storage_root, args):
+    storage = FakeStorageClient(storage_root)
+    speech_client = FakeSpeechClient(
+        storage,
+        latency=args.speech_latency,
+        realtime_factor=args.speech_rtf,
+        requests_per_second=args.speech_rps,
+    )
+    # Every job transcribes the same audio, so checkpoints would turn reruns into lookups
+    transcription = TranscriptionService(
+        "bench-bucket", "bench-project", "local", speech_client=speech_client, storage_client=storage,
+        checkpoints=False,
+    )
+    gemini = GeminiService(llm=fake_gemini_llm(args.gemini_latency, args.gemini_per_kchar))
+    return transcription, gemini, speech_client
+
+
+class Backfill:
+    """Background batch jobs transcribing ``duration``-second files until stopped."""
+
+    def __init__(self, transcription, jobs, duration):
+        self.transcription = transcription
+        self.jobs = jobs
+        self.wav = make_wav(duration) if jobs else b""
+        self.files = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        with work_class("batch", "backfill"):
+            while not self._stop.is_set():
+                # Like bulk_ingest: files arrive preprocessed and are uploaded as-is
+                self.transcription.transcribe_full_file(BytesIO(self.wav), preprocessing="none")
+                self.files += 1
+
+    def __enter__(self):
+        for _ in range(self.jobs):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        # Let the backfill fill the Speech slots before measuring
+        deadline = time.monotonic() + 10
+        while self.jobs and time.monotonic() < deadline and not get_work_scheduler().stats()["speech"]["queued"]:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def run_process(args, transcription, gemini, speech_client, duration):
+    import app as backend
+
+    backend.app_state["transcription_service"] = transcription
+    backend.app_state["gemini_service"] = gemini
+    wav = make_wav(duration)
+    calls_before = speech_client.calls
+
+    def one_request(_):
+        client = backend.app.test_client()
+        start = time.perf_counter()
+        response = client.post(
+            "/api/process",
+            data={"audio": (BytesIO(wav), "bench.wav"), "pipelined": str(args.pipelined).lower()},
+            content_type="multipart/form-data",
+        )
+        return time.perf_counter() - start, response.status_code == 200
+
+    with ResourceMonitor() as monitor, ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(one_request, range(args.repeats)))
+    latencies = [elapsed for elapsed, _ in results]
+    return {
+        "case": "process",
+        "pipelined": args.pipelined,
+        "audio_seconds": duration,
+        "runs": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "audio_hours_per_hour": round(duration * len(results) / monitor.wall_s, 1),
+        "speech_calls": speech_client.calls - calls_before,
+        **monitor.report(),
+    }
+
+
+def run_chunked(args, transcription, speech_client, duration):
+    wav = make_wav(duration)
+    calls_before = speech_client.calls
+    latencies, errors = [], 0
+    with ResourceMonitor() as monitor:
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            result = transcription.transcribe_full_file(BytesIO(wav), preprocessing="default")
+            latencies.append(time.perf_counter() - start)
+            errors += not result.transcript or bool(result.failed_chunks)
+    return {
+        "case": "chunked",
+        "audio_seconds": duration,
+        "runs": len(latencies),
+        "errors": errors,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "audio_hours_per_hour": round(duration * len(latencies) / monitor.wall_s, 1),
+        "speech_calls": speech_client.calls - calls_before,
+        "throttled": speech_client.throttled,
+        **monitor.report(),
+    }
+
+
+def run_live(args, streams):
+    """Latency is start_streaming to the first final transcript of each stream."""
+    engine = LiveStreamEngine(client_factory=FakeAsyncClient)
+    first_final = {}
+    finals = [0]
+    lock = threading.Lock()
+
+    def on_transcript_for(index, started):
+        def on_transcript(text, is_final):
+            if is_final:
+                with lock:
+                    finals[0] += 1
+                    first_final.setdefault(index, time.perf_counter() - started)
+        return on_transcript
+
+    with ResourceMonitor() as monitor:
+        services = []
+        for index in range(streams):
+            service = LiveTranscriptionService(audio_buffer=LiveAudioBuffer(coalesce_wait=0), engine=engine)
+            service.start_streaming(on_transcript_for(index, time.perf_counter()))
+            services.append(service)
+        for _ in range(int(args.live_seconds * FRAMES_PER_SECOND)):
+            tick = time.perf_counter()
+            for service in services:
+                service.add_audio_chunk(FRAME)
+            time.sleep(max(0.0, 1 / FRAMES_PER_SECOND - (time.perf_counter() - tick)))
+        for service in services:
+            service.stop_streaming()
+        engine.shutdown()
+
+    latencies = list(first_final.values())
+    return {
+        "case": "live",
+        "streams": streams,
+        "audio_seconds": args.live_seconds,
+        "errors": streams - len(first_final),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "finals_per_s": round(finals[0] / monitor.wall_s, 1),
+        **monitor.report(),
+    }
+
+
+def case_key(row):
+    return (row["case"], row.get("audio_seconds"), row.get("streams"))
+
+
+def compare(report, baseline_path):
+    """Print p50/p95/throughput/RSS changes against an earlier report."""
+    with open(baseline_path) as f:
+        baseline = {case_key(row): row for row in json.load(f)["cases"]}
+    fields = ["p50_s", "p95_s", "audio_hours_per_hour", "finals_per_s", "peak_rss_mb", "cpu_s"]
+    for row in report["cases"]:
+        before = baseline.get(case_key(row))
+        if not before:
+            continue
+        changes = []
+        for field in fields:
+            if row.get(field) is not None and before.get(field):
+                changes.append(f"{field} {before[field]} -> {row[field]} ({(row[field] / before[field] - 1) * 100:+.1f}%)")
+        label = f"{row['case']} {row.get('streams') or row.get('audio_seconds')}"
+        print(f"{label}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", default=["process", "chunked", "live"])
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600], help="audio seconds")
+    parser.add_argument("--streams", type=int, nargs="+", default=[50])
+    parser.add_argument("--live-seconds", type=float, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1, help="parallel /api/process requests")
+    parser.add_argument("--speech-latency", type=float, default=0.2)
+    parser.add_argument("--speech-rtf", type=float, default=0.01, help="fake recognize seconds per audio second")
+    parser.add_argument("--speech-rps", type=float, default=0, help="Speech quota, 0 = unlimited")
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--gemini-per-kchar", type=float, default=0.05, help="fake Gemini seconds per 1000 prompt chars")
+    parser.add_argument("--pipelined", action="store_true", help="overlap Gemini with chunk transcription")
+    parser.add_argument("--backfill", type=int, default=0, help="background batch jobs during the cases")
+    parser.add_argument("--backfill-duration", type=float, default=3600, help="audio seconds per backfill file")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", metavar="BASELINE")
+    args = parser.parse_args()
+
+    report = {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-gcs-") as storage_root:
+        transcription, gemini, speech_client = make_services(storage_root, args)
+        # Keep stdout for the report; the services log with print()
+        with contextlib.redirect_stdout(sys.stderr), \
+                Backfill(transcription, args.backfill, args.backfill_duration) as backfill:
+            for duration in args.durations:
+                if "process" in args.cases:
+                    report["cases"].append(run_process(args, transcription, gemini, speech_client, duration))
+                if "chunked" in args.cases:
+                    report["cases"].append(run_chunked(args, transcription, speech_client, duration))
+            if "live" in args.cases:
+                for streams in args.streams:
+                    report["cases"].append(run_live(args, streams))
+        report["backfill_files"] = backfill.files
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent live streams on the asyncio engine vs thread per stream.
+
+Both modes run the real LiveTranscriptionService, LiveAudioBuffer and
+StreamRollover against fake Speech clients that answer with a final result
+every few requests, so only the concurrency model differs. Each session
+receives a 250 ms MediaRecorder-sized frame four times a second. Every case
+runs in a fresh process, so ``max_rss_mb`` (the process high-water mark) and
+the thread counts belong to that case alone.
+
+Usage (from backend/):
+    python -m benchmarks.bench_live_streams --streams 50 200 500 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from google.cloud import speech
+
+from services.live_audio_buffer import LiveAudioBuffer
+from services.live_engine import LiveStreamEngine
+from services.live_transcription_service import LiveTranscriptionService
+
+FRAME = b"\x00" * 4000  # ~250 ms of WebM/Opus
+FRAMES_PER_SECOND = 4
+REQUESTS_PER_RESULT = 4
+RESPONSE_LATENCY = 0.05  # simulated recognizer round trip
+
+
+def make_response(index):
+    return speech.StreamingRecognizeResponse(
+        results=[
+            speech.StreamingRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(transcript=f"word{index}")],
+                is_final=True,
+                result_end_time=timedelta(seconds=index),
+            )
+        ]
+    )
+
+
+class FakeSyncClient:
+    """Blocking streaming_recognize, like the gRPC iterator of speech.SpeechClient."""
+
+    def streaming_recognize(self, config, requests):
+        count = 0
+        for _ in requests:
+            count += 1
+            if count % REQUESTS_PER_RESULT == 0:
+                time.sleep(RESPONSE_LATENCY)
+                yield make_response(count)
+
+
+class FakeAsyncClient:
+    """Async streaming_recognize, like speech.SpeechAsyncClient."""
+
+    async def streaming_recognize(self, requests):
+        async def responses():
+            count = 0
+            async for request in requests:
+                if request.streaming_config:
+                    continue
+                count += 1
+                if count % REQUESTS_PER_RESULT == 0:
+                    await asyncio.sleep(RESPONSE_LATENCY)
+                    yield make_response(count)
+
+        return responses()
+
+
+def run_case(mode, streams, seconds):
+    finals = [0]
+    lock = threading.Lock()
+
+    def on_transcript(text, is_final):
+        if is_final:
+            with lock:
+                finals[0] += 1
+
+    engine = LiveStreamEngine(client_factory=FakeAsyncClient) if mode == "asyncio" else None
+    baseline_threads = threading.active_count()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    services = []
+    for _ in range(streams):
+        buffer = LiveAudioBuffer(coalesce_wait=0)
+        if engine:
+            service = LiveTranscriptionService(audio_buffer=buffer, engine=engine)
+        else:
+            service = LiveTranscriptionService(client=FakeSyncClient(), audio_buffer=buffer)
+        service.start_streaming(on_transcript)
+        services.append(service)
+    start_s = time.perf_counter() - wall_start
+
+    # One producer thread feeds every session in real time, like Socket.IO handlers would
+    peak_threads = threading.active_count()
+    for _ in range(int(seconds * FRAMES_PER_SECOND)):
+        tick = time.perf_counter()
+        for service in services:
+            service.add_audio_chunk(FRAME)
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(max(0.0, 1 / FRAMES_PER_SECOND - (time.perf_counter() - tick)))
+
+    stop_start = time.perf_counter()
+    for service in services:
+        service.stop_streaming()
+    stop_s = time.perf_counter() - stop_start
+    if engine:
+        engine.shutdown()
+
+    return {
+        "mode": mode,
+        "streams": streams,
+        "extra_threads": peak_threads - baseline_threads,
+        "finals": finals[0],
+        "cpu_s": round(time.process_time() - cpu_start, 2),
+        "start_s": round(start_s, 3),
+        "stop_s": round(stop_s, 3),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--streams", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--modes", nargs="+", default=["threads", "asyncio"])
+    args = parser.parse_args()
+
+    report = []
+    for streams in args.streams:
+        for mode in args.modes:
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                row = pool.submit(run_case, mode, streams, args.seconds).result()
+            report.append(row)
+            print(json.dumps(row))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fused float32 preprocessing kernel against the legacy path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_preprocess --durations 60 600 3600
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.audio_preprocessing import preprocess_audio
+
+
+def legacy_preprocess(audio_data):
+    """The pre-kernel implementation from TranscriptionService, kept for comparison."""
+    if len(audio_data.shape) > 1:
+        audio_data = np.mean(audio_data, axis=1)
+    audio_data = audio_data / np.max(np.abs(audio_data)) * 0.8
+    threshold = np.max(np.abs(audio_data)) * 0.02
+    audio_data[np.abs(audio_data) < threshold] = 0
+    return audio_data
+
+
+def make_audio(duration_s, sample_rate, channels, dtype):
+    """Synthetic speech-like signal: modulated tone plus background noise."""
+    rng = np.random.default_rng(0)
+    n = int(duration_s * sample_rate)
+    t = np.arange(n, dtype=np.float64) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t))
+    signal += 0.01 * rng.standard_normal(n)
+    if channels > 1:
+        signal = np.stack([signal] * channels, axis=1)
+    return signal.astype(dtype)
+
+
+def run_case(fn, audio, repeats):
+    """Return (best seconds, peak traced bytes) for fn over fresh copies of audio."""
+    best = float("inf")
+    peak_bytes = 0
+    for _ in range(repeats):
+        data = audio.copy()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = min(best, elapsed)
+        peak_bytes = max(peak_bytes, peak)
+    return best, peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600, 1800])
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    report = []
+    for duration in args.durations:
+        # Legacy path decoded as float64 (sf.read default); the kernel reads float32
+        legacy_audio = make_audio(duration, args.sample_rate, args.channels, np.float64)
+        fused_audio = legacy_audio.astype(np.float32)
+
+        legacy_time, legacy_mem = run_case(legacy_preprocess, legacy_audio, args.repeats)
+        fused_time, fused_mem = run_case(preprocess_audio, fused_audio, args.repeats)
+
+        row = {
+            "duration_s": duration,
+            "input_mb": {
+                "legacy": round(legacy_audio.nbytes / 1e6, 1),
+                "fused": round(fused_audio.nbytes / 1e6, 1),
+            },
+            "time_s": {"legacy": round(legacy_time, 4), "fused": round(fused_time, 4)},
+            "peak_alloc_mb": {
+                "legacy": round(legacy_mem / 1e6, 1),
+                "fused": round(fused_mem / 1e6, 1),
+            },
+            "speedup": round(legacy_time / fused_time, 2) if fused_time else None,
+        }
+        report.append(row)
+        print(json.dumps(row))
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark of selective re-transcription against a full re-run.
+
+Transcribes one WAV file (``--duration`` seconds) through TranscriptionService
+and the fakes of benchmarks/fakes.py, where ``--low-confidence-rate`` of the
+recognition results come back unsure. The first pass is then improved with
+the stronger ``REFINE_MODEL`` in two ways:
+
+- ``full``: every segment is recognized again (what users did by re-running
+  the file)
+- ``selective``: only spans under ``REFINE_CONFIDENCE_THRESHOLD``
+
+Each reports the Speech audio seconds billed, calls, wall time and the
+low-confidence segments left.
+
+Usage (from backend/):
+    python -m benchmarks.bench_refine --duration 1800 --low-confidence-rate 0.1
+"""
+import argparse
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from benchmarks.bench_e2e import make_wav
+from benchmarks.fakes import FakeSpeechClient, FakeStorageClient
+from config.settings import REFINE_CONFIDENCE_THRESHOLD
+from services.refinement import TranscriptSegment
+from services.transcription_service import TranscriptionService
+
+MODES = {"full": 1.01, "selective": REFINE_CONFIDENCE_THRESHOLD}  # confidence threshold per mode
+
+
+def low_segments(segments):
+    return sum(1 for segment in segments if 0.0 < segment.confidence < REFINE_CONFIDENCE_THRESHOLD)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=1800, help="audio seconds")
+    parser.add_argument("--low-confidence-rate", type=float, default=0.1)
+    parser.add_argument("--speech-latency", type=float, default=0.5)
+    parser.add_argument("--speech-rtf", type=float, default=0.005)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = {"config": vars(args), "cases": []}
+    wav = make_wav(args.duration)
+    with tempfile.TemporaryDirectory(prefix="bench-gcs-") as storage_root:
+        storage = FakeStorageClient(storage_root)
+        speech_client = FakeSpeechClient(
+            storage, latency=args.speech_latency, realtime_factor=args.speech_rtf,
+            low_confidence_rate=args.low_confidence_rate,
+        )
+        service = TranscriptionService(
+            "bench-bucket", "bench-project", "local", speech_client=speech_client, storage_client=storage,
+            checkpoints=False,
+        )
+        # Keep stdout for the report; the services log with print()
+        with contextlib.redirect_stdout(sys.stderr):
+            transcription = service.transcribe_full_file(BytesIO(wav), preprocessing="none")
+            first_pass = [segment.to_dict() for segment in transcription.segments]
+            report["first_pass"] = {
+                "segments": len(first_pass),
+                "low_confidence_segments": low_segments(transcription.segments),
+                "speech_audio_seconds": round(speech_client.audio_seconds, 1),
+            }
+            for mode, threshold in MODES.items():
+                transcription.segments = [TranscriptSegment(**segment) for segment in first_pass]
+                calls_before, seconds_before = speech_client.calls, speech_client.audio_seconds
+                start = time.perf_counter()
+                service.refine_low_confidence(BytesIO(wav), transcription, threshold=threshold)
+                report["cases"].append({
+                    "mode": mode,
+                    "wall_s": round(time.perf_counter() - start, 3),
+                    "speech_calls": speech_client.calls - calls_before,
+                    "speech_audio_seconds": round(speech_client.audio_seconds - seconds_before, 1),
+                    "spans": transcription.refinement["spans"],
+                    "replaced_spans": transcription.refinement["replaced_spans"],
+                    "low_confidence_segments_left": low_segments(transcription.segments),
+                })
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark of hedging, retries and circuit breaking against a heavy-tailed Speech.
+
+Transcribes ``--jobs`` chunked WAV files (``--duration`` seconds, so each job
+waits for its slowest chunk) through TranscriptionService and the fakes of
+benchmarks/fakes.py. Speech latency is multiplied by a Pareto(``--tail-alpha``)
+sample and ``--error-rate`` of the calls fail with ServiceUnavailable. Two
+policies run on the same workload:
+
+- ``baseline``: one attempt per chunk, no hedging, no breaker
+- ``resilient``: the Speech policy from ``RESILIENCE_BACKENDS``
+
+Each reports job p50/p95/p99, failed chunks, hedges, retries and the Speech
+calls spent. ``--outage`` adds a case where every call fails, showing how
+quickly jobs fail once the breaker is open.
+
+Hedges only help once the operation poller notices the winner, so a
+lower ``LRO_POLL_MAX_SECONDS`` shows the effect with fewer jobs.
+
+Usage (from backend/):
+    python -m benchmarks.bench_resilience --jobs 40 --tail-alpha 1.5 --error-rate 0.02
+    LRO_POLL_MAX_SECONDS=2 python -m benchmarks.bench_resilience --jobs 120 --concurrency 8 --outage
+"""
+import argparse
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from benchmarks.bench_e2e import make_wav, percentile
+from benchmarks.fakes import FakeSpeechClient, FakeStorageClient
+from services.resilience import configure_backend
+from services.transcription_service import TranscriptionService
+from utils.metrics import RESILIENCE_EVENTS
+
+POLICIES = {
+    "baseline": {"max_attempts": 1, "hedge_budget": 0.0, "failure_threshold": 10**9},
+    "resilient": {},
+}
+
+
+def run_jobs(args, storage_root, policy, error_rate, jobs, warmup):
+    storage = FakeStorageClient(storage_root)
+    speech_client = FakeSpeechClient(
+        storage, latency=args.speech_latency, realtime_factor=args.speech_rtf,
+        tail_alpha=args.tail_alpha, error_rate=error_rate,
+    )
+    service = TranscriptionService(
+        "bench-bucket", "bench-project", "local", speech_client=speech_client, storage_client=storage,
+        checkpoints=False,
+    )
+    backend = configure_backend("speech", **POLICIES[policy])
+    wav = make_wav(args.duration)
+
+    def one_job(_):
+        start = time.perf_counter()
+        result = service.transcribe_full_file(BytesIO(wav), preprocessing="none")
+        return time.perf_counter() - start, len(result.failed_chunks)
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(one_job, range(warmup)))  # fills the latency window used for hedging
+        calls_before = speech_client.calls
+        retries_before = RESILIENCE_EVENTS.value(backend="speech", event="retry")
+        hedges_before = backend.hedges
+        start = time.perf_counter()
+        results = list(pool.map(one_job, range(jobs)))
+        wall = time.perf_counter() - start
+
+    latencies = [elapsed for elapsed, _ in results]
+    return {
+        "policy": policy,
+        "error_rate": error_rate,
+        "jobs": jobs,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "max_s": round(max(latencies), 3),
+        "wall_s": round(wall, 3),
+        "failed_chunks": sum(failed for _, failed in results),
+        "jobs_with_failures": sum(1 for _, failed in results if failed),
+        "speech_calls": speech_client.calls - calls_before,
+        "hedges": backend.hedges - hedges_before,
+        "retries": int(RESILIENCE_EVENTS.value(backend="speech", event="retry") - retries_before),
+        "breaker": backend.breaker.state,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--warmup", type=int, default=6, help="unmeasured jobs before each policy")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=720, help="audio seconds per job (180 s chunks)")
+    parser.add_argument("--speech-latency", type=float, default=0.5)
+    parser.add_argument("--speech-rtf", type=float, default=0.005)
+    parser.add_argument("--tail-alpha", type=float, default=1.5, help="Pareto shape of the latency multiplier")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--outage", action="store_true", help="also run with every Speech call failing")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = {"config": vars(args), "cases": []}
+    with tempfile.TemporaryDirectory(prefix="bench-gcs-") as storage_root:
+        # Keep stdout for the report; the services log with print()
+        with contextlib.redirect_stdout(sys.stderr):
+            for policy in POLICIES:
+                report["cases"].append(run_jobs(args, storage_root, policy, args.error_rate, args.jobs, args.warmup))
+            if args.outage:
+                for policy in POLICIES:
+                    report["cases"].append(run_jobs(args, storage_root, policy, 1.0, args.concurrency * 2, 0))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark of rule-based pre-extraction in front of Gemini.
+
+Runs GeminiService over the interview transcripts of
+benchmarks/fixtures/interviews.jsonl with the default survey schema and the
+deterministic Gemini stand-in of benchmarks/fakes.py, twice:
+
+- ``llm_only``: the whole schema and transcript go to Gemini (rules off)
+- ``rules``: fields the rules fill confidently are kept, Gemini gets the rest
+
+Each reports the prompt characters and estimated tokens sent (the fixed
+instructions included), the transcript characters and schema fields sent,
+Gemini calls (and calls skipped because nothing was left), wall time, and
+how many of the rule-filled fields match the fixture's expected values.
+``--fields`` narrows the schema, e.g. to the pattern-like fields only.
+
+Tokens are estimated offline (words and punctuation marks, with long words
+counted as several pieces), so compare them between the two modes rather
+than read them as billed tokens.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rule_extraction --output rules.json
+    python -m benchmarks.bench_rule_extraction --fields farmer_name age village district land_size_acres contact_number
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fakes import fake_gemini_llm
+from config.settings import DEFAULT_SURVEY_SCHEMA
+from services.gemini_service import GeminiService
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "interviews.jsonl")
+MODES = {"llm_only": False, "rules": True}  # rules flag per mode
+
+
+def estimate_tokens(text):
+    """Word pieces of about four characters, plus one per punctuation mark."""
+    pieces = re.findall(r"\w+|[^\w\s]", text)
+    return sum(max(1, -(-len(piece) // 4)) for piece in pieces)
+
+
+def load_interviews(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def matches(value, expected):
+    if isinstance(expected, float) or isinstance(value, float):
+        return isinstance(value, (int, float)) and abs(value - expected) <= 0.05
+    return value == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--fields", nargs="+", help="schema fields to keep (default: the whole survey schema)")
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    parser.add_argument("--gemini-per-kchar", type=float, default=0.05)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    interviews = load_interviews(args.fixtures)
+    fields = {name: value for name, value in DEFAULT_SURVEY_SCHEMA.items() if not args.fields or name in args.fields}
+    schema = json.dumps(fields, indent=2)
+    report = {"config": vars(args), "interviews": len(interviews), "cases": []}
+    for mode, rules in MODES.items():
+        prompts = []
+
+        def record(prompt_value):
+            prompts.append(prompt_value.to_string())
+            return prompt_value
+
+        llm = RunnableLambda(record) | fake_gemini_llm(args.gemini_latency, args.gemini_per_kchar)
+        service = GeminiService(llm=llm, rules=rules)
+        rule_fields = correct = expected_fields = transcript_chars = fields_sent = 0
+        errors = []
+        start = time.perf_counter()
+        # Keep stdout for the report; the services log with print()
+        with contextlib.redirect_stdout(sys.stderr):
+            for interview in interviews:
+                payload, extraction = service.extract(schema, interview["transcript"])
+                if payload is None:
+                    errors.append(interview["id"])
+                    continue
+                expected = {name: value for name, value in interview["expected"].items() if name in fields}
+                expected_fields += len(expected)
+                if extraction is None:
+                    transcript_chars += len(interview["transcript"])
+                    fields_sent += len(fields)
+                elif extraction["llm_called"]:
+                    transcript_chars += extraction["sent_chars"]
+                    fields_sent += len(extraction["llm_fields"])
+                filled = extraction["rule_fields"] if extraction else {}
+                for name, value in filled.items():
+                    rule_fields += 1
+                    if matches(value["value"], expected.get(name)):
+                        correct += 1
+                    else:
+                        errors.append(f"{interview['id']}.{name}={value['value']!r}")
+        wall = time.perf_counter() - start
+        report["cases"].append({
+            "mode": mode,
+            "wall_s": round(wall, 3),
+            "gemini_calls": len(prompts),
+            "skipped_calls": len(interviews) - len(prompts),
+            "prompt_chars": sum(len(prompt) for prompt in prompts),
+            "prompt_tokens_est": sum(estimate_tokens(prompt) for prompt in prompts),
+            "transcript_chars_sent": transcript_chars,
+            "schema_fields_sent": fields_sent,
+            "rule_fields": rule_fields,
+            "rule_fields_correct": correct,
+            "rule_recall": round(correct / expected_fields, 3) if expected_fields else None,
+            "errors": errors,
+        })
+
+    baseline, current = report["cases"]
+    if baseline["prompt_tokens_est"]:
+        report["token_savings"] = round(1 - current["prompt_tokens_est"] / baseline["prompt_tokens_est"], 3)
+    if baseline["transcript_chars_sent"]:
+        report["transcript_savings"] = round(1 - current["transcript_chars_sent"] / baseline["transcript_chars_sent"], 3)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for the cloud services, for offline benchmarks.
+
+- ``FakeStorageClient``: the subset of ``google.cloud.storage.Client`` the
+  backend uses, backed by a directory on disk.
+- ``FakeSpeechClient``: ``long_running_recognize`` whose operations take
+  ``latency + realtime_factor * audio seconds`` and return canned word-timed
+  (optionally diarized) results; ``result()`` polls like the real client.
+  ``requests_per_second`` throttles like a quota: calls over the rate wait
+  for a token and are counted. ``tail_alpha`` multiplies the latency by a
+  Pareto(alpha) sample (heavy tail: most calls fast, a few very slow) and
+  ``error_rate`` makes that share of calls fail with ``ServiceUnavailable``.
+  Operations are named and can be fetched again through
+  ``transport.operations_client`` (as after a restart) while the client lives.
+  Responses have one result per ``RESULT_SECONDS``; ``low_confidence_rate``
+  of them are unsure, except with a stronger model (``STRONGER_MODELS``).
+- ``fake_gemini_llm``: a deterministic LangChain runnable that fills every
+  key of the schema in the prompt, after a latency that grows with the
+  prompt length (optionally heavy-tailed and failing, like the Speech fake).
+"""
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import soundfile as sf
+from google.api_core import exceptions as api_exceptions
+from google.cloud import speech
+from google.longrunning import operations_pb2
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+CANNED_WORDS = "kisan ne bataya ki is saal gehun ki fasal achhi rahi aur paani ki kami nahi thi".split()
+WORDS_PER_SECOND = 2
+WORDS_PER_TURN = 12
+RESULT_SECONDS = 10
+STRONGER_MODELS = ("latest_long", "phone_call", "video")
+
+
+class LatencyModel:
+    """Latency multiplier and failure injection shared by the fakes (seeded, thread-safe)."""
+
+    def __init__(self, tail_alpha=0.0, error_rate=0.0, seed=0):
+        self.tail_alpha = tail_alpha
+        self.error_rate = error_rate
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def multiplier(self):
+        if not self.tail_alpha:
+            return 1.0
+        with self._lock:
+            return self._random.paretovariate(self.tail_alpha)
+
+    def maybe_fail(self, what):
+        with self._lock:
+            failing = self.error_rate and self._random.random() < self.error_rate
+            self.failures += bool(failing)
+        if failing:
+            raise api_exceptions.ServiceUnavailable(f"fake {what} unavailable")
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.path = os.path.join(bucket.path, name)
+
+    def upload_from_file(self, file_obj, content_type=None, size=None, timeout=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "wb") as f:
+            shutil.copyfileobj(file_obj, f)
+
+    def upload_from_string(self, data, content_type=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def download_as_bytes(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def delete(self):
+        os.remove(self.path)
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.name = name
+        self.path = os.path.join(client.root, name)
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def exists(self):
+        return True
+
+
+class FakeStorageClient:
+    """Filesystem-backed ``storage.Client``; ``gs://bucket/name`` maps to ``root/bucket/name``."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def bucket(self, name):
+        return FakeBucket(self, name)
+
+    def create_bucket(self, name, location=None):
+        return FakeBucket(self, name)
+
+    def path_for(self, uri):
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        return os.path.join(self.root, bucket, name)
+
+
+class FakeOperation:
+    def __init__(self, name, response, ready_at):
+        self.operation = operations_pb2.Operation(name=name)
+        self._response = response
+        self._ready_at = ready_at
+
+    def done(self):
+        return time.monotonic() >= self._ready_at
+
+    def result(self, timeout=None):
+        # Like google.api_core's blocking poll: check done() with 1 s x1.5 backoff up to 20 s
+        delay = 1.0
+        while not self.done():
+            time.sleep(delay)
+            delay = min(delay * 1.5, 20.0)
+        return self._response
+
+
+class FakeOperationsClient:
+    """``OperationsClient.get_operation`` over the operations a ``FakeSpeechClient`` started."""
+
+    def __init__(self, operations):
+        self._operations = operations
+
+    def get_operation(self, name, retry=None, metadata=None, **kwargs):
+        operation = self._operations.get(name)
+        if operation is None:
+            raise api_exceptions.NotFound(f"Operation {name} not found")
+        message = operations_pb2.Operation(name=name, done=operation.done())
+        if message.done:
+            message.response.Pack(speech.LongRunningRecognizeResponse.pb(operation._response))
+        return message
+
+    def cancel_operation(self, name, retry=None, metadata=None, **kwargs):
+        pass
+
+
+class FakeSpeechClient:
+    """``SpeechClient.long_running_recognize`` with configurable latency and quota."""
+
+    def __init__(
+        self, storage_client, latency=0.2, realtime_factor=0.01, requests_per_second=0.0, tail_alpha=0.0, error_rate=0.0,
+        low_confidence_rate=0.0,
+    ):
+        self.storage_client = storage_client
+        self.latency = latency
+        self.realtime_factor = realtime_factor
+        self.requests_per_second = requests_per_second
+        self.model = LatencyModel(tail_alpha, error_rate)
+        self.low_confidence_rate = low_confidence_rate
+        self.calls = 0
+        self.audio_seconds = 0.0  # billed audio
+        self.throttled = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self._operations = {}
+        self.transport = SimpleNamespace(operations_client=FakeOperationsClient(self._operations))
+
+    def _throttle(self):
+        if not self.requests_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.requests_per_second
+        if slot > now:
+            self.throttled += 1
+            time.sleep(slot - now)
+
+    def long_running_recognize(self, config, audio):
+        self._throttle()
+        with self._lock:
+            self.calls += 1
+            name = f"fake-operation-{self.calls}"
+        self.model.maybe_fail("speech")
+        duration = sf.info(self.storage_client.path_for(audio.uri)).duration
+        with self._lock:
+            self.audio_seconds += duration
+        stronger = config.model in STRONGER_MODELS or config.use_enhanced
+        response = canned_response(
+            duration,
+            diarize="diarization_config" in config,
+            low_confidence_rate=0.0 if stronger else self.low_confidence_rate,
+        )
+        delay = (self.latency + self.realtime_factor * duration) * self.model.multiplier()
+        operation = self._operations[name] = FakeOperation(name, response, time.monotonic() + delay)
+        return operation
+
+
+def canned_response(duration, diarize=False, low_confidence_rate=0.0):
+    """
+    A recognize response with ``WORDS_PER_SECOND`` timed words over ``duration``.
+
+    Words are grouped into one result per ``RESULT_SECONDS``; the share
+    ``low_confidence_rate`` of them (the same ones for the same duration) has
+    confidence 0.35, the rest 0.92. When diarizing, the last result carries
+    every word with its speaker tag, like the real API.
+    """
+    words = []
+    for index in range(int(duration * WORDS_PER_SECOND)):
+        start = index / WORDS_PER_SECOND
+        words.append(
+            speech.WordInfo(
+                word=CANNED_WORDS[index % len(CANNED_WORDS)],
+                start_time=timedelta(seconds=start),
+                end_time=timedelta(seconds=start + 0.4),
+                speaker_tag=(index // WORDS_PER_TURN) % 2 + 1 if diarize else 0,
+            )
+        )
+    confidence_random = random.Random(round(duration, 1))
+    words_per_result = RESULT_SECONDS * WORDS_PER_SECOND
+    results = []
+    for first in range(0, len(words), words_per_result):
+        result_words = words[first:first + words_per_result]
+        low = confidence_random.random() < low_confidence_rate
+        results.append(
+            speech.SpeechRecognitionResult(
+                alternatives=[
+                    speech.SpeechRecognitionAlternative(
+                        transcript=" ".join(word.word for word in result_words),
+                        confidence=0.35 if low else 0.92,
+                        words=result_words,
+                    )
+                ],
+                result_end_time=timedelta(seconds=min(duration, (first + words_per_result) / WORDS_PER_SECOND)),
+            )
+        )
+    if diarize and results:
+        results[-1].alternatives[0].words = words
+    return speech.LongRunningRecognizeResponse(results=results)
+
+
+def fake_gemini_llm(latency=0.5, seconds_per_kchar=0.05, model=None):
+    """Runnable standing in for ChatGoogleGenerativeAI in ``prompt | llm | parser``."""
+    model = model or LatencyModel()
+
+    def respond(prompt_value):
+        text = prompt_value.to_string()
+        schema = re.search(r"```json\s*(\{.*?\})\s*```", text, re.S)
+        try:
+            keys = list(json.loads(schema.group(1))) if schema else []
+        except json.JSONDecodeError:
+            keys = []
+        time.sleep((latency + seconds_per_kchar * len(text) / 1000) * model.multiplier())
+        model.maybe_fail("gemini")
+        payload = {key: None for key in keys}
+        payload["extra_details"] = {"transcript_words": len(text.split())}
+        return AIMessage(content=json.dumps({"payload": payload}))
+
+    return RunnableLambda(respond)
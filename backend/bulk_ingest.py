@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Bulk ingest: transcribe and analyze an archive of recordings headlessly.
+
+Walks a local directory or a ``gs://bucket/prefix`` and, per file:
+
+1. decodes, downmixes and preprocesses it in a process pool (``--decoders``),
+   writing a mono 16-bit WAV to a scratch directory, so the CPU work runs
+   outside the GIL;
+2. transcribes that WAV (uploaded as-is, no second decode) and analyzes the
+   transcript with Gemini on a thread pool (``--workers``) of cloud calls;
+3. appends the result as one NDJSON line to ``--output`` and checkpoints the
+   file in the manifest (``<output>.manifest.jsonl``).
+
+Reruns skip files the manifest lists as done with the same size; failed
+files, those with chunks that failed to transcribe included, are retried. A result line is written before its checkpoint, so a
+crash in between can repeat one file but never lose it. Each file is traced
+as a job (see utils/tracing.py).
+
+Usage (from backend/):
+    python bulk_ingest.py /data/interviews --output results.ndjson
+    python bulk_ingest.py gs://my-bucket/archive/2023/ --output results.ndjson --workers 8
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Iterator, Optional
+
+import soundfile as sf
+
+from config.settings import (
+    DEFAULT_LANGUAGE_CODE,
+    DEFAULT_PREPROCESSING_CHAIN,
+    DEFAULT_SURVEY_SCHEMA,
+    GCP_LOCATION,
+    GCS_BUCKET_NAME,
+    get_gcp_project_id,
+    validate_environment,
+)
+from services.gemini_service import GeminiService
+from services.transcription_service import TranscriptionService
+from services.work_scheduler import work_class
+from utils.audio_preprocessing import downmix_and_measure
+from utils.preprocessing_chain import build_preprocessing_chain
+from utils.tracing import span, trace_job
+from utils.transcoding import decode_to_pcm
+
+AUDIO_EXTENSIONS = {
+    ".wav", ".flac", ".mp3", ".ogg", ".opus", ".webm", ".m4a", ".mp4", ".aac", ".aiff", ".caf",
+}
+MAX_SAMPLE_RATE = 48000  # highest rate Speech accepts
+
+
+@dataclass
+class Source:
+    """One recording to ingest: a local path or a GCS blob."""
+
+    id: str
+    size: int
+    path: Optional[str] = None
+    blob: object = None
+
+    def read(self) -> bytes:
+        if self.blob is not None:
+            return self.blob.download_as_bytes()
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def list_sources(location: str) -> Iterator[Source]:
+    """Audio files under a local directory or a ``gs://bucket/prefix``, in name order."""
+    if location.startswith("gs://"):
+        from google.cloud import storage
+
+        bucket, _, prefix = location[len("gs://"):].partition("/")
+        for blob in storage.Client().list_blobs(bucket, prefix=prefix):
+            if os.path.splitext(blob.name)[1].lower() in AUDIO_EXTENSIONS:
+                yield Source(f"gs://{bucket}/{blob.name}", blob.size, blob=blob)
+        return
+
+    for root, dirs, files in os.walk(location):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                path = os.path.join(root, name)
+                yield Source(os.path.abspath(path), os.path.getsize(path), path=path)
+
+
+def prepare_audio(source, scratch_dir: str, chain_name: str) -> Dict:
+    """
+    Decode + preprocess one recording into a mono 16-bit WAV (runs in the process pool).
+
+    ``source`` is a file path or the encoded bytes. Returns the WAV path
+    (None for silent audio) and the duration.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    audio, rate, container = decode_to_pcm(source)
+    audio, stats = downmix_and_measure(audio)
+    duration = len(audio) / rate
+    if stats.is_silent:
+        return {"wav_path": None, "duration_seconds": duration, "container": container}
+
+    if rate > MAX_SAMPLE_RATE:
+        from scipy import signal
+
+        audio = signal.resample_poly(audio, 16000, rate).astype(audio.dtype, copy=False)
+        rate = 16000
+        audio, stats = downmix_and_measure(audio)
+
+    audio, _ = build_preprocessing_chain(chain_name).run(audio, rate, stats)
+    wav_path = os.path.join(scratch_dir, f"{uuid.uuid4().hex}.wav")
+    sf.write(wav_path, audio, rate, format="WAV", subtype="PCM_16")
+    return {"wav_path": wav_path, "duration_seconds": duration, "container": container}
+
+
+class Manifest:
+    """Append-only JSONL checkpoint of processed files; the last line per id wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted run
+                    self.entries[entry["id"]] = entry
+
+    def is_done(self, source: Source) -> bool:
+        entry = self.entries.get(source.id)
+        return bool(entry) and entry["status"] == "done" and entry["size"] == source.size
+
+    def record(self, source: Source, status: str, **fields):
+        entry = {"id": source.id, "size": source.size, "status": status, "at": time.time(), **fields}
+        with self._lock:
+            self.entries[source.id] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class BulkIngest:
+    """Runs the decode process pool and the cloud-call thread pool over a list of sources."""
+
+    def __init__(self, args):
+        self.args = args
+        self.schema_json = json.dumps(self._load_schema(args.schema), indent=2)
+        self.manifest = Manifest(args.manifest or f"{args.output}.manifest.jsonl")
+        self.gemini_service = None if args.no_analysis else GeminiService()
+        self.project_id = get_gcp_project_id()
+        self._local = threading.local()
+        self._output_lock = threading.Lock()
+        self.totals = {"done": 0, "failed": 0, "skipped": 0, "audio_seconds": 0.0}
+
+    @staticmethod
+    def _load_schema(path):
+        if not path:
+            return DEFAULT_SURVEY_SCHEMA
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _transcription_service(self) -> TranscriptionService:
+        # One per thread, each with its own Speech and Storage clients
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = TranscriptionService(
+                gcs_bucket_name=GCS_BUCKET_NAME,
+                gcp_project_id=self.project_id,
+                gcp_location=GCP_LOCATION,
+            )
+        return service
+
+    def process(self, source: Source, decoders: ProcessPoolExecutor, scratch_dir: str) -> Dict:
+        args = self.args
+        timings = {}
+        with trace_job("ingest", source=source.id, bytes=source.size), work_class("batch", args.tenant):
+            start = time.perf_counter()
+            with span("prepare"):
+                # Local files are read inside the worker; GCS blobs are downloaded here
+                payload = source.path if source.path else source.read()
+                prepared = decoders.submit(prepare_audio, payload, scratch_dir, args.preprocessing).result()
+            timings["prepare_s"] = round(time.perf_counter() - start, 3)
+            if not prepared["wav_path"]:
+                raise ValueError("audio is silent")
+
+            try:
+                start = time.perf_counter()
+                service = self._transcription_service()
+                with open(prepared["wav_path"], "rb") as f:
+                    wav = BytesIO(f.read())
+                transcription = service.transcribe_full_file(wav, args.language, diarize=args.diarize)
+                transcript = transcription.transcript
+                timings["transcribe_s"] = round(time.perf_counter() - start, 3)
+            finally:
+                os.remove(prepared["wav_path"])
+            if transcription.failed_chunks:
+                # Not done: the rerun retries the file, reusing its finished chunks (job checkpoints)
+                raise ValueError(f"{len(transcription.failed_chunks)} chunks failed to transcribe")
+            if not transcript or not transcript.strip():
+                raise ValueError("no speech transcribed")
+
+            analysis = None
+            if self.gemini_service:
+                start = time.perf_counter()
+                analysis = self.gemini_service.generate_json_payload(self.schema_json, transcript)
+                timings["analyze_s"] = round(time.perf_counter() - start, 3)
+                if analysis is None:
+                    raise ValueError("analysis failed")
+
+        return {
+            "source": source.id,
+            "bytes": source.size,
+            "container": prepared["container"],
+            "duration_seconds": round(prepared["duration_seconds"], 3),
+            "language_code": args.language,
+            "transcript": transcript,
+            "speaker_turns": [turn.to_dict() for turn in transcription.speaker_turns] if args.diarize else [],
+            "analysis": analysis,
+            "timings": timings,
+            "processed_at": time.time(),
+        }
+
+    def _write(self, result: Dict):
+        line = json.dumps(result, ensure_ascii=False)
+        with self._output_lock:
+            with open(self.args.output, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def run(self) -> Dict:
+        args = self.args
+        pending = []
+        for source in list_sources(args.location):
+            if self.manifest.is_done(source):
+                self.totals["skipped"] += 1
+            else:
+                pending.append(source)
+            if args.limit and len(pending) >= args.limit:
+                break
+        print(f"{len(pending)} files to ingest, {self.totals['skipped']} already done")
+
+        wall_start = time.perf_counter()
+        scratch_dir = tempfile.mkdtemp(prefix="bulk-ingest-")
+        try:
+            with ProcessPoolExecutor(args.decoders) as decoders, ThreadPoolExecutor(args.workers) as workers:
+                futures = {workers.submit(self.process, source, decoders, scratch_dir): source for source in pending}
+                for future in as_completed(futures):
+                    source = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.totals["failed"] += 1
+                        self.manifest.record(source, "failed", error=str(e))
+                        print(f"FAILED {source.id}: {e}")
+                        continue
+                    self._write(result)
+                    self.manifest.record(source, "done", duration_seconds=result["duration_seconds"])
+                    self.totals["done"] += 1
+                    self.totals["audio_seconds"] += result["duration_seconds"]
+                    print(
+                        f"[{self.totals['done'] + self.totals['failed']}/{len(pending)}] "
+                        f"{source.id} ({result['duration_seconds'] / 60:.1f} min)"
+                    )
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+        wall_hours = (time.perf_counter() - wall_start) / 3600
+        audio_hours = self.totals["audio_seconds"] / 3600
+        summary = {
+            **self.totals,
+            "audio_hours": round(audio_hours, 3),
+            "wall_hours": round(wall_hours, 4),
+            "audio_hours_per_hour": round(audio_hours / wall_hours, 2) if wall_hours else 0,
+        }
+        print(json.dumps(summary))
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("location", help="local directory or gs://bucket/prefix")
+    parser.add_argument("--output", default="ingest.ndjson", help="NDJSON results (appended)")
+    parser.add_argument("--manifest", help="checkpoint file (default: <output>.manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="files in flight (cloud calls)")
+    parser.add_argument("--decoders", type=int, default=os.cpu_count() or 2, help="decode processes")
+    parser.add_argument("--language", default=DEFAULT_LANGUAGE_CODE)
+    parser.add_argument("--preprocessing", default=DEFAULT_PREPROCESSING_CHAIN)
+    parser.add_argument("--diarize", action="store_true")
+    parser.add_argument("--no-analysis", action="store_true", help="transcribe only, skip Gemini")
+    parser.add_argument("--schema", help="JSON schema file for the analysis (default: survey schema)")
+    parser.add_argument("--limit", type=int, default=0, help="ingest at most this many new files")
+    parser.add_argument("--tenant", default="bulk", help="fair-share tenant of the scheduled Speech/Gemini calls")
+    args = parser.parse_args()
+
+    if not validate_environment():
+        raise SystemExit("Environment validation failed (see above)")
+    BulkIngest(args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# config/gazetteers.py
+"""
+Place, crop and irrigation names for the rule-based pre-extraction
+(services/rule_extraction.py), as ``canonical name -> spoken forms``.
+
+Spoken forms are matched token by token, in Devanagari or romanized Hindi
+(spelling variants such as "gehun"/"gehoon" match the same entry). Villages
+cover the Singaji project area; more can be listed one per line in the file
+named by ``RULE_EXTRACTION_VILLAGES_FILE``.
+"""
+
+STATES = {
+    "Madhya Pradesh": ["madhya pradesh", "madhyapradesh", "मध्य प्रदेश", "मध्यप्रदेश"],
+    "Maharashtra": ["maharashtra", "महाराष्ट्र"],
+    "Rajasthan": ["rajasthan", "राजस्थान"],
+    "Gujarat": ["gujarat", "गुजरात"],
+    "Uttar Pradesh": ["uttar pradesh", "उत्तर प्रदेश"],
+    "Chhattisgarh": ["chhattisgarh", "छत्तीसगढ़"],
+    "Bihar": ["bihar", "बिहार"],
+    "Punjab": ["punjab", "पंजाब"],
+    "Haryana": ["haryana", "हरियाणा"],
+    "Karnataka": ["karnataka", "कर्नाटक"],
+    "Telangana": ["telangana", "तेलंगाना"],
+    "Andhra Pradesh": ["andhra pradesh", "आंध्र प्रदेश"],
+    "Jharkhand": ["jharkhand", "झारखंड"],
+    "Odisha": ["odisha", "orissa", "ओडिशा"],
+    "West Bengal": ["west bengal", "पश्चिम बंगाल"],
+    "Uttarakhand": ["uttarakhand", "उत्तराखंड"],
+    "Himachal Pradesh": ["himachal pradesh", "हिमाचल प्रदेश"],
+    "Tamil Nadu": ["tamil nadu", "तमिलनाडु"],
+}
+
+DISTRICTS = {
+    "Khandwa": ["khandwa", "खंडवा"],
+    "Khargone": ["khargone", "khargon", "खरगोन"],
+    "Burhanpur": ["burhanpur", "बुरहानपुर"],
+    "Harda": ["harda", "हरदा"],
+    "Dewas": ["dewas", "देवास"],
+    "Indore": ["indore", "इंदौर"],
+    "Bhopal": ["bhopal", "भोपाल"],
+    "Narmadapuram": ["narmadapuram", "hoshangabad", "नर्मदापुरम", "होशंगाबाद"],
+    "Betul": ["betul", "बैतूल"],
+    "Sehore": ["sehore", "सीहोर"],
+    "Barwani": ["barwani", "बड़वानी"],
+    "Dhar": ["dhar", "धार"],
+    "Ujjain": ["ujjain", "उज्जैन"],
+    "Jabalpur": ["jabalpur", "जबलपुर"],
+    "Raisen": ["raisen", "रायसेन"],
+    "Vidisha": ["vidisha", "विदिशा"],
+    "Chhindwara": ["chhindwara", "छिंदवाड़ा"],
+    "Ratlam": ["ratlam", "रतलाम"],
+    "Shajapur": ["shajapur", "शाजापुर"],
+    "Jalgaon": ["jalgaon", "जलगांव"],
+}
+
+# Villages and small towns around the project area
+VILLAGES = {
+    "Piplod": ["piplod", "पिपलोद"],
+    "Pandhana": ["pandhana", "पंधाना"],
+    "Mundi": ["mundi", "मूंदी"],
+    "Punasa": ["punasa", "पुनासा"],
+    "Harsud": ["harsud", "हरसूद"],
+    "Khalwa": ["khalwa", "खालवा"],
+    "Chhanera": ["chhanera", "छनेरा"],
+    "Mandhata": ["mandhata", "मांधाता"],
+    "Bhamgarh": ["bhamgarh", "भामगढ़"],
+    "Bidgaon": ["bidgaon", "बीडगांव"],
+    "Timarni": ["timarni", "टिमरनी"],
+    "Khirkiya": ["khirkiya", "खिरकिया"],
+    "Sirali": ["sirali", "सिराली"],
+    "Rahatgaon": ["rahatgaon", "रहटगांव"],
+    "Handiya": ["handiya", "हंडिया"],
+    "Charwa": ["charwa", "चारवा"],
+    "Atarkund": ["atarkund", "अटारकुंड"],
+    "Sukhras": ["sukhras", "सुखरास"],
+}
+
+CROPS = {
+    "Wheat": ["gehun", "gehu", "gahu", "wheat", "गेहूं", "गेहू"],
+    "Soybean": ["soybean", "soyabean", "soya", "सोयाबीन", "सोया"],
+    "Cotton": ["kapas", "cotton", "कपास"],
+    "Maize": ["makka", "maize", "corn", "bhutta", "मक्का", "भुट्टा"],
+    "Chickpea": ["chana", "gram", "चना"],
+    "Paddy": ["dhaan", "paddy", "rice", "धान"],
+    "Onion": ["pyaz", "pyaj", "onion", "प्याज"],
+    "Garlic": ["lahsun", "garlic", "लहसुन"],
+    "Sugarcane": ["ganna", "sugarcane", "गन्ना"],
+    "Moong": ["moong", "mung", "मूंग"],
+    "Urad": ["urad", "उड़द"],
+    "Tur": ["tuar", "tur", "arhar", "तुअर", "अरहर"],
+    "Chilli": ["mirch", "mirchi", "chilli", "मिर्च", "मिर्ची"],
+    "Banana": ["kela", "banana", "केला", "केले"],
+    "Mustard": ["sarson", "mustard", "सरसों"],
+    "Groundnut": ["mungfali", "groundnut", "मूंगफली"],
+    "Jowar": ["jowar", "jwar", "ज्वार"],
+    "Tomato": ["tamatar", "tomato", "टमाटर"],
+    "Potato": ["aloo", "potato", "आलू"],
+    "Vegetables": ["sabzi", "sabji", "vegetables", "सब्जी", "सब्जियां"],
+}
+
+IRRIGATION_METHODS = {
+    "Tube well": ["tubewell", "tube well", "ट्यूबवेल"],
+    "Borewell": ["borewell", "bore", "बोरवेल", "बोर"],
+    "Well": ["kuan", "kua", "well", "कुआं", "कुएं", "कुएँ"],
+    "Canal": ["nahar", "canal", "नहर"],
+    "Drip": ["drip", "ड्रिप"],
+    "Sprinkler": ["sprinkler", "स्प्रिंकलर"],
+    "Pond": ["talab", "pond", "तालाब"],
+    "River": ["nadi", "river", "नदी"],
+    "Rainfed": ["barish", "rainfed", "बारिश"],
+}
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 # Load environment variables with error handling
@@ -126,17 +127,195 @@ def get_gcp_project_id():
 GEMINI_MODEL = "gemini-2.5-flash"
 GEMINI_TEMPERATURE = 0.1
 
+# Rule-based pre-extraction (services/rule_extraction.py): fields the rules
+# fill with at least this confidence are not asked of Gemini, and only the
+# transcript sentences relevant to the remaining fields are sent
+RULE_EXTRACTION_ENABLED = os.getenv("RULE_EXTRACTION_ENABLED", "true").lower() == "true"
+RULE_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("RULE_EXTRACTION_MIN_CONFIDENCE", "0.8"))
+RULE_EXTRACTION_CONTEXT_SENTENCES = 1  # kept around each relevant sentence (question + answer)
+RULE_EXTRACTION_MAX_KEPT_SHARE = 0.8  # above this, the whole transcript is sent
+RULE_EXTRACTION_VILLAGES_FILE = os.getenv("RULE_EXTRACTION_VILLAGES_FILE")  # extra village names, one per line
+
 # Audio processing settings
 MAX_SYNC_DURATION_SECONDS = 59
+CHUNK_DURATION_SECONDS = 180  # Files longer than this are split into chunks
+# Upload mono 16-bit WAV/FLAC as-is when no preprocessing chain is requested
+AUDIO_PASSTHROUGH = os.getenv("AUDIO_PASSTHROUGH", "true").lower() == "true"
 SUPPORTED_AUDIO_FORMATS = ["wav", "flac"]  # Fully supported by soundfile
-PARTIAL_SUPPORT_FORMATS = ["mp3", "m4a"]  # Need conversion
+PARTIAL_SUPPORT_FORMATS = ["mp3", "m4a", "webm"]  # Transcoded by utils/transcoding.py
+
+# Transcoding settings (WebM/M4A and other non-libsndfile uploads)
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", "2"))
+TRANSCODE_SAMPLE_RATE = 16000  # ffmpeg output rate; optimal for Speech-to-Text
+# Chunk ffmpeg output while it is decoded (the preprocessing chain then runs per chunk)
+STREAM_DECODE = os.getenv("STREAM_DECODE", "true").lower() == "true"
+
+# Audio preprocessing chains (stage names from utils/preprocessing_chain.py)
+PREPROCESSING_CHAINS = {
+    "default": ["normalize_gate"],  # peak normalize + 2% time-domain gate
+    "spectral": ["spectral_gate", "normalize"],  # STFT denoise for noisy fields
+    "none": [],
+}
+DEFAULT_PREPROCESSING_CHAIN = os.getenv("PREPROCESSING_CHAIN", "default")
+
+# Pipelined extraction: Gemini starts on finished chunk transcripts while later chunks are recognized
+PIPELINED_EXTRACTION = os.getenv("PIPELINED_EXTRACTION", "false").lower() == "true"
+PIPELINE_SEGMENT_CHUNKS = int(os.getenv("PIPELINE_SEGMENT_CHUNKS", "2"))  # chunks per partial extraction
+PIPELINE_EXTRACTION_WORKERS = int(os.getenv("PIPELINE_EXTRACTION_WORKERS", "4"))  # concurrent partial Gemini calls
+
+# Progress events of /api/process jobs (GET /api/process/<progress_id>/events)
+JOB_PROGRESS_RETENTION_SECONDS = int(os.getenv("JOB_PROGRESS_RETENTION_SECONDS", "300"))
+JOB_PROGRESS_KEEPALIVE_SECONDS = 15
+
+# Long-running recognize operations are polled centrally (services/operation_poller.py)
+LRO_POLL_INITIAL_SECONDS = float(os.getenv("LRO_POLL_INITIAL_SECONDS", "1.0"))
+LRO_POLL_MAX_SECONDS = float(os.getenv("LRO_POLL_MAX_SECONDS", "10.0"))
+LRO_POLL_MULTIPLIER = 1.5
+LRO_POLL_WORKERS = int(os.getenv("LRO_POLL_WORKERS", "4"))  # threads issuing status RPCs
+LRO_TIMEOUT_SECONDS = float(os.getenv("LRO_TIMEOUT_SECONDS", "3600"))
+
+# Chunked jobs are checkpointed per chunk (services/job_checkpoint.py) so a
+# failed or interrupted job only redoes the chunks that did not finish
+JOB_CHECKPOINTS_ENABLED = os.getenv("JOB_CHECKPOINTS_ENABLED", "true").lower() == "true"
+JOB_CHECKPOINT_DIR = os.getenv("JOB_CHECKPOINT_DIR", os.path.join("uploads", "jobs"))
+JOB_CHECKPOINT_RETENTION_HOURS = float(os.getenv("JOB_CHECKPOINT_RETENTION_HOURS", "24"))
+
+# Selective re-transcription (services/refinement.py): results less confident
+# than the threshold are recognized again with a stronger model and spliced in
+REFINE_CONFIDENCE_THRESHOLD = float(os.getenv("REFINE_CONFIDENCE_THRESHOLD", "0.6"))
+REFINE_MODEL = os.getenv("REFINE_MODEL", "latest_long")
+REFINE_USE_ENHANCED = os.getenv("REFINE_USE_ENHANCED", "false").lower() == "true"  # e.g. with REFINE_MODEL=phone_call
+REFINE_MERGE_GAP_SECONDS = 2.0  # low-confidence results this close share one span
+REFINE_MIN_SPAN_SECONDS = 1.0
+
+# Resilience of the cloud calls (services/resilience.py): per-call deadline,
+# retries of transient errors, hedging past the latency p95 (budget = share
+# of calls that may be duplicated) and circuit breaker thresholds
+RESILIENCE_BACKENDS = {
+    "speech": {
+        "deadline": float(os.getenv("SPEECH_CALL_DEADLINE_SECONDS", "900")),
+        "max_attempts": int(os.getenv("SPEECH_CALL_MAX_ATTEMPTS", "3")),
+        "hedge_budget": float(os.getenv("SPEECH_HEDGE_BUDGET", "0.1")),
+        "failure_threshold": 5,
+        "reset_seconds": 30.0,
+    },
+    "gemini": {
+        "deadline": float(os.getenv("GEMINI_CALL_DEADLINE_SECONDS", "180")),
+        "max_attempts": int(os.getenv("GEMINI_CALL_MAX_ATTEMPTS", "3")),
+        "hedge_budget": float(os.getenv("GEMINI_HEDGE_BUDGET", "0.1")),
+        "failure_threshold": 5,
+        "reset_seconds": 30.0,
+    },
+}
+
+# Work scheduler shared by all Speech/Gemini calls (services/work_scheduler.py):
+# slots per resource, tenant weights ("team-a=2,team-b=1"), the wait after
+# which queued work moves up one priority class and the batch share of slots
+SCHEDULER_SLOTS = {
+    "speech": int(os.getenv("SCHEDULER_SPEECH_SLOTS", "32")),  # concurrent recognitions
+    "gemini": int(os.getenv("SCHEDULER_GEMINI_SLOTS", "8")),  # concurrent extractions
+}
+SCHEDULER_TENANT_WEIGHTS = {
+    tenant.strip(): float(weight)
+    for tenant, _, weight in (
+        entry.partition("=") for entry in os.getenv("SCHEDULER_TENANT_WEIGHTS", "").split(",") if "=" in entry
+    )
+}
+SCHEDULER_AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "30"))
+SCHEDULER_BATCH_MAX_SHARE = float(os.getenv("SCHEDULER_BATCH_MAX_SHARE", "0.75"))  # slots batch work may hold
+
+# Admission control (utils/admission.py): heavy requests over these limits get
+# 429 + Retry-After; 0 disables a limit. ADMISSION_MAX_RSS_MB=0 falls back to
+# 85% of the container memory limit, if any
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))  # concurrent heavy requests
+ADMISSION_MAX_QUEUED_CALLS = int(os.getenv("ADMISSION_MAX_QUEUED_CALLS", "200"))  # scheduler queue depth
+ADMISSION_MAX_RSS_MB = float(os.getenv("ADMISSION_MAX_RSS_MB", "0"))
+ADMISSION_MAX_LIVE_STREAMS = int(os.getenv("ADMISSION_MAX_LIVE_STREAMS", "100"))
+ADMISSION_RETRY_AFTER_SECONDS = 5  # until request durations have been observed
+
+# Tracing: one OpenTelemetry-JSON line per job (render with python -m utils.tracing <job_id>)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join("uploads", "traces", "traces.jsonl"))
+TRACE_MAX_BYTES = int(float(os.getenv("TRACE_MAX_MB", "50")) * 1024 * 1024)  # rotated to traces.jsonl.1 beyond this
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "3"))  # rotated files kept
+
+# Default survey schema for farmer interviews (filled in by Gemini)
+DEFAULT_SURVEY_SCHEMA = {
+    "farmer_name": "",
+    "village": "",
+    "district": "",
+    "state": "",
+    "age": "",
+    "gender": "",
+    "education": "",
+    "family_size": "",
+    "land_size_acres": "",
+    "crops_grown": [],
+    "irrigation_method": "",
+    "farming_experience_years": "",
+    "annual_income": "",
+    "challenges_faced": [],
+    "government_schemes_used": [],
+    "technology_adoption": "",
+    "market_access": "",
+    "suggestions": "",
+    "contact_number": "",
+}
 
 # Debug settings
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
+# Per-request profiling (?profile=cpu|sampling or X-Profile header); honoured only when enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", str(DEBUG_MODE)).lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("uploads", "profiles"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_TOP_ALLOCATIONS = 30
+
 # Speech recognition settings
 DEFAULT_LANGUAGE_CODE = "hi-IN"
 SPEECH_MODEL = "telephony"
+# Live streaming: Google caps a streaming_recognize call at ~305 s, so streams
+# are rotated before that and the un-finalized audio tail is replayed
+STREAMING_LIMIT_SECONDS = 280
+STREAM_REPLAY_SECONDS = 10
+
+# Live engine: "asyncio" runs every stream on one event loop with the async
+# Speech client; "threads" keeps the legacy thread per stream
+LIVE_ENGINE = os.getenv("LIVE_ENGINE", "asyncio")
+LIVE_CALLBACK_WORKERS = int(os.getenv("LIVE_CALLBACK_WORKERS", "8"))  # threads running transcript callbacks off the loop
+
+# Live audio buffer between Socket.IO frames and Speech
+LIVE_BUFFER_MAX_BYTES = int(os.getenv("LIVE_BUFFER_MAX_BYTES", str(1024 * 1024)))
+LIVE_OVERFLOW_POLICY = os.getenv("LIVE_OVERFLOW_POLICY", "drop_oldest")  # block | drop_oldest | spill; drops discard the backlog and restart the stream
+LIVE_SPILL_MAX_BYTES = 64 * 1024 * 1024
+LIVE_REQUEST_BYTES = 600  # ~100 ms of WebM/Opus; small frames are coalesced up to this
+LIVE_MAX_REQUEST_BYTES = 25000  # Speech accepts at most 25,600 bytes per streaming request
+LIVE_COALESCE_WAIT_SECONDS = 0.1
+LIVE_STATS_INTERVAL_SECONDS = 1.0  # how often queue depth is reported to the client
+INTERIM_EMIT_INTERVAL_SECONDS = float(os.getenv("INTERIM_EMIT_INTERVAL_SECONDS", "0.25"))  # at most one interim update per client per interval
+
+# Live capture: incoming frames are also appended to a file per session so the
+# recording can be downloaded or re-transcribed through the batch path later
+LIVE_CAPTURE_ENABLED = os.getenv("LIVE_CAPTURE_ENABLED", "true").lower() == "true"
+LIVE_CAPTURE_DIR = os.getenv("LIVE_CAPTURE_DIR", os.path.join("uploads", "live"))
+LIVE_CAPTURE_INDEX_SECONDS = 1.0  # granularity of the time -> byte offset index
+LIVE_CAPTURE_RETENTION_HOURS = float(os.getenv("LIVE_CAPTURE_RETENTION_HOURS", "24"))
+
+# Scale-out: Socket.IO events between workers go through a message queue
+# (redis://..., amqp://..., or local://host:port for utils/local_broker.py).
+# Live sessions are recorded in a shared store so another worker can resume
+# them when their owner stops heartbeating.
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LIVE_SESSION_STORE = os.getenv("LIVE_SESSION_STORE", os.path.join("uploads", "sessions"))
+LIVE_SESSION_LEASE_SECONDS = 15
+LIVE_SESSION_HEARTBEAT_SECONDS = 5
+LIVE_SESSION_RETENTION_HOURS = float(os.getenv("LIVE_SESSION_RETENTION_HOURS", "24"))  # resumable for this long
+
+# Speaker diarization (surveyor + farmer, sometimes a family member joins)
+DIARIZATION_MIN_SPEAKERS = 2
+DIARIZATION_MAX_SPEAKERS = 3
 
 # UI settings
 PRIMARY_COLOR = "#2E7D32"  # Green for farmer theme
@@ -0,0 +1,10 @@
+"""Shared pytest fixtures for the backend tests."""
+import pytest
+
+from utils import tracing
+
+
+@pytest.fixture(autouse=True)
+def trace_to_tmp(tmp_path, monkeypatch):
+    """Traces of jobs run by tests go to the test's tmp dir, not uploads/traces."""
+    monkeypatch.setattr(tracing, "_exporter", tracing.FileSpanExporter(str(tmp_path / "traces.jsonl")))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Run several backend workers locally, sharing Socket.IO events and live sessions.
+
+Starts the local message broker (utils/local_broker.py) unless
+SOCKETIO_MESSAGE_QUEUE already points at a real queue, then one app.py
+process per worker on consecutive ports. Every worker uses the same
+LIVE_SESSION_STORE directory, so killing one worker lets a reconnecting
+client resume its live session on another.
+
+Usage (from backend/):
+    python run_workers.py --workers 3 --base-port 5001
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--base-port", type=int, default=5001)
+    parser.add_argument("--broker-port", type=int, default=6390)
+    args = parser.parse_args()
+
+    processes = []
+    env = dict(os.environ)
+    if not env.get("SOCKETIO_MESSAGE_QUEUE"):
+        env["SOCKETIO_MESSAGE_QUEUE"] = f"local://127.0.0.1:{args.broker_port}"
+        processes.append(
+            subprocess.Popen([sys.executable, "-m", "utils.local_broker", "--port", str(args.broker_port)], env=env)
+        )
+        time.sleep(0.5)  # let the broker bind before workers connect
+
+    for index in range(args.workers):
+        worker_env = dict(env, PORT=str(args.base_port + index), WORKER_ID=f"worker-{index + 1}")
+        processes.append(subprocess.Popen([sys.executable, "app.py"], env=worker_env))
+        print(f"worker-{index + 1} on port {args.base_port + index}")
+
+    try:
+        while any(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
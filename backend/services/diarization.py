@@ -0,0 +1,138 @@
+# services/diarization.py
+"""
+Speaker turns from diarized Speech-to-Text responses.
+
+Speech-to-Text numbers speakers independently in every request, so tag 1 in
+chunk 3 is not necessarily tag 1 in chunk 4. Turns are therefore mapped to
+interview roles ("surveyor" / "farmer") per chunk: the surveyor is the
+speaker who asks the questions, with continuity across the chunk boundary
+as the tie-breaker.
+"""
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+SURVEYOR = "surveyor"
+FARMER = "farmer"
+
+# Question cues in Hindi and English transcripts
+QUESTION_PATTERN = re.compile(
+    r"\?|\b(what|how|where|which|when|why|who|your)\b|"
+    r"(क्या|कितन[ाेी]|कहा[ँं]|कौन|कैसे|क्यों|कब|आपका|आपके|आपकी)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SpeakerTurn:
+    """A contiguous stretch of speech by one speaker."""
+
+    speaker: str
+    start: float
+    end: float
+    text: str
+    chunk_index: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _seconds(value) -> float:
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    return float(value or 0)
+
+
+def turns_from_response(response, chunk_index: int = 0, time_offset: float = 0.0) -> List[SpeakerTurn]:
+    """
+    Group the words of a diarized response into speaker turns.
+
+    With diarization enabled, the last result carries every word of the
+    request together with its ``speaker_tag``; earlier results do not.
+    Speakers keep their per-request label (``"S1"``, ``"S2"``, ...).
+    """
+    if not response.results or not response.results[-1].alternatives:
+        return []
+
+    turns: List[SpeakerTurn] = []
+    for word in response.results[-1].alternatives[0].words:
+        speaker = f"S{word.speaker_tag}"
+        start = _seconds(word.start_time) + time_offset
+        end = _seconds(word.end_time) + time_offset
+        if turns and turns[-1].speaker == speaker:
+            turns[-1].text += f" {word.word}"
+            turns[-1].end = end
+        else:
+            turns.append(SpeakerTurn(speaker, start, end, word.word, chunk_index))
+    return turns
+
+
+def _question_score(turns: List[SpeakerTurn]) -> float:
+    if not turns:
+        return 0.0
+    return sum(1 for turn in turns if QUESTION_PATTERN.search(turn.text)) / len(turns)
+
+
+def assign_roles(turns: List[SpeakerTurn], previous_last_role: Optional[str] = None) -> Dict[str, str]:
+    """Map the local speaker labels of one chunk to interview roles."""
+    by_speaker: Dict[str, List[SpeakerTurn]] = {}
+    for turn in turns:
+        by_speaker.setdefault(turn.speaker, []).append(turn)
+    if not by_speaker:
+        return {}
+
+    scores = {speaker: _question_score(items) for speaker, items in by_speaker.items()}
+    ranked = sorted(scores, key=scores.get, reverse=True)
+
+    if len(ranked) == 1:
+        speaker = ranked[0]
+        if previous_last_role and turns[0].speaker == speaker:
+            return {speaker: previous_last_role}
+        return {speaker: SURVEYOR if scores[speaker] >= 0.5 else FARMER}
+
+    if scores[ranked[0]] > scores[ranked[1]]:
+        surveyor = ranked[0]
+    elif previous_last_role:
+        # No clear questioner: keep whoever was speaking across the boundary
+        first = turns[0].speaker
+        surveyor = first if previous_last_role == SURVEYOR else next(s for s in ranked if s != first)
+    else:
+        # The surveyor usually talks less than the farmer
+        talk_time = {s: sum(t.end - t.start for t in items) for s, items in by_speaker.items()}
+        surveyor = min(talk_time, key=talk_time.get)
+
+    return {speaker: SURVEYOR if speaker == surveyor else FARMER for speaker in by_speaker}
+
+
+def reconcile_speakers(chunk_turns: List[List[SpeakerTurn]]) -> List[SpeakerTurn]:
+    """Relabel per-chunk speakers with consistent roles and merge into one timeline."""
+    merged: List[SpeakerTurn] = []
+    previous_last_role = None
+    for turns in chunk_turns:
+        roles = assign_roles(turns, previous_last_role)
+        for turn in turns:
+            role = roles[turn.speaker]
+            if merged and merged[-1].speaker == role and merged[-1].chunk_index == turn.chunk_index - 1 \
+                    and turn is turns[0]:
+                # Same speaker continues across the chunk boundary
+                merged[-1].text += f" {turn.text}"
+                merged[-1].end = turn.end
+                continue
+            merged.append(SpeakerTurn(role, turn.start, turn.end, turn.text, turn.chunk_index))
+        if turns:
+            previous_last_role = roles[turns[-1].speaker]
+    return merged
+
+
+def format_turns(turns: List[SpeakerTurn], roles: Optional[List[str]] = None) -> str:
+    """Render turns as "Role: text" lines, optionally keeping only some roles."""
+    return "\n".join(
+        f"{turn.speaker.capitalize()}: {turn.text}"
+        for turn in turns
+        if roles is None or turn.speaker in roles
+    )
+
+
+def farmer_transcript(turns: List[SpeakerTurn]) -> str:
+    """Only the farmer's answers, for smaller extraction prompts."""
+    return format_turns(turns, roles=[FARMER])
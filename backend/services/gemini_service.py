@@ -1,9 +1,15 @@
+import json
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from config.settings import RULE_EXTRACTION_ENABLED
+from services.resilience import get_backend
+from services.rule_extraction import pre_extract
+from services.work_scheduler import get_work_scheduler
+from utils.metrics import INFLIGHT_JOBS, RULE_EXTRACTION_FIELDS, timed
 
 # Constants
 GEMINI_MODEL = "gemini-2.0-flash"
@@ -12,8 +18,9 @@ GEMINI_MODEL = "gemini-2.0-flash"
 class GeminiService:
     """Handles intelligent JSON payload generation for farmer surveys."""
 
-    def __init__(self):
-        self.llm = self._initialize_llm()
+    def __init__(self, llm=None, rules: bool = RULE_EXTRACTION_ENABLED):
+        self.llm = llm or self._initialize_llm()
+        self.rules = rules
 
     def _initialize_llm(self) -> Optional[ChatGoogleGenerativeAI]:
         if not os.getenv("GEMINI_API_KEY"):
@@ -28,7 +35,58 @@ class GeminiService:
     def generate_json_payload(
         self, schema: str, transcript: str
     ) -> Optional[Dict[str, Any]]:
-        """Generates a structured JSON payload from a transcript based on a provided schema."""
+        """
+        Generates a structured JSON payload from a transcript based on a provided schema.
+
+        Fields the rules of services/rule_extraction.py fill confidently (age,
+        village, phone number...) are taken from there; Gemini only gets the
+        remaining fields and the sentences that can mention them, and is not
+        called at all when nothing remains.
+        """
+        return self.extract(schema, transcript)[0]
+
+    def extract(
+        self, schema: str, transcript: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        ``generate_json_payload``, also returning what the rules filled and what was left to Gemini.
+
+        The report is None when the rules are off or the schema is not a JSON object.
+        """
+        try:
+            fields = json.loads(schema)
+        except (TypeError, ValueError):
+            fields = None
+        if not self.rules or not isinstance(fields, dict):
+            return self._generate_with_llm(schema, transcript), None
+
+        with timed("rule_extraction", transcript_chars=len(transcript)):
+            rules = pre_extract(transcript, fields)
+            resolved = rules.resolved()
+            unresolved = {name: value for name, value in fields.items() if name not in resolved}
+            llm_transcript = rules.relevant_transcript(unresolved)
+        extraction = {
+            "rule_fields": {name: value.to_dict() for name, value in resolved.items()},
+            "llm_fields": list(unresolved),
+            "transcript_chars": len(transcript),
+            "sent_chars": len(llm_transcript),
+            "llm_called": bool(unresolved),
+        }
+        RULE_EXTRACTION_FIELDS.inc(len(resolved), source="rules")
+        RULE_EXTRACTION_FIELDS.inc(len(unresolved), source="gemini")
+        print(f"Rules filled {len(resolved)} of {len(fields)} fields; {len(unresolved)} left for Gemini.")
+
+        llm_payload: Dict[str, Any] = {"extra_details": {}}
+        if unresolved:
+            llm_payload = self._generate_with_llm(json.dumps(unresolved, indent=2), llm_transcript)
+            if llm_payload is None:
+                return None, extraction
+        payload = {name: resolved[name].value if name in resolved else llm_payload.get(name) for name in fields}
+        # Keys Gemini adds beyond the schema (extra_details)
+        payload.update({key: value for key, value in llm_payload.items() if key not in payload})
+        return payload, extraction
+
+    def _generate_with_llm(self, schema: str, transcript: str) -> Optional[Dict[str, Any]]:
         if not self.llm:
             return None
         try:
@@ -74,7 +132,13 @@ class GeminiService:
             )
 
             chain = prompt | self.llm | parser
-            response = chain.invoke({"schema": schema, "transcript": transcript})
+            # Waits for a Gemini slot of the shared work scheduler (priority, tenant share)
+            with get_work_scheduler().slot("gemini"):
+                with INFLIGHT_JOBS.track_inprogress(kind="analysis"), timed("gemini", transcript_chars=len(transcript)):
+                    # Deadline, retries, hedging and circuit breaker (services/resilience.py)
+                    response = get_backend("gemini").call(
+                        chain.invoke, {"schema": schema, "transcript": transcript}
+                    )
 
             print("Gemini has successfully generated the JSON payload!")
             # The parser wraps the result in a 'payload' key, so we extract it.
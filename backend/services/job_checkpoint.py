@@ -0,0 +1,168 @@
+# services/job_checkpoint.py
+"""
+Per-chunk checkpoints of chunked transcription jobs.
+
+A job is identified by the hash of the uploaded bytes and the transcription
+parameters, so submitting the same file again finds the earlier job. For
+every chunk the checkpoint records its audio hash, the GCS blob it was
+uploaded to, the name of its recognize operation and, once finished, its
+transcript and speaker turns. A rerun then
+
+- reuses finished chunks whose audio hash still matches,
+- reattaches to operations that were still running (e.g. when the process
+  restarted mid-job) instead of recognizing again,
+- skips the upload of chunks whose blob is still in the bucket,
+
+and only uploads and recognizes the missing or failed chunks. A job whose
+chunks all finished returns its transcript without decoding the file.
+
+Checkpoints are JSON files in ``JOB_CHECKPOINT_DIR``, written atomically like
+the live session store, and pruned after ``JOB_CHECKPOINT_RETENTION_HOURS``.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config.settings import JOB_CHECKPOINT_DIR, JOB_CHECKPOINT_RETENTION_HOURS
+
+
+def job_key(file_bytes: bytes, **params) -> str:
+    """Stable job id for these bytes transcribed with these parameters."""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8"))
+    digest.update(file_bytes)
+    return digest.hexdigest()[:32]
+
+
+def audio_hash(buffer) -> str:
+    """SHA-256 of a chunk's encoded audio; the buffer is rewound afterwards."""
+    digest = hashlib.sha256()
+    buffer.seek(0)
+    for block in iter(lambda: buffer.read(1 << 20), b""):
+        digest.update(block)
+    buffer.seek(0)
+    return digest.hexdigest()
+
+
+class FileCheckpointStore:
+    """One JSON file per job in a directory (shared by the workers on one host)."""
+
+    def __init__(self, directory: str = JOB_CHECKPOINT_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, record: Dict):
+        path = self._path(record["job_id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)  # atomic, readers never see half a record
+
+    def prune(self, max_age_seconds: float, on_expired: Optional[Callable[[Dict], None]] = None) -> int:
+        """Delete checkpoints not updated for ``max_age_seconds``; ``on_expired`` sees each one first."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if on_expired:
+                    record = self.load(name[:-len(".json")])
+                    if record:
+                        on_expired(record)
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+class JobCheckpoint:
+    """Chunk states of one job; every update is persisted immediately."""
+
+    def __init__(self, store: FileCheckpointStore, record: Dict):
+        self.store = store
+        self.record = record
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, store: FileCheckpointStore, job_id: str) -> "JobCheckpoint":
+        record = store.load(job_id) or {
+            "job_id": job_id,
+            "created": time.time(),
+            "status": "running",
+            "chunks": {},
+        }
+        return cls(store, record)
+
+    @property
+    def job_id(self) -> str:
+        return self.record["job_id"]
+
+    @property
+    def done(self) -> bool:
+        return self.record["status"] == "done"
+
+    def chunk(self, index: int, chunk_hash: str) -> Dict:
+        """Saved state of chunk ``index`` if it was made from the same audio, else an empty dict."""
+        entry = self.record["chunks"].get(str(index))
+        return dict(entry) if entry and entry.get("audio_hash") == chunk_hash else {}
+
+    def update_chunk(self, index: int, **fields):
+        with self._lock:
+            entry = self.record["chunks"].setdefault(str(index), {"index": index})
+            entry.update(fields)
+            self._save()
+
+    def finish(
+        self,
+        status: str,
+        transcript: Optional[str] = None,
+        speaker_turns: Optional[List[Dict]] = None,
+        segments: Optional[List[Dict]] = None,
+    ):
+        """Mark the job ``done`` (with its final transcript) or ``partial`` (some chunks failed)."""
+        with self._lock:
+            self.record["status"] = status
+            if status == "done":
+                self.record["transcript"] = transcript
+                self.record["speaker_turns"] = speaker_turns or []
+                self.record["segments"] = segments or []
+            self._save()
+
+    def _save(self):
+        self.record["updated"] = time.time()
+        try:
+            self.store.save(self.record)
+        except OSError as e:
+            print(f"Failed to save checkpoint {self.job_id}: {e}")
+
+
+_store = None
+_pruned_at = 0.0
+
+
+def open_checkpoint(job_id: str, on_expired: Optional[Callable[[Dict], None]] = None) -> JobCheckpoint:
+    """Checkpoint ``job_id`` from the process-wide store; expired checkpoints are pruned hourly."""
+    global _store, _pruned_at
+    if _store is None:
+        _store = FileCheckpointStore()
+    if time.time() - _pruned_at > 3600:
+        _pruned_at = time.time()
+        _store.prune(JOB_CHECKPOINT_RETENTION_HOURS * 3600, on_expired)
+    return JobCheckpoint.open(_store, job_id)
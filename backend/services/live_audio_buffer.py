@@ -0,0 +1,309 @@
+# services/live_audio_buffer.py
+"""
+Bounded, back-pressured buffer between Socket.IO audio frames and Speech.
+
+Frames are kept in arrival order and coalesced into requests of about
+``request_bytes`` (~100 ms of audio) on the way out, so a stalled
+recognizer catching up sends a few large requests instead of hundreds of
+tiny ones. When the in-memory budget is exhausted the overflow policy
+decides what happens:
+
+* ``block``       - the producer waits up to ``block_timeout`` for space,
+                    then falls back to dropping the backlog
+* ``drop_oldest`` - the queued backlog is discarded
+* ``spill``       - new frames go to an anonymous temp file until the
+                    backlog drains (bounded by ``max_spill_bytes``)
+
+MediaRecorder frames are slices of one continuous WebM/Opus stream, not
+self-contained packets, so cutting frames out of the middle would corrupt
+the container. A drop therefore discards the whole backlog (never the
+header frame) and the next ``get`` raises ``StreamRestart``: the consumer
+ends the current Speech stream and opens a new one that starts with the
+header, as on rotation. The audio of the backlog is lost.
+"""
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from config.settings import (
+    LIVE_BUFFER_MAX_BYTES,
+    LIVE_COALESCE_WAIT_SECONDS,
+    LIVE_MAX_REQUEST_BYTES,
+    LIVE_OVERFLOW_POLICY,
+    LIVE_REQUEST_BYTES,
+    LIVE_SPILL_MAX_BYTES,
+)
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+
+class StreamRestart(Exception):
+    """Raised by ``get`` after a drop: the stream must restart from the header frame."""
+
+
+class LiveAudioBuffer:
+    """Thread-safe bounded FIFO of audio frames with request coalescing."""
+
+    def __init__(
+        self,
+        max_bytes: int = LIVE_BUFFER_MAX_BYTES,
+        request_bytes: int = LIVE_REQUEST_BYTES,
+        max_request_bytes: int = LIVE_MAX_REQUEST_BYTES,
+        overflow_policy: str = LIVE_OVERFLOW_POLICY,
+        coalesce_wait: float = LIVE_COALESCE_WAIT_SECONDS,
+        block_timeout: float = 0.5,
+        max_spill_bytes: int = LIVE_SPILL_MAX_BYTES,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Use one of {OVERFLOW_POLICIES}")
+
+        self.max_bytes = max_bytes
+        self.request_bytes = request_bytes
+        self.max_request_bytes = max_request_bytes
+        self.overflow_policy = overflow_policy
+        self.coalesce_wait = coalesce_wait
+        self.block_timeout = block_timeout
+        self.max_spill_bytes = max_spill_bytes
+
+        # Entries: [seq, bytes] in memory or [seq, (offset, length)] spilled to disk
+        self._entries = deque()
+        self._memory_bytes = 0
+        self._spilled_bytes = 0
+        self._spill_file = None
+        self._spill_end = 0
+        self._next_seq = 0
+        self._restart_seq = None  # first frame after a drop; a new stream must start there
+        self._closed = False
+        self._cond = threading.Condition()
+        self._waker: Optional[Callable[[], None]] = None
+
+        self._counters = {
+            "frames_in": 0,
+            "bytes_in": 0,
+            "requests_out": 0,
+            "bytes_out": 0,
+            "dropped_frames": 0,
+            "dropped_bytes": 0,
+            "stream_restarts": 0,
+            "spilled_frames": 0,
+            "blocked_puts": 0,
+            "high_water_bytes": 0,
+        }
+
+    # ------------------------------------------------------------------ producer
+
+    def set_waker(self, waker: Optional[Callable[[], None]]):
+        """Register a callback run after every put/close (e.g. to wake an event loop)."""
+        self._waker = waker
+
+    def put(self, frame: bytes) -> bool:
+        """Queue one frame. Returns False if the buffer is closed."""
+        if not frame:
+            return True
+        with self._cond:
+            if self._closed:
+                return False
+            self._counters["frames_in"] += 1
+            self._counters["bytes_in"] += len(frame)
+
+            if self._memory_bytes + len(frame) > self.max_bytes:
+                self._make_room(len(frame))
+
+            seq = self._next_seq
+            self._next_seq += 1
+            if self._memory_bytes + len(frame) > self.max_bytes and self.overflow_policy == "spill":
+                self._entries.append([seq, self._spill(frame)])
+            else:
+                self._entries.append([seq, frame])
+                self._memory_bytes += len(frame)
+
+            depth = self._memory_bytes + self._spilled_bytes
+            self._counters["high_water_bytes"] = max(self._counters["high_water_bytes"], depth)
+            self._cond.notify_all()
+        if self._waker:
+            self._waker()
+        return True
+
+    def _make_room(self, needed: int):
+        """Apply the overflow policy until ``needed`` bytes fit in memory (lock held)."""
+        if self.overflow_policy == "block":
+            self._counters["blocked_puts"] += 1
+            deadline = time.monotonic() + self.block_timeout
+            while self._memory_bytes + needed > self.max_bytes and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        elif self.overflow_policy == "spill":
+            if self._spilled_bytes + needed <= self.max_spill_bytes:
+                return
+        self._drop_oldest(needed)
+
+    def _drop_oldest(self, needed: int):
+        """Discard the backlog (never the header frame) and restart the stream at the next frame (lock held)."""
+        if self._memory_bytes + needed <= self.max_bytes:
+            return
+        kept = deque()
+        for seq, payload in self._entries:
+            if seq == 0:
+                kept.append([seq, payload])
+                continue
+            size = payload[1] if isinstance(payload, tuple) else len(payload)
+            if isinstance(payload, tuple):
+                self._spilled_bytes -= size
+            else:
+                self._memory_bytes -= size
+            self._counters["dropped_frames"] += 1
+            self._counters["dropped_bytes"] += size
+        self._entries = kept
+        if self._restart_seq is None:
+            self._counters["stream_restarts"] += 1
+        self._restart_seq = self._next_seq
+
+    def _spill(self, frame: bytes):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="live-audio-")
+            self._spill_end = 0
+        self._spill_file.seek(self._spill_end)
+        self._spill_file.write(frame)
+        location = (self._spill_end, len(frame))
+        self._spill_end += len(frame)
+        self._spilled_bytes += len(frame)
+        self._counters["spilled_frames"] += 1
+        return location
+
+    # ------------------------------------------------------------------ consumer
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Block until audio is available and return one coalesced request.
+
+        Returns None once the buffer is closed and drained; raises
+        ``queue.Empty`` when ``timeout`` expires without audio and
+        ``StreamRestart`` when the next frame follows a drop.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._entries or self._closed, timeout):
+                raise queue.Empty
+            if not self._entries:
+                return None
+
+            # Give small frames a moment to accumulate into a ~100 ms request
+            if self._pending_bytes() < self.request_bytes and not self._closed and self.coalesce_wait > 0:
+                self._cond.wait_for(
+                    lambda: self._pending_bytes() >= self.request_bytes or self._closed,
+                    self.coalesce_wait,
+                )
+            return self._take_request()
+
+    def get_nowait(self) -> Optional[bytes]:
+        """Return a coalesced request if audio is queued, None otherwise (never blocks; may raise ``StreamRestart``)."""
+        with self._cond:
+            if not self._entries:
+                return None
+            return self._take_request()
+
+    def _pending_bytes(self) -> int:
+        return self._memory_bytes + self._spilled_bytes
+
+    def _take_request(self) -> bytes:
+        """Pop frames from the head up to ``max_request_bytes`` (lock held)."""
+        if self._entries[0][0] == self._restart_seq:
+            self._restart_seq = None
+            raise StreamRestart
+        parts = []
+        total = 0
+        while self._entries:
+            seq, payload = self._entries[0]
+            if seq == self._restart_seq:
+                break  # frames after a drop belong to the next stream
+            size = payload[1] if isinstance(payload, tuple) else len(payload)
+            if parts and total + size > self.max_request_bytes:
+                break
+            if not parts and size > self.max_request_bytes:
+                # Oversized frame: hand out the first slice and keep the remainder queued
+                frame = self._read_payload(payload)
+                self._entries[0] = [seq, frame[self.max_request_bytes :]]
+                if isinstance(payload, tuple):
+                    self._spilled_bytes -= size
+                    self._memory_bytes += size
+                self._memory_bytes -= self.max_request_bytes
+                parts.append(frame[: self.max_request_bytes])
+                total = self.max_request_bytes
+                break
+
+            self._entries.popleft()
+            if isinstance(payload, tuple):
+                self._spilled_bytes -= size
+            else:
+                self._memory_bytes -= size
+            parts.append(self._read_payload(payload))
+            total += size
+            if seq == 0:
+                break  # the header frame travels alone so it can be replayed on rotation
+            if total >= self.request_bytes and total + self._next_size() > self.max_request_bytes:
+                break
+
+        if self._spilled_bytes == 0 and self._spill_file is not None:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+            self._spill_end = 0
+
+        self._counters["requests_out"] += 1
+        self._counters["bytes_out"] += total
+        self._cond.notify_all()  # wake producers blocked on space
+        return b"".join(parts)
+
+    def _next_size(self) -> int:
+        if not self._entries:
+            return 0
+        payload = self._entries[0][1]
+        return payload[1] if isinstance(payload, tuple) else len(payload)
+
+    def _read_payload(self, payload) -> bytes:
+        if not isinstance(payload, tuple):
+            return payload
+        offset, length = payload
+        self._spill_file.seek(offset)
+        return self._spill_file.read(length)
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def close(self):
+        """Stop accepting frames; consumers drain what is left and then get None."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._waker:
+            self._waker()
+
+    def discard(self):
+        """Close and free everything, including the spill file."""
+        self.close()
+        with self._cond:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._spilled_bytes = 0
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> dict:
+        """Queue depth and counters, suitable for sending to the client."""
+        with self._cond:
+            return {
+                "policy": self.overflow_policy,
+                "depth_frames": len(self._entries),
+                "depth_bytes": self._memory_bytes + self._spilled_bytes,
+                "memory_bytes": self._memory_bytes,
+                "spilled_bytes": self._spilled_bytes,
+                "capacity_bytes": self.max_bytes,
+                **self._counters,
+            }
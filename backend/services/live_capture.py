@@ -0,0 +1,245 @@
+# services/live_capture.py
+"""
+Append-only capture of live audio for download and batch re-transcription.
+
+Every WebM/Opus frame a client streams is appended to ``<id>.webm`` next to
+a small JSON index that maps arrival time (seconds since the first frame)
+to byte offsets. Because MediaRecorder output cannot be cut at arbitrary
+byte positions, segments are produced by decoding a valid prefix of the
+file (up to the index entry after the segment end) and slicing samples.
+Once the capture is closed the full decode is cached as raw float32 PCM
+(``<id>.pcm``) and served through ``np.memmap``, so repeated segment
+requests do not decode again.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from config.settings import (
+    LIVE_CAPTURE_DIR,
+    LIVE_CAPTURE_INDEX_SECONDS,
+    LIVE_CAPTURE_RETENTION_HOURS,
+    TRANSCODE_SAMPLE_RATE,
+)
+from utils.metrics import CACHE_REQUESTS
+from utils.transcoding import get_transcoding_pool
+
+CAPTURE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class LiveCapture:
+    """One live session's recording: append-only WebM plus a time index."""
+
+    def __init__(
+        self,
+        capture_id: Optional[str] = None,
+        directory: str = LIVE_CAPTURE_DIR,
+        index_seconds: float = LIVE_CAPTURE_INDEX_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.capture_id = capture_id or uuid.uuid4().hex
+        if not CAPTURE_ID_PATTERN.match(self.capture_id):
+            raise ValueError(f"Invalid capture id '{self.capture_id}'")
+        self.directory = directory
+        self.index_seconds = index_seconds
+        self.clock = clock
+
+        self.index: List[Tuple[float, int]] = []  # (seconds since first frame, byte offset)
+        self.size = 0
+        self.duration = 0.0
+        self.created = time.time()
+        self.pcm_rate: Optional[int] = None
+        self.closed = False
+
+        self._started_at = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ paths
+
+    def _path(self, extension: str) -> str:
+        return os.path.join(self.directory, f"{self.capture_id}.{extension}")
+
+    @property
+    def audio_path(self) -> str:
+        return self._path("webm")
+
+    # ------------------------------------------------------------------ writing
+
+    def append(self, frame: bytes):
+        """Append one frame and index its arrival time."""
+        if not frame:
+            return
+        with self._lock:
+            if self.closed:
+                return
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self.audio_path, "ab")
+                self._started_at = self.clock()
+
+            offset = self.clock() - self._started_at
+            if not self.index or offset - self.index[-1][0] >= self.index_seconds:
+                self.index.append((round(offset, 3), self.size))
+            self._file.write(frame)
+            self.size += len(frame)
+            self.duration = offset
+
+    def close(self):
+        """Flush the recording and write its index; further frames are ignored."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._save_index()
+
+    def _save_index(self):
+        if not self.size:
+            return
+        with open(self._path("json"), "w") as f:
+            json.dump(
+                {
+                    "capture_id": self.capture_id,
+                    "created": self.created,
+                    "size": self.size,
+                    "duration": self.duration,
+                    "index": self.index,
+                    "pcm_rate": self.pcm_rate,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, capture_id: str, directory: str = LIVE_CAPTURE_DIR) -> "LiveCapture":
+        """Open a closed capture from disk (raises FileNotFoundError if unknown)."""
+        capture = cls(capture_id, directory)
+        with open(capture._path("json")) as f:
+            meta = json.load(f)
+        capture.created = meta["created"]
+        capture.size = meta["size"]
+        capture.duration = meta["duration"]
+        capture.index = [tuple(entry) for entry in meta["index"]]
+        capture.pcm_rate = meta.get("pcm_rate")
+        capture.closed = True
+        return capture
+
+    # ------------------------------------------------------------------ reading
+
+    def _read(self, end_byte: Optional[int] = None) -> bytes:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            limit = self.size if end_byte is None else min(end_byte, self.size)
+        with open(self.audio_path, "rb") as f:
+            return f.read(limit)
+
+    def byte_offset_for(self, seconds: float) -> int:
+        """Byte offset of the first indexed frame that arrived after ``seconds``."""
+        times = [entry[0] for entry in self.index]
+        position = bisect_left(times, seconds)
+        # One extra index step so the decoded prefix fully covers ``seconds``
+        position += 1
+        return self.index[position][1] if position < len(self.index) else self.size
+
+    def pcm(self, sample_rate: int = TRANSCODE_SAMPLE_RATE) -> np.ndarray:
+        """
+        The whole recording as mono float32 PCM at ``sample_rate``.
+
+        Closed captures are decoded once and then memory-mapped from disk.
+        """
+        pcm_path = self._path("pcm")
+        if self.closed and self.pcm_rate == sample_rate and os.path.exists(pcm_path):
+            CACHE_REQUESTS.inc(cache="live_capture_pcm", result="hit")
+            return np.memmap(pcm_path, dtype=np.float32, mode="r")
+
+        CACHE_REQUESTS.inc(cache="live_capture_pcm", result="miss")
+        audio = self._decode(self._read(), sample_rate)
+        if self.closed:
+            audio.tofile(pcm_path)
+            self.pcm_rate = sample_rate
+            self._save_index()
+            return np.memmap(pcm_path, dtype=np.float32, mode="r")
+        return audio
+
+    def segment(self, start: float = 0.0, end: Optional[float] = None,
+                sample_rate: int = TRANSCODE_SAMPLE_RATE) -> np.ndarray:
+        """Samples between ``start`` and ``end`` seconds of the recording."""
+        start = max(0.0, start)
+        if self.closed or end is None:
+            audio = self.pcm(sample_rate)
+        else:
+            # Still recording: decode only the prefix that covers the segment
+            audio = self._decode(self._read(self.byte_offset_for(end)), sample_rate)
+
+        first = int(start * sample_rate)
+        last = len(audio) if end is None else min(len(audio), int(end * sample_rate))
+        return audio[first:last]
+
+    def segment_wav(self, start: float = 0.0, end: Optional[float] = None,
+                    sample_rate: int = TRANSCODE_SAMPLE_RATE) -> BytesIO:
+        """A segment as a mono 16-bit WAV file object, ready for ``transcribe_full_file``."""
+        buffer = BytesIO()
+        sf.write(buffer, self.segment(start, end, sample_rate), sample_rate, format="WAV", subtype="PCM_16")
+        buffer.seek(0)
+        buffer.name = f"{self.capture_id}.wav"
+        return buffer
+
+    @staticmethod
+    def _decode(data: bytes, sample_rate: int) -> np.ndarray:
+        audio, rate, _ = get_transcoding_pool().decode(data, sample_rate)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if rate != sample_rate:
+            raise ValueError(f"Capture decoded at {rate}Hz, expected {sample_rate}Hz")
+        return np.ascontiguousarray(audio, dtype=np.float32)
+
+    def info(self) -> dict:
+        return {
+            "capture_id": self.capture_id,
+            "bytes": self.size,
+            "duration_seconds": round(self.duration, 3),
+            "closed": self.closed,
+        }
+
+
+def prune_captures(directory: str = LIVE_CAPTURE_DIR, max_age_hours: float = LIVE_CAPTURE_RETENTION_HOURS) -> int:
+    """Delete capture files older than ``max_age_hours``; returns how many were removed."""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+_pruned_at = 0.0
+_prune_lock = threading.Lock()
+
+
+def maybe_prune_captures() -> int:
+    """Prune old captures at most once an hour; cheap to call on every session start."""
+    global _pruned_at
+    with _prune_lock:
+        if time.time() - _pruned_at <= 3600:
+            return 0
+        _pruned_at = time.time()
+    return prune_captures()
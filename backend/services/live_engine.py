@@ -0,0 +1,212 @@
+# services/live_engine.py
+"""
+Asyncio engine that serves every live stream of the process.
+
+A single event loop runs in one daemon thread and drives all
+``streaming_recognize`` calls through the async Speech client, instead of
+one OS thread blocked on a gRPC iterator per session. Socket.IO handlers
+stay synchronous: they push frames into each session's ``LiveAudioBuffer``,
+whose waker nudges the loop, and cancel a session's task when the client
+disconnects.
+
+Transcript callbacks (Socket.IO emits, session store writes) never run on
+the loop: each session's callbacks are queued and run in order on a small
+shared thread pool, so one slow callback delays only its own session.
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from google.cloud import speech
+
+from config.settings import LIVE_CALLBACK_WORKERS
+from services.live_audio_buffer import StreamRestart
+from services.stream_rollover import is_stream_limit_error
+
+
+class _SerialCallbacks:
+    """One session's callbacks, run in submission order on a shared pool."""
+
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self._pending = deque()
+        self._running = False
+        self._condition = threading.Condition()
+
+    def submit(self, callback: Callable, *args):
+        with self._condition:
+            self._pending.append((callback, args))
+            if self._running:
+                return
+            self._running = True
+        self.executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._running = False
+                    self._condition.notify_all()
+                    return
+                callback, args = self._pending.popleft()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f'Live transcript callback failed: {e}')
+
+    def wait_idle(self, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._running, timeout)
+
+
+class LiveStreamEngine:
+    """One event loop, many concurrent live streams."""
+
+    def __init__(self, client_factory=None):
+        self.client_factory = client_factory or speech.SpeechAsyncClient
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, object] = {}
+        self._callbacks: Dict[int, _SerialCallbacks] = {}
+        self._callback_pool = ThreadPoolExecutor(LIVE_CALLBACK_WORKERS, thread_name_prefix="live-callback")
+
+    # ------------------------------------------------------------------ loop
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="live-engine", daemon=True)
+                self._thread.start()
+                started.wait()
+                self._loop = loop
+            return self._loop
+
+    def start(self, session):
+        """Schedule a session's stream; returns a concurrent Future (cancel() stops it)."""
+        loop = self._ensure_loop()
+        # Registered first: a stream that ends at once must not leave its entry behind
+        self._sessions[id(session)] = session
+        self._callbacks[id(session)] = _SerialCallbacks(self._callback_pool)
+        future = asyncio.run_coroutine_threadsafe(self._run(session), loop)
+        future.add_done_callback(lambda _: self._sessions.pop(id(session), None))
+        return future
+
+    def call_soon(self, session, callback: Callable, *args):
+        """Run ``callback(*args)`` off the loop, after the session's earlier callbacks."""
+        callbacks = self._callbacks.get(id(session))
+        if callbacks is None:
+            callbacks = self._callbacks[id(session)] = _SerialCallbacks(self._callback_pool)
+        callbacks.submit(callback, *args)
+
+    def finish_callbacks(self, session, timeout: float = 2.0):
+        """Wait for the session's queued callbacks after its stream ended, then forget them."""
+        callbacks = self._callbacks.pop(id(session), None)
+        if callbacks and not callbacks.wait_idle(timeout):
+            print('⚠️ Live transcript callbacks still running after stop')
+
+    @property
+    def active_streams(self) -> int:
+        return len(self._sessions)
+
+    def shutdown(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=2)
+                self._loop = None
+
+    # ------------------------------------------------------------------ streams
+
+    def _get_client(self):
+        # Created on the loop thread: async gRPC channels are bound to their loop
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    async def _requests(self, session, replay):
+        """Config request, replayed tail, then live audio until the stream must rotate."""
+        yield speech.StreamingRecognizeRequest(streaming_config=session.streaming_config)
+        for chunk in replay:
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        buffer = session.audio_buffer
+        buffer.set_waker(lambda: loop.call_soon_threadsafe(wake.set))
+        try:
+            while True:
+                if session.rollover.should_rotate():
+                    return
+                wake.clear()
+                try:
+                    chunk = buffer.get_nowait()
+                except StreamRestart:
+                    print('⚠️ Live audio dropped, restarting the stream from the header')
+                    session.rollover.restart()
+                    return
+                if chunk is None:
+                    if buffer.closed:
+                        return
+                    try:
+                        await asyncio.wait_for(wake.wait(), session.rollover.seconds_until_rotation())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                session.rollover.record_chunk(chunk)
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+        finally:
+            buffer.set_waker(None)
+
+    async def _run_stream(self, session) -> bool:
+        """One streaming_recognize call; returns True if it should be rotated."""
+        replay = session.rollover.begin_stream()
+        if session.rollover.stream_count > 1:
+            print(f'🔁 Rotating to stream #{session.rollover.stream_count} (replaying {len(replay)} chunks)')
+
+        try:
+            responses = await self._get_client().streaming_recognize(requests=self._requests(session, replay))
+            async for response in responses:
+                session.handle_response(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if session.is_streaming and is_stream_limit_error(e):
+                return True
+            raise
+
+        return session.is_streaming and session.rollover.rotation_requested
+
+    async def _run(self, session):
+        try:
+            print('🎙️ Live streaming started...')
+            while await self._run_stream(session):
+                continue
+            print('🎙️ Streaming ended normally')
+        except asyncio.CancelledError:
+            print('🛑 Live stream cancelled')
+            raise
+        except Exception as e:
+            session.report_error(e)
+
+
+_engine: Optional[LiveStreamEngine] = None
+
+
+def get_live_engine() -> LiveStreamEngine:
+    """Process-wide engine shared by all live sessions."""
+    global _engine
+    if _engine is None:
+        _engine = LiveStreamEngine()
+    return _engine
@@ -1,38 +1,96 @@
 from google.cloud import speech
 import queue
 import threading
+import concurrent.futures
 import os
-from config.settings import get_service_account_credentials
+from config.settings import LIVE_ENGINE, get_service_account_credentials
+from services.live_audio_buffer import LiveAudioBuffer, StreamRestart
+from services.live_engine import get_live_engine
+from services.stream_rollover import StreamRollover, is_stream_limit_error
 
 class LiveTranscriptionService:
     """Real-time streaming transcription using Google Cloud Speech-to-Text"""
     
-    def __init__(self):
+    def __init__(self, client=None, audio_buffer=None, capture=None, engine=None):
         # Set credentials properly
         creds_path = get_service_account_credentials()
         if creds_path:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds_path
         
-        self.client = speech.SpeechClient()
-        self.audio_queue = queue.Queue()
+        # Streams run on the shared asyncio engine; a sync client selects the legacy thread per stream
+        if engine is None and client is None and LIVE_ENGINE == 'asyncio':
+            engine = get_live_engine()
+        self.engine = engine
+        self.client = None if engine else (client or speech.SpeechClient())
+        self.audio_buffer = audio_buffer or LiveAudioBuffer()
+        self.capture = capture  # optional LiveCapture that keeps every frame on disk
         self.is_streaming = False
         self.transcript_callback = None
-        
+        self.streaming_config = None
+        self.rollover = StreamRollover()
+        self._future = None
+    
     def audio_generator(self):
-        """Generator that yields audio chunks from queue"""
+        """Generator that yields coalesced audio requests until the stream must rotate"""
         while self.is_streaming:
+            if self.rollover.should_rotate():
+                return
             try:
-                chunk = self.audio_queue.get(timeout=1)
+                # Sleeps until audio arrives, the buffer closes or rotation is due
+                chunk = self.audio_buffer.get(timeout=self.rollover.seconds_until_rotation())
                 if chunk is None:
                     break
+                self.rollover.record_chunk(chunk)
                 yield chunk
             except queue.Empty:
                 continue
+            except StreamRestart:
+                print('⚠️ Live audio dropped, restarting the stream from the header')
+                self.rollover.restart()
+                return
+    
+    def handle_response(self, response):
+        """Filter one streaming response and pass new text to the callback"""
+        if not response.results:
+            return
+        
+        result = response.results[0]
+        if not result.alternatives:
+            return
+        
+        transcript = self.rollover.accept_result(
+            result.alternatives[0].transcript, result.result_end_time, result.is_final
+        )
+        if transcript is None:
+            return
+        
+        # Log finals only; interims arrive several times a second
+        if result.is_final:
+            print(f'✅ Final: {transcript}')
+        
+        # Send to callback
+        self._deliver(transcript, result.is_final)
+    
+    def report_error(self, error):
+        print(f'❌ Streaming error: {error}')
+        import traceback
+        traceback.print_exc()
+        self._deliver(f'Error: {str(error)}', True)
+    
+    def _deliver(self, transcript, is_final):
+        """Pass text to the callback; on the engine it runs off the event loop shared by all streams"""
+        if not self.transcript_callback:
+            return
+        if self.engine:
+            self.engine.call_soon(self, self.transcript_callback, transcript, is_final)
+        else:
+            self.transcript_callback(transcript, is_final)
     
     def start_streaming(self, callback, language_code='hi-IN'):
         """Start real-time streaming transcription"""
         self.is_streaming = True
         self.transcript_callback = callback
+        self.rollover = StreamRollover()
         
         # Streaming config
         config = speech.RecognitionConfig(
@@ -43,65 +101,84 @@ class LiveTranscriptionService:
             model='latest_long',
         )
         
-        streaming_config = speech.StreamingRecognitionConfig(
+        self.streaming_config = speech.StreamingRecognitionConfig(
             config=config,
             interim_results=True,
         )
         
-        # Create streaming request generator
-        def request_generator():
+        if self.engine:
+            self._future = self.engine.start(self)
+            return
+        
+        # Legacy path: one thread per stream with a blocking gRPC iterator
+        def request_generator(replay):
+            for chunk in replay:
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
             for chunk in self.audio_generator():
                 yield speech.StreamingRecognizeRequest(audio_content=chunk)
         
-        # Start streaming in background thread
+        def run_stream():
+            """Run one streaming_recognize call; returns True if it should be rotated."""
+            replay = self.rollover.begin_stream()
+            if self.rollover.stream_count > 1:
+                print(f'🔁 Rotating to stream #{self.rollover.stream_count} (replaying {len(replay)} chunks)')
+            
+            try:
+                responses = self.client.streaming_recognize(self.streaming_config, request_generator(replay))
+                for response in responses:
+                    self.handle_response(response)
+            except Exception as e:
+                if self.is_streaming and is_stream_limit_error(e):
+                    return True
+                raise
+            
+            return self.is_streaming and self.rollover.rotation_requested
+        
+        # Start streaming in background thread, rotating streams before the time limit
         def stream_audio():
             try:
-                requests = request_generator()
-                responses = self.client.streaming_recognize(streaming_config, requests)
-                
                 print('🎙️ Live streaming started...')
-                for response in responses:
-                    if not response.results:
-                        continue
-                    
-                    result = response.results[0]
-                    if not result.alternatives:
-                        continue
-                    
-                    transcript = result.alternatives[0].transcript
-                    is_final = result.is_final
-                    
-                    # Log for debugging
-                    if is_final:
-                        print(f'✅ Final: {transcript}')
-                    else:
-                        print(f'⏳ Interim: {transcript[:50]}...')
-                    
-                    # Send to callback
-                    if self.transcript_callback:
-                        self.transcript_callback(transcript, is_final)
-                
+                while run_stream():
+                    continue
                 print('🎙️ Streaming ended normally')
-                        
+            
             except Exception as e:
-                print(f'❌ Streaming error: {e}')
-                import traceback
-                traceback.print_exc()
-                if self.transcript_callback:
-                    self.transcript_callback(f'Error: {str(e)}', True)
+                self.report_error(e)
         
         # Start thread
         self.stream_thread = threading.Thread(target=stream_audio)
         self.stream_thread.start()
     
     def add_audio_chunk(self, audio_bytes):
-        """Add audio chunk to processing queue"""
+        """Add audio chunk to the bounded buffer (may block or drop per overflow policy)"""
         if self.is_streaming:
-            self.audio_queue.put(audio_bytes)
+            if self.capture:
+                self.capture.append(audio_bytes)  # tee before the buffer can drop anything
+            self.audio_buffer.put(audio_bytes)
+    
+    def buffer_stats(self):
+        """Queue depth and overflow counters of the live audio buffer"""
+        return self.audio_buffer.stats()
     
-    def stop_streaming(self):
-        """Stop streaming transcription"""
+    def stop_streaming(self, graceful=True):
+        """
+        Stop streaming transcription.
+        
+        Graceful stops let the recognizer finish the queued audio (up to 2 s);
+        otherwise (client gone) the stream is cancelled right away.
+        """
         self.is_streaming = False
-        self.audio_queue.put(None)  # Signal end
-        if hasattr(self, 'stream_thread'):
+        if self._future is not None and not graceful:
+            self._future.cancel()
+        self.audio_buffer.close()  # Signal end
+        if self._future is not None:
+            try:
+                self._future.result(timeout=2)
+            except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+                self._future.cancel()
+            self.engine.finish_callbacks(self)
+        elif hasattr(self, 'stream_thread'):
             self.stream_thread.join(timeout=2)
+        self.audio_buffer.discard()
+        if self.capture:
+            self.capture.close()
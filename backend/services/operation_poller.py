@@ -0,0 +1,215 @@
+# services/operation_poller.py
+"""
+Central poller for Speech long-running operations.
+
+``operation.result()`` blocks its thread for the whole recognition, so each
+in-flight chunk used to hold an OS thread. Instead, callers start the
+operation and hand it to the poller, which returns a ``Future``. One
+scheduler thread keeps the operations in a heap ordered by their next poll
+time; the status RPCs (``operation.done()``) run on a few pool threads, and
+the future is resolved when the operation finishes.
+
+Polling is adaptive: the first poll of an operation with a known audio
+duration is scheduled from the recognition speed observed so far (an
+exponentially weighted seconds-of-processing per second-of-audio), later
+polls back off by ``LRO_POLL_MULTIPLIER`` up to ``LRO_POLL_MAX_SECONDS``.
+
+Failed status RPCs are retried at the next poll. Each one counts in
+``STAGE_FAILURES`` (stage ``poll``), and an operation that had any is
+logged once, when it finishes.
+"""
+import atexit
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from config.settings import (
+    LRO_POLL_INITIAL_SECONDS,
+    LRO_POLL_MAX_SECONDS,
+    LRO_POLL_MULTIPLIER,
+    LRO_POLL_WORKERS,
+    LRO_TIMEOUT_SECONDS,
+)
+from utils.metrics import PENDING_OPERATIONS, STAGE_FAILURES, STAGE_SECONDS
+from utils.tracing import record_span
+
+
+class _Tracked:
+    __slots__ = (
+        "operation", "future", "stage", "audio_seconds", "started", "started_ns", "delay", "context",
+        "poll_errors", "last_poll_error",
+    )
+
+    def __init__(self, operation, stage, audio_seconds, delay):
+        self.operation = operation
+        self.future = Future()
+        self.stage = stage
+        self.audio_seconds = audio_seconds
+        self.started = time.monotonic()
+        self.started_ns = time.time_ns()
+        self.delay = delay
+        self.context = contextvars.copy_context()  # the caller's trace, for the stage span
+        self.poll_errors = 0
+        self.last_poll_error = None
+
+
+class OperationPoller:
+    """Tracks many long-running operations with one scheduler thread and a small RPC pool."""
+
+    def __init__(
+        self,
+        poll_workers: int = LRO_POLL_WORKERS,
+        initial_interval: float = LRO_POLL_INITIAL_SECONDS,
+        max_interval: float = LRO_POLL_MAX_SECONDS,
+        multiplier: float = LRO_POLL_MULTIPLIER,
+        timeout: float = LRO_TIMEOUT_SECONDS,
+    ):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.timeout = timeout
+        self.seconds_per_audio_second: Optional[float] = None
+        self.polls = 0
+
+        self._heap = []
+        self._pending = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=poll_workers, thread_name_prefix="lro-poll")
+        self._thread = threading.Thread(target=self._run, name="lro-scheduler", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self._pending
+
+    # ------------------------------------------------------------------ submitting
+
+    def recognize(self, speech_client, config, audio, audio_seconds: float = 0.0) -> Future:
+        """Start ``long_running_recognize`` and return a future of its response."""
+        operation = speech_client.long_running_recognize(config=config, audio=audio)
+        return self.track(operation, "recognize", audio_seconds)
+
+    def track(self, operation, stage: str = "recognize", audio_seconds: float = 0.0) -> Future:
+        """Poll an already started operation; the future resolves to ``operation.result()``."""
+        tracked = _Tracked(operation, stage, audio_seconds, self._first_delay(audio_seconds))
+        tracked.future.set_running_or_notify_cancel()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Operation poller is shut down")
+            self._pending += 1
+            self._schedule(tracked, tracked.delay)
+        return tracked.future
+
+    def _first_delay(self, audio_seconds: float) -> float:
+        if audio_seconds and self.seconds_per_audio_second:
+            # Slightly early, so a typical operation is done at the first or second poll
+            expected = self.seconds_per_audio_second * audio_seconds * 0.9
+            return min(self.max_interval, max(self.initial_interval, expected))
+        return self.initial_interval
+
+    def _schedule(self, tracked: _Tracked, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), tracked))
+        self._condition.notify()
+
+    # ------------------------------------------------------------------ polling
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    wait = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(wait)
+                if self._closed:
+                    return
+                due = []
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+            for tracked in due:
+                self._pool.submit(self._poll, tracked)
+
+    def _poll(self, tracked: _Tracked):
+        with self._condition:
+            self.polls += 1
+        try:
+            done = tracked.operation.done()
+        except Exception as e:
+            # Transient status RPC failure: keep polling until the timeout
+            STAGE_FAILURES.inc(stage="poll")
+            tracked.poll_errors += 1
+            tracked.last_poll_error = e
+            done = False
+
+        # Finished (metrics, span, log) before the future settles and wakes the caller
+        if done:
+            try:
+                result = tracked.operation.result()
+            except Exception as e:
+                self._finish(tracked, error=f"{type(e).__name__}: {e}")
+                tracked.future.set_exception(e)
+            else:
+                self._finish(tracked)
+                tracked.future.set_result(result)
+            return
+
+        if time.monotonic() - tracked.started > self.timeout:
+            self._finish(tracked, error="timeout")
+            tracked.future.set_exception(TimeoutError(f"Operation not done after {self.timeout:.0f}s"))
+            return
+
+        tracked.delay = min(self.max_interval, tracked.delay * self.multiplier)
+        with self._condition:
+            if not self._closed:
+                self._schedule(tracked, tracked.delay)
+
+    def _finish(self, tracked: _Tracked, error: Optional[str] = None):
+        elapsed = time.monotonic() - tracked.started
+        with self._condition:
+            self._pending -= 1
+            if error is None and tracked.audio_seconds:
+                rate = elapsed / tracked.audio_seconds
+                previous = self.seconds_per_audio_second
+                self.seconds_per_audio_second = rate if previous is None else 0.8 * previous + 0.2 * rate
+        STAGE_SECONDS.observe(elapsed, stage=tracked.stage)
+        if error:
+            STAGE_FAILURES.inc(stage=tracked.stage)
+        if tracked.poll_errors:
+            print(
+                f"Operation {tracked.stage} {'failed' if error else 'finished'} after {elapsed:.0f}s with "
+                f"{tracked.poll_errors} failed status polls (last: {tracked.last_poll_error})"
+            )
+        tracked.context.run(record_span, tracked.stage, tracked.started_ns, error=error)
+
+    def shutdown(self):
+        """Stop polling; futures still pending fail with ``RuntimeError``."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            remaining = [entry[2] for entry in self._heap]
+            self._heap.clear()
+            self._condition.notify_all()
+        for tracked in remaining:
+            if not tracked.future.done():
+                tracked.future.set_exception(RuntimeError("Operation poller shut down"))
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_operation_poller() -> OperationPoller:
+    """Process-wide shared operation poller."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = OperationPoller()
+            PENDING_OPERATIONS.set_function(lambda: len(_poller))
+            atexit.register(_poller.shutdown)
+        return _poller
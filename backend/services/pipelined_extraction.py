@@ -0,0 +1,134 @@
+# services/pipelined_extraction.py
+"""
+Gemini extraction that overlaps with chunked transcription.
+
+``TranscriptionService.transcribe_full_file(on_chunk=...)`` reports chunk
+transcripts in order as soon as they are available. ``PipelinedExtractor``
+groups them into segments of ``PIPELINE_SEGMENT_CHUNKS`` chunks and starts a
+partial extraction for each completed segment while later chunks are still
+being recognized. ``finish()`` extracts the remaining tail and merges the
+partial payloads, so after the last chunk only one segment-sized Gemini
+call remains instead of a call over the whole transcript.
+
+The merge is deterministic: the first non-empty value of a field wins (the
+interview introduction comes first), list fields are concatenated without
+duplicates and ``extra_details`` dictionaries are combined. The rule
+extraction reports of the segments are merged the same way.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import PIPELINE_EXTRACTION_WORKERS, PIPELINE_SEGMENT_CHUNKS
+from utils.tracing import propagate, span
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def merge_payloads(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine partial payloads in transcript order."""
+    merged: Dict[str, Any] = {}
+    for payload in payloads:
+        for key, value in payload.items():
+            if _is_empty(value):
+                merged.setdefault(key, value)
+                continue
+            current = merged.get(key)
+            if _is_empty(current):
+                merged[key] = value
+            elif isinstance(current, list):
+                values = value if isinstance(value, list) else [value]
+                merged[key] = current + [item for item in values if item not in current]
+            elif isinstance(current, dict) and isinstance(value, dict):
+                merged[key] = {**value, **current}
+    return merged
+
+
+def merge_extractions(extractions: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Combine the rule extraction reports of the segments (None if the rules were off)."""
+    extractions = [extraction for extraction in extractions if extraction]
+    if not extractions:
+        return None
+    merged = {"rule_fields": {}, "llm_fields": [], "transcript_chars": 0, "sent_chars": 0, "llm_called": False}
+    for extraction in extractions:
+        for name, value in extraction["rule_fields"].items():
+            merged["rule_fields"].setdefault(name, value)
+        merged["llm_fields"] += [name for name in extraction["llm_fields"] if name not in merged["llm_fields"]]
+        merged["transcript_chars"] += extraction["transcript_chars"]
+        merged["sent_chars"] += extraction["sent_chars"]
+        merged["llm_called"] = merged["llm_called"] or extraction["llm_called"]
+    # A field filled by the rules in any segment was not needed from Gemini
+    merged["llm_fields"] = [name for name in merged["llm_fields"] if name not in merged["rule_fields"]]
+    merged["segments"] = len(extractions)
+    return merged
+
+
+class PipelinedExtractor:
+    """Runs partial Gemini extractions on segments of chunk transcripts as they arrive."""
+
+    def __init__(
+        self,
+        gemini_service,
+        schema_json: str,
+        segment_chunks: int = PIPELINE_SEGMENT_CHUNKS,
+        max_workers: int = PIPELINE_EXTRACTION_WORKERS,
+    ):
+        self.gemini_service = gemini_service
+        self.schema_json = schema_json
+        self.segment_chunks = max(1, segment_chunks)
+        self.chunks_received = 0
+        self._pending: List[str] = []
+        self._partials = []  # futures, in transcript order
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract")
+
+    def feed(self, chunk_index: int, transcript: Optional[str]):
+        """Add the next chunk transcript (chunks must arrive in order; None for failed chunks)."""
+        with self._lock:
+            self.chunks_received += 1
+            if transcript:
+                self._pending.append(transcript)
+            if self.chunks_received % self.segment_chunks == 0:
+                self._submit_pending(chunk_index)
+
+    def _submit_pending(self, last_chunk: int):
+        if not self._pending:
+            return
+        segment = " ".join(self._pending)
+        self._pending = []
+        self._partials.append(self._executor.submit(propagate(self._extract), segment, last_chunk))
+
+    def _extract(self, segment: str, last_chunk: int):
+        with span("partial_extraction", last_chunk=last_chunk, transcript_chars=len(segment)):
+            return self.gemini_service.extract(self.schema_json, segment)
+
+    @property
+    def used(self) -> bool:
+        """Whether any chunk was fed (short files are transcribed in one piece)."""
+        return self.chunks_received > 0
+
+    def close(self):
+        """Cancel the partial extractions that have not started yet (the request failed)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def finish(self) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Extract the remaining chunks and merge the partial payloads and extraction reports.
+
+        The payload is None if any extraction failed.
+        """
+        with self._lock:
+            self._submit_pending(self.chunks_received - 1)
+            partials = list(self._partials)
+        try:
+            with span("merge_extraction", segments=len(partials)):
+                results = [future.result() for future in partials]
+                payloads = [payload for payload, _ in results]
+                extraction = merge_extractions([extraction for _, extraction in results])
+                if not payloads or any(payload is None for payload in payloads):
+                    return None, extraction
+                return merge_payloads(payloads), extraction
+        finally:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,142 @@
+# services/refinement.py
+"""
+Selective re-transcription of low-confidence parts of a transcript.
+
+Speech returns one result per utterance, each with an end time and the
+confidence of its top alternative. ``segments_from_response`` keeps them as
+``TranscriptSegment``s on the file's timeline. ``low_confidence_spans`` groups
+consecutive segments under the threshold (bridging short confident gaps) into
+spans; only those spans are recognized again with a stronger model, and
+``splice_segments`` puts the new segments in their place when they are not
+less confident. Refining a few spans costs a fraction of a full re-run.
+
+A confidence of 0.0 means Speech did not set it, so such segments are never
+picked and such replacements are accepted.
+"""
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from config.settings import REFINE_MERGE_GAP_SECONDS, REFINE_MIN_SPAN_SECONDS
+
+
+@dataclass
+class TranscriptSegment:
+    """One recognition result placed on the file's timeline."""
+
+    start: float
+    end: float
+    text: str
+    confidence: float
+    chunk_index: int = 0
+    refined: bool = False
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _seconds(value) -> float:
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    return float(value or 0)
+
+
+def segments_from_response(response, chunk_index: int = 0, time_offset: float = 0.0) -> List[TranscriptSegment]:
+    """
+    The results of a recognize response as segments, shifted by ``time_offset``.
+
+    A result starts where the previous one ended. Results without text (the
+    word summary Speech appends when diarizing) are skipped.
+    """
+    segments: List[TranscriptSegment] = []
+    previous_end = 0.0
+    for result in response.results:
+        if not result.alternatives or not result.alternatives[0].transcript.strip():
+            continue
+        alternative = result.alternatives[0]
+        end = max(previous_end, _seconds(result.result_end_time))
+        segments.append(
+            TranscriptSegment(
+                start=previous_end + time_offset,
+                end=end + time_offset,
+                text=alternative.transcript.strip(),
+                confidence=round(alternative.confidence, 4),
+                chunk_index=chunk_index,
+            )
+        )
+        previous_end = end
+    return segments
+
+
+def transcript_from_segments(segments: Sequence[TranscriptSegment]) -> str:
+    return " ".join(segment.text for segment in segments)
+
+
+def _is_low(segment: TranscriptSegment, threshold: float) -> bool:
+    return not segment.refined and 0.0 < segment.confidence < threshold and segment.duration > 0
+
+
+def low_confidence_spans(
+    segments: Sequence[TranscriptSegment],
+    threshold: float,
+    merge_gap: float = REFINE_MERGE_GAP_SECONDS,
+    min_seconds: float = REFINE_MIN_SPAN_SECONDS,
+) -> List[Tuple[int, int]]:
+    """
+    Index ranges ``[first, last)`` of segments to recognize again.
+
+    Low-confidence segments separated by at most ``merge_gap`` seconds of
+    confident ones share a span (one call instead of two, with more context
+    for the model). Spans shorter than ``min_seconds`` are dropped.
+    """
+    spans: List[Tuple[int, int]] = []
+    for index, segment in enumerate(segments):
+        if not _is_low(segment, threshold):
+            continue
+        if spans and segment.start - segments[spans[-1][1] - 1].end <= merge_gap:
+            spans[-1] = (spans[-1][0], index + 1)
+        else:
+            spans.append((index, index + 1))
+    return [(first, last) for first, last in spans if segments[last - 1].end - segments[first].start >= min_seconds]
+
+
+def _weighted_confidence(segments: Sequence[TranscriptSegment]) -> float:
+    total = sum(segment.duration for segment in segments)
+    if not total:
+        return 0.0
+    return sum(segment.confidence * segment.duration for segment in segments) / total
+
+
+def splice_segments(
+    segments: Sequence[TranscriptSegment], replacements: Dict[Tuple[int, int], List[TranscriptSegment]]
+) -> Tuple[List[TranscriptSegment], int]:
+    """
+    Segments with each span replaced by its re-recognized segments.
+
+    A replacement is kept unless it is less confident (duration-weighted)
+    than what it replaces; a rejected span keeps its segments, marked as
+    refined so it is not tried again. Returns the segments and the number of
+    spans replaced.
+    """
+    result: List[TranscriptSegment] = []
+    replaced = 0
+    position = 0
+    for (first, last), new_segments in sorted(replacements.items()):
+        result.extend(segments[position:first])
+        original = segments[first:last]
+        new_confidence = _weighted_confidence(new_segments)
+        if new_segments and (not new_confidence or new_confidence >= _weighted_confidence(original)):
+            for segment in new_segments:
+                segment.refined = True
+            result.extend(new_segments)
+            replaced += 1
+        else:
+            for segment in original:
+                segment.refined = True
+            result.extend(original)
+        position = last
+    result.extend(segments[position:])
+    return result, replaced
@@ -0,0 +1,340 @@
+# services/resilience.py
+"""
+Deadlines, hedging, retries and circuit breakers for the Speech and Gemini calls.
+
+A ``Backend`` wraps one cloud dependency. ``submit(start)`` runs ``start()``
+(which begins one attempt and returns a ``Future``) under these rules:
+
+- **deadline**: the call fails with ``TimeoutError`` after ``deadline``
+  seconds, whatever attempts are still running;
+- **hedging**: when an attempt has been running longer than the p95 of
+  recent successful attempts, one duplicate is started and the first result
+  wins. Hedges are limited to ``hedge_budget`` of all calls, so a slow
+  backend does not double the load;
+- **retries**: attempts failing with a retryable error (unavailable,
+  throttled, internal, timeout) are restarted after full-jitter exponential
+  backoff, up to ``max_attempts``. Other errors fail the call at once;
+- **circuit breaker**: after ``failure_threshold`` consecutive retryable
+  failures the backend is considered down and calls fail fast with
+  ``CircuitOpenError`` for ``reset_seconds``; then one probe call is let
+  through and its result closes or re-opens the circuit. Any answer of the
+  backend, a non-retryable error included, closes it; a probe that fails
+  retryably or is dropped by the deadline re-opens it.
+
+Latencies are tracked per unit of work when callers pass ``units`` (seconds
+of audio for Speech), so the hedge delay scales with the size of the call.
+Abandoned attempts are not cancelled (Speech operations and Gemini calls
+cannot be), their results are ignored.
+"""
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from google.api_core import exceptions as api_exceptions
+
+from config.settings import RESILIENCE_BACKENDS
+from utils.metrics import BREAKER_STATE, RESILIENCE_EVENTS
+from utils.tracing import propagate
+
+RETRYABLE_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.Aborted,
+    TimeoutError,
+    ConnectionError,
+)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+MIN_HEDGE_SAMPLES = 20
+
+
+class CircuitOpenError(Exception):
+    """The backend failed repeatedly; calls fail fast until the circuit resets."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures worth another attempt (by type, or HTTP status for other client libraries)."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    # LangChain wraps the client error ("raise ... from e")
+    return error.__cause__ is not None and is_retryable(error.__cause__)
+
+
+class _Timers:
+    """One thread running delayed callbacks (hedges, retries, deadlines) for all calls."""
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay: float, callback: Callable[[], None]):
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="resilience-timers", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Resilience timer failed: {e}")
+
+
+_timers = _Timers()
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Raise ``CircuitOpenError`` unless a call may go through; True for the half-open probe."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._set_state("half_open")
+            if self.state == "closed":
+                return False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+        retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != "closed":
+                self._set_state("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._set_state("open")
+
+    def _set_state(self, state: str):
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        BREAKER_STATE.set({"closed": 0, "half_open": 1, "open": 2}[state], backend=self.name)
+
+
+class _Call:
+    """One logical call: its attempts, timers and the outer future."""
+
+    def __init__(self, backend: "Backend", start: Callable[[], Future], units: float):
+        self.backend = backend
+        self.start = start
+        self.context = contextvars.copy_context()  # the caller's trace and work class, for every attempt
+        self.units = units or 1.0
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.attempts = 0
+        self.running = 0
+        self.hedged = False
+        self.probing = False  # an attempt of this call is the breaker's half-open probe
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def launch(self, hedge: bool = False):
+        if self.future.done():
+            return
+        try:
+            probe = self.backend.breaker.allow()
+        except CircuitOpenError as e:
+            if not hedge:
+                self._fail(e)
+            return
+        with self._lock:
+            self.attempts += 1
+            self.running += 1
+            self.probing = self.probing or probe
+        attempt_started = time.monotonic()
+        try:
+            attempt = self.context.copy().run(self.start)
+        except Exception as e:
+            attempt = Future()
+            attempt.set_exception(e)
+        attempt.add_done_callback(lambda done: self._attempt_done(done, attempt_started, probe))
+        delay = self.backend.hedge_delay(self.units)
+        if delay is not None and not hedge:
+            _timers.call_later(delay, self._hedge)
+
+    def _hedge(self):
+        with self._lock:
+            if self.future.done() or self.hedged or not self.running:
+                return
+            self.hedged = True
+        if self.backend.take_hedge():
+            RESILIENCE_EVENTS.inc(backend=self.backend.name, event="hedge")
+            self.backend.executor.submit(self.launch, True)
+
+    def _attempt_done(self, attempt: Future, attempt_started: float, probe: bool = False):
+        with self._lock:
+            self.running -= 1
+            others_running = self.running > 0
+            if probe:
+                self.probing = False
+        error = attempt.exception()
+        if error is None:
+            self.backend.breaker.record_success()
+            self.backend.record_latency(time.monotonic() - attempt_started, self.units)
+            if not self.future.done():
+                try:
+                    self.future.set_result(attempt.result())
+                except Exception:
+                    pass  # the deadline or another attempt settled the call first
+            return
+
+        retryable = is_retryable(error)
+        if retryable:
+            self.backend.breaker.record_failure()
+        else:
+            # The backend answered (bad request, not found...): it is reachable
+            self.backend.breaker.record_success()
+        if self.future.done() or others_running:
+            return  # a hedge is still running; it may succeed
+        remaining = self.backend.deadline - (time.monotonic() - self.started)
+        if retryable and self.attempts < self.backend.max_attempts:
+            backoff = random.uniform(0, min(self.backend.backoff_max, self.backend.backoff_base * 2 ** (self.attempts - 1)))
+            if backoff < remaining:
+                RESILIENCE_EVENTS.inc(backend=self.backend.name, event="retry")
+                print(f"{self.backend.name} attempt {self.attempts} failed ({type(error).__name__}), retrying in {backoff:.1f}s")
+                _timers.call_later(backoff, lambda: self.backend.executor.submit(self.launch))
+                return
+        self._fail(error)
+
+    def expire(self):
+        if not self.future.done():
+            RESILIENCE_EVENTS.inc(backend=self.backend.name, event="deadline")
+            with self._lock:
+                probing, self.probing = self.probing, False
+            if probing:
+                # The probe did not answer in time: the backend is still down
+                self.backend.breaker.record_failure()
+            self._fail(TimeoutError(f"{self.backend.name} call exceeded its {self.backend.deadline:.0f}s deadline"))
+
+    def _fail(self, error: BaseException):
+        try:
+            self.future.set_exception(error)
+        except Exception:
+            pass
+
+
+class Backend:
+    """Resilience policy and state (latencies, hedge budget, breaker) of one cloud dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_quantile: float = 0.95,
+        hedge_budget: float = 0.1,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        workers: int = 16,
+        window: int = 200,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_quantile = hedge_quantile
+        self.hedge_budget = hedge_budget
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        # Runs attempt launches (RPCs) and blocking calls off the timer thread
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-call")
+        self.calls = 0
+        self.hedges = 0
+        self._latencies = deque(maxlen=window)  # seconds per unit of successful attempts
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds: float, units: float):
+        with self._lock:
+            self._latencies.append(seconds / units)
+
+    def hedge_delay(self, units: float) -> Optional[float]:
+        """Seconds after which an attempt of ``units`` is slower than the hedge quantile (None: no hedging)."""
+        if not self.hedge_budget:
+            return None
+        with self._lock:
+            if len(self._latencies) < MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_quantile))] * (units or 1.0)
+
+    def take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.hedge_budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def submit(self, start: Callable[[], Future], units: float = 0.0) -> Future:
+        """Run ``start()`` (one attempt, returning a Future) with deadline, hedging, retries and the breaker."""
+        call = _Call(self, start, units)
+        with self._lock:
+            self.calls += 1
+        _timers.call_later(self.deadline, call.expire)
+        call.launch()
+        return call.future
+
+    def call(self, fn: Callable, *args, units: float = 0.0, **kwargs):
+        """Run the blocking ``fn(*args, **kwargs)`` on the backend's threads and wait for the result."""
+        return self.submit(lambda: self.executor.submit(propagate(fn), *args, **kwargs), units).result()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str) -> Backend:
+    """Process-wide ``Backend`` configured from ``RESILIENCE_BACKENDS[name]``."""
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = Backend(name, **RESILIENCE_BACKENDS[name])
+        return _backends[name]
+
+
+def configure_backend(name: str, **options) -> Backend:
+    """Replace the process-wide backend ``name`` with one using ``options`` over the settings."""
+    with _backends_lock:
+        _backends[name] = Backend(name, **{**RESILIENCE_BACKENDS[name], **options})
+        return _backends[name]
@@ -0,0 +1,747 @@
+# services/rule_extraction.py
+"""
+Deterministic pre-extraction of simple survey fields before Gemini.
+
+``pre_extract(transcript, fields)`` splits the transcript into sentences,
+normalizes each one (Devanagari spelling variants, Devanagari digits, and
+Hindi/English number words such as "ढाई", "do lakh pachaas hazaar" or
+"forty five" turned into digits) and runs compiled patterns over it:
+
+- regex rules for ``age``, ``family_size``, ``land_size_acres``,
+  ``farming_experience_years``, ``annual_income`` and ``contact_number``,
+  most of them only next to a cue word ("उम्र", "parivar", ...) in the same
+  or the previous sentence (question and answer);
+- ``farmer_name`` and ``village`` from "मेरा नाम ... है" / "... गांव से";
+- gazetteer lookups (config/gazetteers.py, held in a token trie) for
+  ``village``, ``district``, ``state``, ``crops_grown`` and
+  ``irrigation_method``.
+
+Numbers in a clause that is negated ("2 acre zameen nahi hai"), about
+someone else ("mere pita ji 70 saal ke the") or, for income, about a loss or
+an expense ("2 lakh ka nuksan") are skipped. Every value comes with a
+confidence; different values for the same field lower it.
+``PreExtraction.resolved()`` returns the fields confident enough to skip the
+LLM, and ``relevant_transcript()`` the sentences that mention the
+remaining fields (with their neighbours), which is what Gemini then sees.
+"""
+import re
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.gazetteers import CROPS, DISTRICTS, IRRIGATION_METHODS, STATES, VILLAGES
+from config.settings import (
+    RULE_EXTRACTION_CONTEXT_SENTENCES,
+    RULE_EXTRACTION_MAX_KEPT_SHARE,
+    RULE_EXTRACTION_MIN_CONFIDENCE,
+    RULE_EXTRACTION_VILLAGES_FILE,
+)
+
+# ---------------------------------------------------------------------- normalization
+
+DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_WORD = r"[\w\u0900-\u0963\u0966-\u097F]"  # \w misses Devanagari vowel signs; the dandas are punctuation
+TOKEN_PATTERN = re.compile(rf"\d+(?:[.,]\d+)*|{_WORD}+|\S")
+SENTENCE_PATTERN = re.compile(r"(?:[^।॥?!.\n]|\.(?=\d))+[।॥?!.\n]*")
+DIGITS_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_script(text: str) -> str:
+    """Lowercase, ASCII digits, no nukta and anusvara for chandrabindu (ज़मीन -> जमीन, गाँव -> गांव)."""
+    text = unicodedata.normalize("NFC", text).translate(DEVANAGARI_DIGITS)
+    return text.replace("\u093c", "").replace("\u0901", "\u0902").lower()
+
+
+def spelling_key(token: str) -> str:
+    """Romanized Hindi spelled loosely ("paanch"/"panch", "gehoon"/"gehun") maps to one key."""
+    if not token.isascii():
+        return token
+    for long, short in (("aa", "a"), ("ee", "i"), ("oo", "u"), ("w", "v"), ("z", "j"), ("ph", "f")):
+        token = token.replace(long, short)
+    return re.sub(r"(.)\1+", r"\1", token)
+
+
+# ---------------------------------------------------------------------- numbers
+
+_DEVANAGARI_NUMBERS = (
+    "एक दो तीन चार पांच छह सात आठ नौ दस ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस बीस "
+    "इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस तीस इकतीस बत्तीस तैंतीस चौंतीस पैंतीस "
+    "छत्तीस सैंतीस अड़तीस उनतालीस चालीस इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस सैंतालीस अड़तालीस "
+    "उनचास पचास इक्यावन बावन तिरपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ साठ इकसठ बासठ तिरसठ चौंसठ पैंसठ "
+    "छियासठ सड़सठ अड़सठ उनहत्तर सत्तर इकहत्तर बहत्तर तिहत्तर चौहत्तर पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी "
+    "अस्सी इक्यासी बयासी तिरासी चौरासी पचासी छियासी सत्तासी अट्ठासी नवासी नब्बे इक्यानवे बानवे तिरानवे चौरानवे "
+    "पंचानवे छियानवे सत्तानवे अट्ठानवे निन्यानवे"
+).split()
+# Romanized 1-99; 60 ("saath") is left out, it mostly means "with"
+_ROMANIZED_NUMBERS = (
+    "ek do teen chaar paanch chhah saat aath nau das gyarah barah terah chaudah pandrah solah satrah atharah "
+    "unnees bees ikkees baees teis chaubees pachchees chhabbees sattaees atthaees unatees tees ikattees "
+    "battees taintees chauntees paintees chhattees saintees adtees untaalees chaalees iktaalees bayaalees "
+    "taintaalees chavaalees paintaalees chhiyaalees saintaalees adtaalees unchaas pachaas ikyaavan baavan "
+    "tirpan chauvan pachpan chhappan sattaavan atthaavan unsath - iksath baasath tirsath chaunsath painsath "
+    "chhiyaasath sadsath adsath unhattar sattar ikhattar bahattar tihattar chauhattar pachhattar chhihattar "
+    "sathattar athhattar unyaasi assi ikyaasi bayaasi tiraasi chauraasi pachaasi chhiyaasi sattaasi atthaasi "
+    "navaasi nabbe ikyaanve baanve tiraanve chauraanve pachaanve chhiyaanve sattaanve atthaanve ninyaanve"
+).split()
+_ENGLISH_NUMBERS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_OTHER_NUMBERS = {
+    "shunya": 0, "शून्य": 0, "छः": 6, "छे": 6, "chhe": 6, "char": 4,
+    "dedh": 1.5, "डेढ": 1.5, "dhai": 2.5, "ढाई": 2.5, "aadha": 0.5, "आधा": 0.5, "half": 0.5,
+}
+MULTIPLIERS = {
+    spelling_key(normalize_script(word)): value
+    for words, value in (
+        (("sau", "सौ", "hundred"), 100),
+        (("hazaar", "hajaar", "हजार", "thousand"), 1000),
+        (("lakh", "lac", "लाख"), 100000),
+        (("crore", "karod", "करोड"), 10**7),
+    )
+    for word in words
+}
+MODIFIERS = {
+    spelling_key(normalize_script(word)): value
+    for word, value in (("saadhe", 0.5), ("साढ़े", 0.5), ("sawa", 0.25), ("सवा", 0.25), ("paune", -0.25), ("पौने", -0.25))
+}
+NUMBER_WORDS: Dict[str, float] = {}
+for _value, _word in enumerate(_DEVANAGARI_NUMBERS, 1):
+    NUMBER_WORDS[normalize_script(_word)] = _value
+for _value, _word in enumerate(_ROMANIZED_NUMBERS, 1):
+    if _word != "-":
+        NUMBER_WORDS[spelling_key(_word)] = _value
+for _word, _value in {**_ENGLISH_NUMBERS, **_OTHER_NUMBERS}.items():
+    NUMBER_WORDS[spelling_key(normalize_script(_word))] = _value
+
+
+def _token_number(token: str) -> Optional[float]:
+    if DIGITS_PATTERN.fullmatch(token):
+        try:
+            return float(token.replace(",", ""))
+        except ValueError:
+            return None
+    return NUMBER_WORDS.get(spelling_key(token))
+
+
+def read_number(tokens: List[str], start: int) -> Optional[Tuple[float, int]]:
+    """The number spelled by ``tokens[start:end]`` and ``end``, or None if none starts there."""
+    total, current, modifier = 0.0, None, 0.0
+    previous_word = False
+    index = start
+    while index < len(tokens):
+        key = spelling_key(tokens[index])
+        if key in MODIFIERS and current is None and index + 1 < len(tokens) and _token_number(tokens[index + 1]) is not None:
+            modifier = MODIFIERS[key]
+            index += 1
+            continue
+        value = _token_number(tokens[index])
+        if value is not None:
+            is_word = not DIGITS_PATTERN.fullmatch(tokens[index])
+            if current is not None:
+                # "forty five"; anything else (spoken digits, "45 50") starts a new number
+                if not (previous_word and is_word and current % 10 == 0 and 0 < current < 100 and value < 10):
+                    break
+                current += value
+            else:
+                current = value + modifier
+                modifier = 0.0
+            previous_word = is_word
+            index += 1
+            continue
+        multiplier = MULTIPLIERS.get(key)
+        if multiplier:
+            base = 1 if current is None else current
+            if multiplier == 100:
+                current = base * 100
+            else:
+                total += base * multiplier
+                current = None
+            previous_word = False
+            index += 1
+            continue
+        break
+    if index == start:
+        return None
+    return total + (current or 0), index
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else f"{value:g}"
+
+
+# ---------------------------------------------------------------------- sentences
+
+class Sentence:
+    """One transcript sentence, tokenized, with number phrases turned into digits."""
+
+    def __init__(self, index: int, start: int, end: int, text: str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+        raw = [(match.group(), normalize_script(match.group())) for match in TOKEN_PATTERN.finditer(text)]
+        normalized = [token for _, token in raw]
+        self.tokens: List[str] = []
+        self.originals: List[str] = []
+        position = 0
+        while position < len(raw):
+            number = read_number(normalized, position)
+            if number:
+                value, end_position = number
+                self.tokens.append(_format_number(value))
+                self.originals.append(" ".join(original for original, _ in raw[position:end_position]))
+                position = end_position
+            else:
+                self.tokens.append(normalized[position])
+                self.originals.append(raw[position][0])
+                position += 1
+        self.normalized = " ".join(self.tokens)
+        self._offsets = []
+        offset = 0
+        for token in self.tokens:
+            self._offsets.append(offset)
+            offset += len(token) + 1
+
+    def original(self, start: int, end: int) -> str:
+        """Original text of the tokens covering ``normalized[start:end]``."""
+        indexes = [i for i, offset in enumerate(self._offsets) if start <= offset < end]
+        return " ".join(self.originals[i] for i in indexes)
+
+
+def split_sentences(transcript: str) -> List[Sentence]:
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(transcript):
+        if match.group().strip():
+            sentences.append(Sentence(len(sentences), match.start(), match.end(), match.group().strip()))
+    return sentences
+
+
+# ---------------------------------------------------------------------- gazetteers
+
+class Gazetteer:
+    """Multi-word names in a token trie; ``find`` returns the longest matches in a sentence."""
+
+    _END = object()
+
+    def __init__(self, entries: Dict[str, Iterable[str]]):
+        self._root: Dict = {}
+        for canonical, names in entries.items():
+            for name in list(names) + [canonical]:
+                node = self._root
+                for token in TOKEN_PATTERN.findall(normalize_script(name)):
+                    node = node.setdefault(spelling_key(token), {})
+                node[self._END] = canonical
+
+    def find(self, tokens: List[str]) -> List[Tuple[str, int, int]]:
+        """``(canonical, first token, end token)`` of every non-overlapping match, longest first."""
+        matches = []
+        position = 0
+        while position < len(tokens):
+            node, best = self._root, None
+            for index in range(position, len(tokens)):
+                node = node.get(spelling_key(tokens[index]))
+                if node is None:
+                    break
+                if self._END in node:
+                    best = (node[self._END], position, index + 1)
+            if best:
+                matches.append(best)
+                position = best[2]
+            else:
+                position += 1
+        return matches
+
+
+def _load_villages() -> Dict[str, List[str]]:
+    villages = {name: list(forms) for name, forms in VILLAGES.items()}
+    if RULE_EXTRACTION_VILLAGES_FILE:
+        try:
+            with open(RULE_EXTRACTION_VILLAGES_FILE, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        villages.setdefault(line.strip(), [])
+        except OSError as e:
+            print(f"Could not read village list {RULE_EXTRACTION_VILLAGES_FILE}: {e}")
+    return villages
+
+
+GAZETTEERS = {
+    "village": Gazetteer(_load_villages()),
+    "district": Gazetteer(DISTRICTS),
+    "state": Gazetteer(STATES),
+    "crops_grown": Gazetteer(CROPS),
+    "irrigation_method": Gazetteer(IRRIGATION_METHODS),
+}
+
+
+# ---------------------------------------------------------------------- cues
+
+def _words(*alternatives: str) -> str:
+    """Whole tokens of the normalized text."""
+    return r"(?<!\S)(?:" + "|".join(alternatives) + r")(?!\S)"
+
+
+def _stems(*alternatives: str) -> str:
+    """Tokens starting with one of the stems."""
+    return r"(?<!\S)(?:" + "|".join(alternatives) + r")"
+
+
+def _compile(pattern: str):
+    return re.compile(pattern, re.I)
+
+
+# What a sentence has to mention to be relevant to a field (also sent to Gemini for unresolved fields)
+CUES = {
+    "farmer_name": _compile(_words("naam", "nam", "name", "नाम")),
+    "village": _compile(_stems("gaon", "gaanv", "ganv", "gram", "village", "गांव", "गाव", "ग्राम")),
+    "district": _compile(_stems("jila", "zila", "jilla", "district", "जिला", "जिले", "जिल्ला")),
+    "state": _compile(_stems("rajya", "state", "pradesh", "राज्य", "प्रदेश")),
+    "age": _compile(
+        _words("umar", "umra", "umr", "age", "aayu", "उम्र", "उमर", "आयु", "old")
+        + "|" + _words("kitne", "कितने") + " " + _words("saal", "sal", "साल", "वर्ष") + " " + _words("ke", "के", "ki", "की")
+    ),
+    "gender": _compile(
+        _stems("mahila", "purush", "aurat", "female", "male", "महिला", "पुरुष", "औरत", "श्रीमती")
+        + "|" + _words("karta", "karti", "raha", "rahi", "करता", "करती", "रहा", "रही")
+        + r" " + _words("hoon", "hun", "hu", "हूं", "हू")
+    ),
+    "education": _compile(_stems(
+        "padh", "पढ", "shiksha", "शिक्षा", "school", "स्कूल", "class", "kaksha", "कक्षा", "paas", "पास",
+        "graduate", "degree", "अनपढ", "anpadh", "10th", "12th", "matric", "मैट्रिक",
+    )),
+    "family_size": _compile(_stems(
+        "parivar", "family", "bachche", "bacche", "परिवार", "बच्चे", "sadasya", "सदस्य", "member",
+    ) + "|" + _words("ghar", "घर") + " " + _words("me", "mein", "में")),
+    "land_size_acres": _compile(_stems(
+        "zameen", "jameen", "jamin", "land", "bhumi", "khet", "जमीन", "भूमि", "खेत",
+        "acre", "ekad", "एकड", "bigha", "बीघा", "hectare", "हेक्टेयर",
+    )),
+    "crops_grown": _compile(_stems(
+        "fasal", "फसल", "ugat", "ugaat", "उगा", "bote", "boy", "बोत", "बोया", "lagat", "लगात", "crop", "grow",
+    )),
+    "irrigation_method": _compile(_stems("sinchai", "सिंचाई", "irrigat", "paani", "pani", "पानी")),
+    "farming_experience_years": _compile(_stems(
+        "kheti", "खेती", "kisani", "किसानी", "farming", "anubhav", "अनुभव", "experience",
+    )),
+    "annual_income": _compile(_stems(
+        "aamdani", "amdani", "kamai", "income", "आमदनी", "कमाई", "kamat", "कमात", "munafa", "मुनाफा",
+    ) + "|" + _words("aay", "आय")),
+    "challenges_faced": _compile(_stems(
+        "samasya", "समस्या", "dikkat", "दिक्कत", "pareshan", "परेशान", "problem", "nuksan", "नुकसान",
+        "mushkil", "मुश्किल", "kami", "कमी", "challenge", "takleef", "तकलीफ",
+    )),
+    "government_schemes_used": _compile(_stems(
+        "yojana", "योजना", "scheme", "sarkari", "सरकारी", "subsid", "सब्सिडी", "kcc", "credit", "क्रेडिट",
+        "bima", "बीमा", "samman", "सम्मान", "anudan", "अनुदान",
+    )),
+    "technology_adoption": _compile(_stems(
+        "tractor", "ट्रैक्टर", "machine", "मशीन", "app", "ऐप", "mobile", "मोबाइल", "phone", "फोन",
+        "technolog", "तकनीक", "takneek", "drone", "ड्रोन", "internet", "youtube", "यूट्यूब", "smartphone",
+    )),
+    "market_access": _compile(_stems(
+        "mandi", "मंडी", "bazaar", "bazar", "बाजार", "market", "bech", "बेच", "vyapari", "व्यापारी",
+        "daam", "दाम", "bhav", "भाव", "msp", "kimat", "कीमत",
+    )),
+    "suggestions": _compile(_stems(
+        "sujhav", "सुझाव", "suggest", "chahiye", "चाहिए", "sarkar", "सरकार", "madad", "मदद", "salah", "सलाह",
+    )),
+    "contact_number": _compile(_stems(
+        "number", "नंबर", "mobile", "मोबाइल", "phone", "फोन", "contact", "संपर्क", "सम्पर्क",
+    )),
+}
+
+# The interviewer introducing themselves is not the farmer
+INTERVIEWER_CUE = _compile(_stems("singaji", "सिंगाजी", "sanstha", "संस्था", "survey", "सर्वे", "sarve"))
+STOPWORDS = {
+    normalize_script(word) for word in (
+        "mera mere meri hamara hamare humara apna apne aapka aapke is us ek ka ki ke ko se me mein main "
+        "hai hain tha the kya koi is the of my our your village gaon naam aap kis kaun kaunsa konsa kahan which "
+        "मेरा मेरे मेरी हमारा हमारे अपना अपने आपका आपके इस उस एक का की के को से में मैं है हैं था थे क्या कोई गांव नाम "
+        "आप किस कौन कौनसा कहां"
+    ).split()
+}
+
+_NUMBER = r"(?<!\S)(?P<value>\d+(?:\.\d+)?)"
+_YEARS = _words("saal", "sal", "varsh", "baras", "years?", "yrs", "साल", "वर्ष", "बरस")
+_TO_BE = _words("hoon", "hun", "hu", "हूं", "हू")
+# Plans and wishes ("तालाब बनवाना चाहिए") are not what the farmer has now
+WISH = _compile(_stems("chahiye", "चाहिए", "chahta", "chahti", "चाहता", "चाहती", "should", "want"))
+
+# Clause-level exclusions of numeric values
+CLAUSE_BREAK = _compile(r" (?:[,;:]|" + _words("lekin", "magar", "but", "aur", "and", "लेकिन", "मगर", "और") + ")(?= )")
+NEGATION = _compile(_words("nahi", "nahin", "nai", "not", "never", "नहीं", "नही"))
+# Someone else's age, land or income ("मेरे पिताजी", "bhai ke paas", "unki umar")
+OTHER_PERSON = _compile(
+    _stems("pita", "पिता", "bete", "beta", "beti", "बेट", "bhai", "भाई", "behen", "bahan", "बहन", "chacha", "चाचा",
+           "dada", "दादा", "dadi", "दादी", "nana", "नाना", "nani", "नानी", "patni", "पत्नी", "father", "mother",
+           "brother", "sister", "daughter", "husband", "uncle", "neighbo", "padosi", "पड़ोसी", "पडोसी")
+    + "|" + _words("maa", "mata", "मां", "माता", "papa", "पापा", "baap", "बाप", "pati", "पति", "son", "sons",
+                   "wife", "unki", "unke", "unka", "उनकी", "उनके", "उनका", "uski", "uske", "uska", "उसकी", "उसके", "उसका")
+)
+LOSS = _compile(_stems(
+    "nuksan", "nuksaan", "नुकसान", "ghata", "घाटा", "kharch", "खर्च", "loss", "expens", "karj", "karz", "कर्ज",
+    "loan", "लोन", "udhar", "उधार", "byaj", "ब्याज", "cost",
+) + "|" + _words("lagat", "लागत"))
+EXCLUSIONS = {
+    "age": (NEGATION, OTHER_PERSON),
+    "family_size": (NEGATION,),
+    "land_size_acres": (NEGATION, OTHER_PERSON),
+    "farming_experience_years": (NEGATION, OTHER_PERSON),
+    "annual_income": (NEGATION, OTHER_PERSON, LOSS),
+    "contact_number": (NEGATION,),
+}
+
+
+# ---------------------------------------------------------------------- rules
+
+@dataclass
+class Candidate:
+    value: Any
+    confidence: float
+    rule: str
+    sentence: int
+
+
+@dataclass
+class FieldValue:
+    """A field filled by the rules, with the sentences it came from."""
+
+    value: Any
+    confidence: float
+    rule: str
+    sentences: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """A value pattern; ``cue`` (same or previous sentence) raises its confidence to ``with_cue``."""
+
+    field_name: str
+    rule: str
+    pattern: Any
+    parse: Callable[[re.Match], Optional[Tuple[Any, float]]]
+    with_cue: float
+    without_cue: float = 0.0
+    cue: Any = None
+
+
+def _int_between(low, high):
+    def parse(match):
+        value = float(match.group("value"))
+        return (int(value), 1.0) if low <= value <= high and value == int(value) else None
+    return parse
+
+
+def _land(match):
+    value = float(match.group("value"))
+    unit = spelling_key(match.group("unit").lower())
+    if unit.startswith(("hectare", "हेक्टेयर")):
+        value, factor = value * 2.471, 1.0
+    elif unit.startswith(("bigh", "बीघ")):
+        value, factor = value * 0.625, 0.7  # the size of a bigha varies by region
+    else:
+        factor = 1.0
+    return (round(value, 2) if value != int(value) else int(value), factor) if 0 < value <= 1000 else None
+
+
+def _phone(match):
+    return re.sub(r"\D", "", match.group("value")), 1.0
+
+
+RULES = [
+    FieldRule(
+        "age", "age_first_person",
+        _compile(rf"{_NUMBER} {_YEARS} {_words('ka', 'ki', 'का', 'की', 'ke', 'के')} {_TO_BE}"),
+        _int_between(14, 100), with_cue=0.95, without_cue=0.9, cue=CUES["age"],
+    ),
+    FieldRule(
+        "age", "age_cue",
+        _compile(rf"{_NUMBER} {_YEARS}(?! (?:se|से|pahle|pehle|पहले|ka anubhav|का अनुभव|from)(?!\S))"),
+        _int_between(14, 100), with_cue=0.9, cue=CUES["age"],
+    ),
+    FieldRule(
+        "age", "age_years_old",
+        _compile(rf"{_NUMBER} {_YEARS} old"),
+        _int_between(14, 100), with_cue=0.95, without_cue=0.95,
+    ),
+    FieldRule(
+        "age", "age_is",
+        _compile(rf"{_words('age', 'umar', 'umra', 'उम्र', 'उमर')} {_words('is', 'hai', 'है')}? ?{_NUMBER}"),
+        _int_between(14, 100), with_cue=0.9, without_cue=0.9, cue=CUES["age"],
+    ),
+    FieldRule(
+        "family_size", "family_members",
+        _compile(rf"{_NUMBER} {_words('log', 'logon', 'sadasya', 'members?', 'people', 'लोग', 'सदस्य', 'जन')}"),
+        _int_between(1, 30), with_cue=0.9, cue=CUES["family_size"],
+    ),
+    FieldRule(
+        "land_size_acres", "land_unit",
+        _compile(
+            rf"{_NUMBER} (?P<unit>{_words('acres?', 'ekad', 'ekar', 'एकड', 'hectares?', 'हेक्टेयर', 'bighe', 'bigha', 'बीघा', 'बीघे')})"
+        ),
+        _land, with_cue=0.92, without_cue=0.85, cue=CUES["land_size_acres"],
+    ),
+    FieldRule(
+        "contact_number", "mobile_number",
+        _compile(r"(?<!\d)(?:\+ ?)?(?:91 ?)?(?P<value>[6-9](?: ?\d){9})(?!\d)"),
+        _phone, with_cue=0.97, without_cue=0.9, cue=CUES["contact_number"],
+    ),
+    FieldRule(
+        "farming_experience_years", "years_since",
+        _compile(rf"{_NUMBER} {_YEARS} {_words('se', 'से', 'from')}"),
+        _int_between(0, 80), with_cue=0.9, cue=CUES["farming_experience_years"],
+    ),
+    FieldRule(
+        "farming_experience_years", "for_years",
+        _compile(rf"{_words('for', 'pichhle', 'पिछले')} {_NUMBER} {_YEARS}"),
+        _int_between(0, 80), with_cue=0.9, cue=CUES["farming_experience_years"],
+    ),
+    FieldRule(
+        "farming_experience_years", "years_of_experience",
+        _compile(rf"{_NUMBER} {_YEARS} {_words('ka', 'का', 'of')}? ?{_words('anubhav', 'अनुभव', 'experience')}"),
+        _int_between(0, 80), with_cue=0.9, without_cue=0.9, cue=CUES["farming_experience_years"],
+    ),
+]
+
+INCOME_NUMBER = _compile(
+    rf"{_NUMBER}(?! (?:{_YEARS}|{_stems('acre', 'ekad', 'एकड', 'bigh', 'बीघ', 'quintal', 'क्विंटल', 'kilo', 'किलो', 'kg', 'log', 'लोग', 'sadasya', 'सदस्य')}))"
+)
+MONTHLY = _compile(_stems("mahin", "महीन", "month", "मासिक"))
+YEARLY = _compile(_stems("saal", "sal", "साल", "salana", "सालाना", "varshik", "वार्षिक", "annual", "year"))
+NAME_PATTERN = _compile(
+    rf"{_words('mera', 'my', 'मेरा')} {_words('naam', 'nam', 'name', 'नाम')} (?:{_words('is', 'hai', 'है')} )?"
+    r"(?P<value>[^\s\d.,।?!]+(?: [^\s\d.,।?!]+){0,2}?)(?= (?:hai|है|h|and|aur|और)(?!\S)| [.,।?!]|$)"
+)
+_VILLAGE_WORD = r"(?:gaon|gaanv|ganv|gram|village|गांव|गाव|ग्राम)"
+VILLAGE_PATTERNS = (
+    _compile(
+        rf"(?<!\S){_VILLAGE_WORD} (?:(?:ka|का) (?:naam|नाम) |name is |is )?(?:(?:hai|है) )?(?P<value>[^\s\d.,।?!]+)"
+    ),
+    _compile(
+        rf"(?<!\S)(?P<value>[^\s\d.,।?!]+) {_VILLAGE_WORD} "
+        r"(?:se|से|mein|में|me|ka|का|ki|की|ke|के|main|rehte|रहते|hai|है|[.,।?!])(?!\S)"
+    ),
+)
+IRRIGATION_CUE = _compile(
+    _stems("sinchai", "सिंचाई", "irrigat", "साधन", "sadhan") + "|" + _words("paani", "pani", "पानी") + " " + _stems("dete", "देते", "lagate", "लगाते")
+)
+
+
+class PreExtraction:
+    """Rule results for one transcript."""
+
+    def __init__(self, sentences: List[Sentence], fields: Dict[str, FieldValue], transcript: str):
+        self.sentences = sentences
+        self.fields = fields
+        self.transcript = transcript
+
+    def resolved(self, min_confidence: float = RULE_EXTRACTION_MIN_CONFIDENCE) -> Dict[str, FieldValue]:
+        return {name: value for name, value in self.fields.items() if value.confidence >= min_confidence}
+
+    def relevant_transcript(
+        self,
+        fields: Iterable[str],
+        context: int = RULE_EXTRACTION_CONTEXT_SENTENCES,
+        max_share: float = RULE_EXTRACTION_MAX_KEPT_SHARE,
+    ) -> str:
+        """
+        The sentences that mention any of ``fields``, each with ``context`` neighbours.
+
+        Falls back to the whole transcript when a field has no cue words (a
+        custom schema) or the selection would keep more than ``max_share``.
+        """
+        fields = list(fields)
+        if not fields:
+            return ""
+        if any(name not in CUES for name in fields):
+            return self.transcript
+        keep = set()
+        for sentence in self.sentences:
+            relevant = any(CUES[name].search(sentence.normalized) for name in fields)
+            relevant = relevant or any(sentence.index in self.fields[name].sentences for name in fields if name in self.fields)
+            if relevant:
+                keep.update(range(sentence.index - context, sentence.index + context + 1))
+        kept = [sentence.text for sentence in self.sentences if sentence.index in keep]
+        selected = " ".join(kept)
+        if len(selected) > max_share * len(self.transcript):
+            return self.transcript
+        return selected
+
+
+def _cue_confidence(sentences: List[Sentence], index: int, cue, with_cue: float, without_cue: float) -> float:
+    if cue is None:
+        return without_cue
+    if cue.search(sentences[index].normalized):
+        return with_cue
+    if index and cue.search(sentences[index - 1].normalized):
+        return with_cue - 0.05  # the question was asked in the previous sentence
+    return without_cue
+
+
+def _clause(text: str, start: int, end: int) -> str:
+    """The part of ``text`` around ``text[start:end]`` between commas and conjunctions."""
+    clause_start = max((match.end() for match in CLAUSE_BREAK.finditer(text, 0, start)), default=0)
+    clause_end = next((match.start() for match in CLAUSE_BREAK.finditer(text, end)), len(text))
+    return text[clause_start:clause_end]
+
+
+def _excluded(field_name: str, sentence: Sentence, match: re.Match) -> bool:
+    """Whether the value is negated, someone else's or (income) a loss, judged on its clause."""
+    clause = _clause(sentence.normalized, match.start(), match.end())
+    return any(pattern.search(clause) for pattern in EXCLUSIONS.get(field_name, ()))
+
+
+def _aggregate(candidates: List[Candidate]) -> Optional[FieldValue]:
+    """One value per field: agreeing mentions add confidence, conflicting values take it away."""
+    if not candidates:
+        return None
+    groups: Dict[str, List[Candidate]] = {}
+    for candidate in candidates:
+        groups.setdefault(str(candidate.value).casefold(), []).append(candidate)
+    ranked = sorted(groups.values(), key=lambda group: (max(c.confidence for c in group), len(group)), reverse=True)
+    best = ranked[0]
+    top = max(best, key=lambda candidate: candidate.confidence)
+    confidence = min(0.99, top.confidence + 0.03 * (len(best) - 1))
+    rule = top.rule
+    if len(ranked) > 1:
+        confidence *= 0.6
+        rule += "+conflict"
+    return FieldValue(top.value, round(confidence, 3), rule, sorted({c.sentence for c in candidates}))
+
+
+def _gazetteer_list(sentences, gazetteer, cue, with_cue, without_cue) -> Optional[FieldValue]:
+    """
+    The distinct gazetteer names mentioned next to a cue ("हम गेहूं उगाते हैं").
+
+    Names that only come up elsewhere ("बारिश कम हुई") count just when there
+    is no cued mention at all, and then with ``without_cue`` confidence.
+    Wishes ("तालाब बनवाना चाहिए") are skipped.
+    """
+    mentions = []
+    for sentence in sentences:
+        if WISH.search(sentence.normalized):
+            continue
+        for canonical, _, _ in gazetteer.find(sentence.tokens):
+            cued = _cue_confidence(sentences, sentence.index, cue, with_cue, 0.0)
+            mentions.append((canonical, cued, sentence.index))
+    if not mentions:
+        return None
+    cued = [mention for mention in mentions if mention[1]]
+    selected = cued or mentions
+    values = list(dict.fromkeys(canonical for canonical, _, _ in selected))
+    confidence = min(confidence for _, confidence, _ in cued) if cued else without_cue
+    return FieldValue(values, round(confidence, 3), "gazetteer", sorted({index for _, _, index in selected}))
+
+
+def _extract_income(sentences) -> List[Candidate]:
+    candidates = []
+    for sentence in sentences:
+        base = _cue_confidence(sentences, sentence.index, CUES["annual_income"], 0.9, 0.0)
+        if not base:
+            continue
+        window = sentence.normalized if not sentence.index else f"{sentences[sentence.index - 1].normalized} {sentence.normalized}"
+        for match in INCOME_NUMBER.finditer(sentence.normalized):
+            value = float(match.group("value"))
+            if value < 1000 or 1900 <= value <= 2100 or value >= 1e9:  # not an income, a year or a phone number
+                continue
+            if _excluded("annual_income", sentence, match):
+                continue
+            if MONTHLY.search(window):
+                candidates.append(Candidate(int(value * 12), base * 0.75, "income_monthly", sentence.index))
+            elif YEARLY.search(window):
+                candidates.append(Candidate(int(value), base, "income_yearly", sentence.index))
+            else:
+                candidates.append(Candidate(int(value), base * 0.85, "income", sentence.index))
+    return candidates
+
+
+def _extract_name(sentences) -> List[Candidate]:
+    candidates = []
+    for sentence in sentences:
+        if INTERVIEWER_CUE.search(sentence.normalized):
+            continue
+        for match in NAME_PATTERN.finditer(sentence.normalized):
+            if any(token in STOPWORDS for token in match.group("value").split()):
+                continue
+            name = sentence.original(match.start("value"), match.end("value")).title()
+            candidates.append(Candidate(name, 0.9, "my_name_is", sentence.index))
+    return candidates
+
+
+def _extract_village(sentences) -> List[Candidate]:
+    gazetteer = GAZETTEERS["village"]
+    candidates = []
+    for sentence in sentences:
+        known = {sentence.tokens[first]: canonical for canonical, first, end in gazetteer.find(sentence.tokens) if end == first + 1}
+        for pattern in VILLAGE_PATTERNS:
+            for match in pattern.finditer(sentence.normalized):
+                token = match.group("value")
+                if token in STOPWORDS or token in NUMBER_WORDS:
+                    continue
+                if token in known:
+                    candidates.append(Candidate(known[token], 0.95, "village_gazetteer", sentence.index))
+                else:
+                    name = sentence.original(match.start("value"), match.end("value")).title()
+                    candidates.append(Candidate(name, 0.85, "village_pattern", sentence.index))
+        # "Which village?" - "Piplod."
+        if not candidates or candidates[-1].sentence != sentence.index:
+            for canonical, _, _ in gazetteer.find(sentence.tokens):
+                confidence = _cue_confidence(sentences, sentence.index, CUES["village"], 0.9, 0.6)
+                candidates.append(Candidate(canonical, confidence, "village_gazetteer", sentence.index))
+    return candidates
+
+
+def _extract_place(sentences, name, with_cue, without_cue) -> List[Candidate]:
+    candidates = []
+    for sentence in sentences:
+        for canonical, _, _ in GAZETTEERS[name].find(sentence.tokens):
+            confidence = _cue_confidence(sentences, sentence.index, CUES[name], with_cue, without_cue)
+            candidates.append(Candidate(canonical, confidence, f"{name}_gazetteer", sentence.index))
+    return candidates
+
+
+def pre_extract(transcript: str, fields: Iterable[str]) -> PreExtraction:
+    """Fill what the rules can of ``fields`` (schema keys; unknown keys are left alone)."""
+    fields = set(fields)
+    sentences = split_sentences(transcript)
+    candidates: Dict[str, List[Candidate]] = {}
+    for rule in RULES:
+        if rule.field_name not in fields:
+            continue
+        for sentence in sentences:
+            for match in rule.pattern.finditer(sentence.normalized):
+                parsed = rule.parse(match)
+                confidence = _cue_confidence(sentences, sentence.index, rule.cue, rule.with_cue, rule.without_cue)
+                if parsed and confidence and not _excluded(rule.field_name, sentence, match):
+                    value, factor = parsed
+                    candidates.setdefault(rule.field_name, []).append(
+                        Candidate(value, confidence * factor, rule.rule, sentence.index)
+                    )
+    if "annual_income" in fields:
+        candidates["annual_income"] = _extract_income(sentences)
+    if "farmer_name" in fields:
+        candidates["farmer_name"] = _extract_name(sentences)
+    if "village" in fields:
+        candidates["village"] = _extract_village(sentences)
+    if "district" in fields:
+        candidates["district"] = _extract_place(sentences, "district", 0.92, 0.65)
+    if "state" in fields:
+        candidates["state"] = _extract_place(sentences, "state", 0.92, 0.82)
+
+    results = {name: value for name, value in ((name, _aggregate(items)) for name, items in candidates.items()) if value}
+    if "crops_grown" in fields:
+        crops = _gazetteer_list(sentences, GAZETTEERS["crops_grown"], CUES["crops_grown"], 0.88, 0.7)
+        if crops:
+            results["crops_grown"] = crops
+    if "irrigation_method" in fields:
+        irrigation = _gazetteer_list(sentences, GAZETTEERS["irrigation_method"], IRRIGATION_CUE, 0.85, 0.6)
+        if irrigation:
+            irrigation.value = ", ".join(irrigation.value)
+            results["irrigation_method"] = irrigation
+    return PreExtraction(sentences, results, transcript)
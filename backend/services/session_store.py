@@ -0,0 +1,324 @@
+# services/session_store.py
+"""
+Shared record of live sessions, so another worker can take one over.
+
+A Speech stream cannot move between processes, but everything needed to
+continue a session can: its finalized transcript, language and capture id.
+The owning worker refreshes a heartbeat while it streams; when it dies (or
+the client disconnects) another worker may claim the session and open a
+new recognizer stream that continues the same transcript.
+
+``LIVE_SESSION_STORE`` selects the backend: a ``redis://`` URL (needs the
+optional ``redis`` package) for multi-node deployments, or a directory on
+a shared filesystem (the default, enough for several local workers).
+
+The record (owner, heartbeat, status...) and the finals are stored apart:
+each final is appended once (``append_final``), so saving a heartbeat does
+not rewrite the whole transcript. ``claim`` is a compare-and-set: of several
+workers claiming the same session at once, only one gets it. Heartbeats go
+through ``save_owned``, which only writes while the worker still owns the
+session, so a stale former owner cannot undo a take-over.
+
+Sessions are kept for ``LIVE_SESSION_RETENTION_HOURS`` after their last
+heartbeat (stopped ones only for the lease); ``maybe_prune_sessions`` removes
+older file records at most once an hour, Redis keys expire on their own.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config.settings import (
+    LIVE_SESSION_LEASE_SECONDS,
+    LIVE_SESSION_RETENTION_HOURS,
+    LIVE_SESSION_STORE,
+    WORKER_ID,
+)
+
+LOCK_STALE_SECONDS = 10  # a claim lock older than this was left by a dead worker
+LOCK_TIMEOUT_SECONDS = 5
+
+
+def _claimable(record: Optional[Dict], worker_id: str) -> bool:
+    """Whether ``worker_id`` may take the session: it is not stopped nor owned by another live worker."""
+    if record is None or record["status"] == "stopped":
+        return False
+    owner_alive = time.time() - record["heartbeat"] < LIVE_SESSION_LEASE_SECONDS
+    return not (record["owner"] not in (None, worker_id) and record["status"] == "streaming" and owner_alive)
+
+
+def _owned(current: Optional[Dict], worker_id: str) -> bool:
+    """Whether ``worker_id`` may write the record: it is new or still owned by that worker."""
+    return current is None or current["owner"] == worker_id
+
+
+def _expired(record: Dict, max_age_seconds: float) -> bool:
+    age = time.time() - record["heartbeat"]
+    return age > max_age_seconds or (record["status"] == "stopped" and age > LIVE_SESSION_LEASE_SECONDS)
+
+
+def _finals(entries: List[Dict]) -> List[str]:
+    """Final texts in sequence order; an entry appended twice (hand-off) counts once."""
+    return [text for _, text in sorted({entry["seq"]: entry["text"] for entry in entries}.items())]
+
+
+class FileSessionStore:
+    """One JSON file per session in a directory shared by the workers, plus a JSONL log of its finals."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def _finals_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.finals.jsonl")
+
+    def _read(self, session_id: str) -> Optional[Dict]:
+        """The record without its finals."""
+        try:
+            with open(self._path(session_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        record = self._read(session_id)
+        if record is None:
+            return None
+        entries = []
+        try:
+            with open(self._finals_path(session_id), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # torn last line of a crashed worker
+        except FileNotFoundError:
+            pass
+        record["finals"] = _finals(entries)
+        return record
+
+    def save(self, record: Dict):
+        path = self._path(record["session_id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({key: value for key, value in record.items() if key != "finals"}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)  # atomic, readers never see half a record
+
+    def append_final(self, session_id: str, seq: int, text: str):
+        line = json.dumps({"seq": seq, "text": text}, ensure_ascii=False)
+        with open(self._finals_path(session_id), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    @contextmanager
+    def _lock(self, session_id: str):
+        """Exclusive lock file (O_EXCL works on shared filesystems too); stale locks are broken."""
+        path = f"{self._path(session_id)}.lock"
+        deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Live session {session_id} is locked")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def claim(self, session_id: str, worker_id: str) -> Optional[Dict]:
+        with self._lock(session_id):
+            record = self.load(session_id)
+            if not _claimable(record, worker_id):
+                return None
+            record.update(owner=worker_id, heartbeat=time.time(), status="streaming")
+            self.save(record)
+            return record
+
+    def save_owned(self, record: Dict, worker_id: str) -> bool:
+        with self._lock(record["session_id"]):
+            if not _owned(self._read(record["session_id"]), worker_id):
+                return False
+            self.save(record)
+            return True
+
+    def delete(self, session_id: str):
+        for path in (self._path(session_id), self._finals_path(session_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete expired sessions and orphaned finals logs; returns how many sessions were removed."""
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            session_id = name[: -len(".json")]
+            record = self._read(session_id)
+            if record is None or not _expired(record, max_age_seconds):
+                continue
+            try:
+                with self._lock(session_id):
+                    # Re-read under the lock: a worker may have claimed it meanwhile
+                    record = self._read(session_id)
+                    if record is not None and _expired(record, max_age_seconds):
+                        self.delete(session_id)
+                        removed += 1
+            except TimeoutError:
+                continue
+        cutoff = time.time() - max_age_seconds
+        for name in os.listdir(self.directory):
+            if not name.endswith(".finals.jsonl"):
+                continue
+            session_id = name[: -len(".finals.jsonl")]
+            path = os.path.join(self.directory, name)
+            try:
+                if not os.path.exists(self._path(session_id)) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+        return removed
+
+
+class RedisSessionStore:
+    """Session records and final lists as Redis keys that expire after the retention period."""
+
+    def __init__(self, url: str, ttl_seconds: int = int(LIVE_SESSION_RETENTION_HOURS * 3600)):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        value = self.redis.get(f"live-session:{session_id}")
+        if not value:
+            return None
+        record = json.loads(value)
+        entries = self.redis.lrange(f"live-session:{session_id}:finals", 0, -1)
+        record["finals"] = _finals([json.loads(entry) for entry in entries])
+        return record
+
+    def save(self, record: Dict, pipe=None):
+        (pipe or self.redis).set(
+            f"live-session:{record['session_id']}",
+            json.dumps({key: value for key, value in record.items() if key != "finals"}, ensure_ascii=False),
+            ex=self.ttl_seconds,
+        )
+
+    def append_final(self, session_id: str, seq: int, text: str):
+        key = f"live-session:{session_id}:finals"
+        with self.redis.pipeline() as pipe:
+            pipe.rpush(key, json.dumps({"seq": seq, "text": text}, ensure_ascii=False))
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+
+    def claim(self, session_id: str, worker_id: str) -> Optional[Dict]:
+        import redis
+
+        key = f"live-session:{session_id}"
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)  # the SET below fails if another worker changed the record meanwhile
+                    record = self.load(session_id)
+                    if not _claimable(record, worker_id):
+                        pipe.unwatch()
+                        return None
+                    record.update(owner=worker_id, heartbeat=time.time(), status="streaming")
+                    pipe.multi()
+                    self.save(record, pipe)
+                    pipe.execute()
+                    return record
+                except redis.WatchError:
+                    continue
+
+    def save_owned(self, record: Dict, worker_id: str) -> bool:
+        import redis
+
+        key = f"live-session:{record['session_id']}"
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if not _owned(json.loads(value) if value else None, worker_id):
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    self.save(record, pipe)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def delete(self, session_id: str):
+        self.redis.delete(f"live-session:{session_id}", f"live-session:{session_id}:finals")
+
+    def prune(self, max_age_seconds: float) -> int:
+        return 0  # keys expire after ``ttl_seconds``
+
+
+def new_record(session_id: str, language_code: str) -> Dict:
+    return {
+        "session_id": session_id,
+        "owner": WORKER_ID,
+        "heartbeat": time.time(),
+        "language_code": language_code,
+        "finals": [],
+        "capture_ids": [],
+        "status": "streaming",
+    }
+
+
+def claim(store, session_id: str, worker_id: str = WORKER_ID) -> Optional[Dict]:
+    """
+    Take ownership of a session for ``worker_id``.
+
+    Returns the record, or None when the session is unknown, stopped, still
+    owned by a live worker (heartbeat younger than
+    ``LIVE_SESSION_LEASE_SECONDS``) or claimed by another worker first.
+    """
+    return store.claim(session_id, worker_id)
+
+
+_store = None
+_pruned_at = 0.0
+_prune_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide store selected by ``LIVE_SESSION_STORE``."""
+    global _store
+    if _store is None:
+        if LIVE_SESSION_STORE.startswith(("redis://", "rediss://")):
+            _store = RedisSessionStore(LIVE_SESSION_STORE)
+        else:
+            _store = FileSessionStore(LIVE_SESSION_STORE)
+    return _store
+
+
+def maybe_prune_sessions() -> int:
+    """Prune expired sessions at most once an hour; cheap to call on every session start."""
+    global _pruned_at
+    with _prune_lock:
+        if time.time() - _pruned_at <= 3600:
+            return 0
+        _pruned_at = time.time()
+    return get_session_store().prune(LIVE_SESSION_RETENTION_HOURS * 3600)
@@ -0,0 +1,146 @@
+# services/stream_rollover.py
+"""
+Bookkeeping for rotating Speech-to-Text streams before the duration cap.
+
+Google closes a ``streaming_recognize`` call after roughly five minutes. To
+keep long interviews going, the live service opens a new stream shortly
+before that limit, replays the audio tail that has not produced a final
+result yet, and drops the results the new stream repeats.
+
+All timestamps are seconds on the session's audio timeline, approximated
+by the arrival time of each chunk (live audio arrives in real time).
+"""
+import time
+from collections import deque
+from typing import List, Optional
+
+from config.settings import STREAM_REPLAY_SECONDS, STREAMING_LIMIT_SECONDS
+
+# Longest repeated word run removed from the start of a replayed final
+MAX_OVERLAP_WORDS = 12
+
+
+def duration_seconds(value) -> float:
+    """Seconds from a protobuf Duration / timedelta / number."""
+    if value is None:
+        return 0.0
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    if hasattr(value, "seconds"):
+        return value.seconds + getattr(value, "nanos", 0) / 1e9
+    return float(value)
+
+
+def is_stream_limit_error(error: Exception) -> bool:
+    """True when Speech ended the stream because it ran too long."""
+    message = str(error).lower()
+    return type(error).__name__ == "OutOfRange" or "maximum allowed stream duration" in message
+
+
+def strip_overlap(previous: str, current: str, max_words: int = MAX_OVERLAP_WORDS) -> str:
+    """Remove words at the start of ``current`` that repeat the end of ``previous``."""
+    previous_words = previous.split()
+    current_words = current.split()
+    for size in range(min(max_words, len(previous_words), len(current_words)), 0, -1):
+        if previous_words[-size:] == current_words[:size]:
+            return " ".join(current_words[size:])
+    return current
+
+
+class StreamRollover:
+    """Tracks sent audio, stream ages and finalized results for one live session."""
+
+    def __init__(
+        self,
+        limit_seconds: float = STREAMING_LIMIT_SECONDS,
+        replay_seconds: float = STREAM_REPLAY_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.limit_seconds = limit_seconds
+        self.replay_seconds = replay_seconds
+        self.clock = clock
+
+        self.session_start = clock()
+        self.header: Optional[bytes] = None  # WebM init segment; needed by every stream
+        self.sent = deque()  # (audio_time, chunk) still eligible for replay
+        self.stream_started_at = None
+        self.stream_origin = 0.0  # audio time that the current stream calls 0
+        self.stream_count = 0
+        self.last_final_end = 0.0
+        self.last_final_text = ""
+        self.rotation_requested = False
+        self.replaying = False  # True until a rotated stream produces its first final
+
+    def now(self) -> float:
+        return self.clock() - self.session_start
+
+    def record_chunk(self, chunk: bytes) -> float:
+        """Remember a chunk that is about to be sent; returns its audio time."""
+        audio_time = self.now()
+        if self.header is None:
+            self.header = chunk
+        else:
+            self.sent.append((audio_time, chunk))
+        horizon = audio_time - self.replay_seconds - 1.0
+        while self.sent and self.sent[0][0] < horizon:
+            self.sent.popleft()
+        return audio_time
+
+    def seconds_until_rotation(self) -> float:
+        if self.stream_started_at is None:
+            return self.limit_seconds
+        return max(0.0, self.limit_seconds - (self.clock() - self.stream_started_at))
+
+    def should_rotate(self) -> bool:
+        if self.stream_started_at is None:
+            return False
+        if self.clock() - self.stream_started_at >= self.limit_seconds:
+            self.rotation_requested = True
+        return self.rotation_requested
+
+    def restart(self):
+        """Audio was dropped: rotate now, without replaying audio from before the gap."""
+        self.sent.clear()
+        self.rotation_requested = True
+
+    def begin_stream(self) -> List[bytes]:
+        """Start a new stream; returns the chunks to replay into it."""
+        self.stream_count += 1
+        self.stream_started_at = self.clock()
+        self.rotation_requested = False
+        self.replaying = self.stream_count > 1
+
+        if self.header is None:
+            self.stream_origin = self.now()
+            return []
+
+        # Replay whatever has not been finalized, but at most replay_seconds
+        replay_from = max(self.last_final_end, self.now() - self.replay_seconds)
+        replay = [chunk for audio_time, chunk in self.sent if audio_time >= replay_from]
+        first_time = next(
+            (audio_time for audio_time, _ in self.sent if audio_time >= replay_from), self.now()
+        )
+        self.stream_origin = first_time if self.stream_count > 1 else 0.0
+        return [self.header] + replay
+
+    def accept_result(self, text: str, result_end, is_final: bool) -> Optional[str]:
+        """
+        Filter a recognition result from the current stream.
+
+        Returns the text to deliver, or None when the result only repeats
+        audio that an earlier stream already finalized.
+        """
+        end_time = self.stream_origin + duration_seconds(result_end)
+        if self.replaying:
+            if end_time <= self.last_final_end:
+                return None
+            if self.last_final_text:
+                text = strip_overlap(self.last_final_text, text)
+        if not text.strip():
+            return None
+
+        if is_final:
+            self.last_final_end = max(self.last_final_end, end_time)
+            self.last_final_text = text
+            self.replaying = False
+        return text
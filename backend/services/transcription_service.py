@@ -1,4 +1,5 @@
 # services/transcription_service.py
+import itertools
 import os
 import time
 import uuid
@@ -6,11 +7,63 @@ import soundfile as sf
 import numpy as np
 from io import BytesIO
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from google.cloud import speech
 from google.cloud import storage
+from google.api_core import operation as api_operation
 from google.api_core.client_options import ClientOptions  # noqa: F401
-from typing import Optional
-from config.settings import get_service_account_credentials
+from typing import Dict, List, Optional
+from config.settings import (
+    AUDIO_PASSTHROUGH,
+    CHUNK_DURATION_SECONDS,
+    DEFAULT_PREPROCESSING_CHAIN,
+    DIARIZATION_MAX_SPEAKERS,
+    DIARIZATION_MIN_SPEAKERS,
+    JOB_CHECKPOINTS_ENABLED,
+    REFINE_CONFIDENCE_THRESHOLD,
+    REFINE_MODEL,
+    REFINE_USE_ENHANCED,
+    STREAM_DECODE,
+    TRANSCODE_SAMPLE_RATE,
+    get_service_account_credentials,
+)
+from services.diarization import SpeakerTurn, reconcile_speakers, turns_from_response
+from services.job_checkpoint import JobCheckpoint, audio_hash, job_key, open_checkpoint
+from services.operation_poller import get_operation_poller
+from services.refinement import (
+    TranscriptSegment,
+    low_confidence_spans,
+    segments_from_response,
+    splice_segments,
+    transcript_from_segments,
+)
+from services.resilience import get_backend, is_retryable
+from services.work_scheduler import get_work_scheduler
+from utils.audio_preprocessing import downmix_and_measure, measure
+from utils.audio_probe import probe_passthrough, wav_chunk_readers
+from utils.metrics import AUDIO_BYTES, CHUNKS, INFLIGHT_JOBS, timed
+from utils.preprocessing_chain import build_preprocessing_chain
+from utils.tracing import propagate, span
+from utils.transcoding import UnsupportedAudioFormat, get_transcoding_pool, needs_ffmpeg
+
+
+@dataclass
+class TranscriptionResult:
+    """
+    What one ``transcribe_full_file`` call produced.
+
+    The service is shared by concurrent requests, so everything about a call
+    is returned here rather than kept on the service.
+    """
+
+    transcript: Optional[str] = None
+    preprocessing: Optional[Dict] = None  # chain name and per-stage timings
+    speaker_turns: List[SpeakerTurn] = field(default_factory=list)
+    failed_chunks: List[Dict] = field(default_factory=list)  # chunks that failed after retries and hedging
+    segments: List[TranscriptSegment] = field(default_factory=list)  # with time ranges and confidence
+    refinement: Optional[Dict] = None  # what refine_low_confidence replaced
+    checkpoint: Optional[Dict] = None  # job id and chunks reused from an earlier run
+    job_checkpoint: Optional[JobCheckpoint] = field(default=None, repr=False)
 
 
 class TranscriptionService:
@@ -19,11 +72,26 @@ class TranscriptionService:
     with real-time dashboard.
     """
 
-    def __init__(self, gcs_bucket_name: str, gcp_project_id: str, gcp_location: str):
+    def __init__(
+        self,
+        gcs_bucket_name: str,
+        gcp_project_id: str,
+        gcp_location: str,
+        speech_client=None,
+        storage_client=None,
+        checkpoints: bool = JOB_CHECKPOINTS_ENABLED,
+    ):
         self.creds_path = get_service_account_credentials()
         self.gcs_bucket_name = gcs_bucket_name
         self.project_id = gcp_project_id
         self.location = gcp_location
+        self.checkpoints = checkpoints
+
+        if speech_client is not None and storage_client is not None:
+            # Injected clients (e.g. the offline benchmark stand-ins)
+            self.speech_client = speech_client
+            self.storage_client = storage_client
+            return
 
         if not self.creds_path:
             print("ERROR: Google Cloud credentials not set.")
@@ -57,37 +125,39 @@ class TranscriptionService:
             print(f"WARNING: Could not verify/create GCS bucket: {e}")
             print("You may need to create the bucket manually or check permissions.")
 
-    def _upload_to_gcs(self, audio_bytes: BytesIO, destination_blob_name: str) -> str:
+    def _upload_to_gcs(
+        self, audio_bytes: BytesIO, destination_blob_name: str, content_type: str = "audio/wav"
+    ) -> str:
         """Uploads audio data to a GCS bucket and returns the GCS URI."""
+        file_size_mb = 0.0
         try:
             if not self.storage_client:
                 raise Exception("Storage client not initialized")
             
             bucket = self.storage_client.bucket(self.gcs_bucket_name)
             blob = bucket.blob(destination_blob_name)
-            audio_bytes.seek(0)
             
-            # Check if audio_bytes has content
-            content = audio_bytes.read()
-            if len(content) == 0:
+            # Check if audio_bytes has content (seek instead of reading a copy)
+            size = audio_bytes.seek(0, 2)
+            if size == 0:
                 raise Exception("Audio file is empty")
             
             # Check file size and warn if large
-            file_size_mb = len(content) / (1024 * 1024)
+            file_size_mb = size / (1024 * 1024)
             if file_size_mb > 50:
                 print(f"WARNING: Large file: {file_size_mb:.1f}MB - this may take time to upload")
             
             audio_bytes.seek(0)  # Reset for upload
             
-            # Set content type
-            content_type = "audio/wav"
-            
             # Upload with timeout settings
-            blob.upload_from_file(
-                audio_bytes, 
-                content_type=content_type,
-                timeout=300  # 5 minutes timeout
-            )
+            with timed("gcs_upload"):
+                blob.upload_from_file(
+                    audio_bytes, 
+                    content_type=content_type,
+                    size=size,
+                    timeout=300  # 5 minutes timeout
+                )
+            AUDIO_BYTES.inc(size, source="gcs")
             
             print(f"Uploaded {file_size_mb:.1f}MB to GCS")
             return f"gs://{self.gcs_bucket_name}/{destination_blob_name}"
@@ -115,11 +185,15 @@ class TranscriptionService:
 
         try:
             for i, (chunk_buffer, time_label) in enumerate(audio_chunks):
+                # A Speech slot covers the upload and the recognition
+                slot = get_work_scheduler().acquire("speech")
+
                 # Upload chunk to GCS for processing
                 unique_filename = f"chunk-{uuid.uuid4()}.wav"
                 try:
                     gcs_uri = self._upload_to_gcs(chunk_buffer, unique_filename)
                 except Exception as e:
+                    slot.release()
                     print(f"Failed to upload chunk {i + 1}: {e}")
                     continue
 
@@ -134,10 +208,9 @@ class TranscriptionService:
 
                 # Process chunk
                 try:
-                    operation = self.speech_client.long_running_recognize(
-                        config=config, audio=audio
-                    )
-                    response = operation.result()
+                    response = get_backend("speech").submit(
+                        lambda: get_operation_poller().recognize(self.speech_client, config, audio)
+                    ).result()
 
                     # Extract transcript
                     chunk_transcript = ""
@@ -148,6 +221,7 @@ class TranscriptionService:
                         )
 
                     full_transcript_parts.append(chunk_transcript)
+                    CHUNKS.inc(result="ok")
 
                     # Clean up the uploaded chunk
                     try:
@@ -159,9 +233,12 @@ class TranscriptionService:
 
                 except Exception as e:
                     print(f"Chunk {i + 1} transcription failed: {e}")
+                    CHUNKS.inc(result="failed")
                     full_transcript_parts.append(
                         f"[Chunk {i + 1} failed to transcribe]"
                     )
+                finally:
+                    slot.release()
 
                 # Update progress
                 elapsed_time = time.time() - start_time
@@ -178,95 +255,347 @@ class TranscriptionService:
             return " ".join(full_transcript_parts) if full_transcript_parts else None
 
     def transcribe_full_file(
-        self, uploaded_file, language_code: str = "hi-IN"
-    ) -> Optional[str]:
+        self,
+        uploaded_file,
+        language_code: str = "hi-IN",
+        preprocessing: Optional[str] = None,
+        diarize: bool = False,
+        on_chunk=None,
+        on_chunk_done=None,
+    ) -> TranscriptionResult:
         """
         Transcribes a full uploaded file using chunking for large files.
+
+        Returns a ``TranscriptionResult`` whose ``transcript`` is None when
+        nothing could be transcribed.
+
+        ``preprocessing`` selects a chain from ``PREPROCESSING_CHAINS``
+        (defaults to ``DEFAULT_PREPROCESSING_CHAIN``). When no chain is requested
+        and the upload is already mono 16-bit WAV/FLAC, the original bytes are
+        uploaded without decoding. Per-stage timings are returned as
+        ``result.preprocessing``.
+
+        With ``diarize=True`` the speaker turns, labelled with interview roles,
+        are returned as ``result.speaker_turns``. Chunks that failed
+        after retries and hedging are listed in ``result.failed_chunks``.
+
+        Chunked jobs are checkpointed per chunk (services/job_checkpoint.py):
+        transcribing the same bytes with the same parameters again reuses
+        finished chunks, reattaches to running operations and only recognizes
+        the rest. ``result.checkpoint`` holds the job id and what was reused.
+
+        The recognition results, with their time ranges and confidence, are
+        returned as ``result.segments`` (see ``refine_low_confidence``).
+
+        For chunked files, ``on_chunk_done(chunk_index, chunk_count, time_label,
+        transcript)`` is called as each chunk finishes, in any order, and
+        ``on_chunk(chunk_index, transcript)`` in chunk order once a chunk and
+        all before it are done (``transcript`` is None for a failed chunk).
         """
+        result = TranscriptionResult()
         if not self.speech_client or not self.storage_client:
             print("Clients not initialized. Cannot transcribe.")
-            return None
+            return result
 
+        INFLIGHT_JOBS.inc(kind="transcription")
         try:
-            # Handle different input types
-            if hasattr(uploaded_file, 'read'):
-                uploaded_file.seek(0)
-                if hasattr(uploaded_file, 'getvalue'):
-                    audio_data, original_sample_rate = sf.read(uploaded_file)
-                else:
-                    audio_data, original_sample_rate = sf.read(uploaded_file)
-            else:
-                source = BytesIO(uploaded_file)
-                audio_data, original_sample_rate = sf.read(source)
-            
-            print(f"Original: {len(audio_data)} samples at {original_sample_rate}Hz")
-            
-            # Convert to mono if stereo
-            if len(audio_data.shape) > 1:
-                audio_data = np.mean(audio_data, axis=1)
-            
-            # Keep original sample rate to avoid any data loss
-            target_sample_rate = original_sample_rate  # No resampling = no data loss
-            
-            # Optional: Only resample if really needed (very high sample rates)
-            if original_sample_rate > 48000:
-                target_sample_rate = 16000
-                try:
-                    from scipy import signal
-                    # Use scipy for proper resampling
-                    num_samples = int(len(audio_data) * target_sample_rate / original_sample_rate)
-                    audio_data = signal.resample(audio_data, num_samples)
-                    print(f"Resampled: {original_sample_rate}Hz -> {target_sample_rate}Hz (SciPy)")
-                except ImportError:
-                    # Fallback: keep original rate to avoid data loss
-                    target_sample_rate = original_sample_rate
-                    print(f"Keeping original sample rate: {original_sample_rate}Hz (no SciPy)")
-            else:
-                print(f"Using original sample rate: {original_sample_rate}Hz (optimal)")
-            
-            # Normalize audio levels for better transcription
-            audio_data = audio_data / np.max(np.abs(audio_data)) * 0.8
-            
-            # Apply noise reduction (simple)
-            audio_data = self._simple_noise_reduction(audio_data)
-            
-            # Calculate duration
-            duration_seconds = len(audio_data) / target_sample_rate
-            
-            print(f"Audio duration: {duration_seconds:.1f} seconds")
-            print(f"Audio samples: {len(audio_data):,} at {target_sample_rate}Hz")
-            
-            # Validate audio quality
-            if duration_seconds < 10:
-                print("WARNING: Very short audio detected. Check if file uploaded correctly.")
-            elif duration_seconds > 3600:  # More than 1 hour
-                print("WARNING: Very long audio (>1 hour). Processing may take significant time.")
-            else:
-                print(f"Audio duration looks good: {duration_seconds/60:.1f} minutes")
-            
-            # If audio is longer than 3 minutes, use chunking (reduced threshold)
-            if duration_seconds > 180:  # 3 minutes
-                print("Large file detected - using chunking approach")
-                return self._transcribe_large_file_chunked(audio_data, target_sample_rate, language_code)
-            
-            # For smaller files, process normally but with timeout handling
-            return self._transcribe_small_file(audio_data, target_sample_rate, language_code)
-            
+            result.transcript = self._transcribe_file(
+                result, uploaded_file, language_code, preprocessing, diarize, on_chunk, on_chunk_done
+            )
+        except UnsupportedAudioFormat:
+            raise
         except Exception as e:
             print(f"Failed to process file: {e}")
+        finally:
+            INFLIGHT_JOBS.dec(kind="transcription")
+        return result
+
+    def _transcribe_file(
+        self, result, uploaded_file, language_code, preprocessing=None, diarize=False, on_chunk=None, on_chunk_done=None
+    ):
+        """Decode (or probe) the upload and transcribe it, filling ``result``; returns the transcript."""
+        chain = build_preprocessing_chain(preprocessing or DEFAULT_PREPROCESSING_CHAIN)
+        timings_ms = {}
+
+        # Decode to float32 PCM; WebM/M4A are transcoded in the process pool
+        stage_start = time.perf_counter()
+        if hasattr(uploaded_file, 'getvalue'):
+            file_bytes = uploaded_file.getvalue()
+        elif hasattr(uploaded_file, 'read'):
+            uploaded_file.seek(0)
+            file_bytes = uploaded_file.read()
+        else:
+            file_bytes = uploaded_file
+        AUDIO_BYTES.inc(len(file_bytes), source="upload")
+
+        checkpoint = None
+        if self.checkpoints:
+            checkpoint = open_checkpoint(
+                job_key(
+                    file_bytes,
+                    language_code=language_code,
+                    preprocessing=preprocessing,
+                    diarize=diarize,
+                    chunk_seconds=CHUNK_DURATION_SECONDS,
+                    passthrough=AUDIO_PASSTHROUGH,
+                ),
+                on_expired=self._delete_checkpoint_blobs,
+            )
+            result.job_checkpoint = checkpoint
+            result.checkpoint = {"job_id": checkpoint.job_id, "resumed_chunks": 0, "reattached_chunks": 0}
+            if checkpoint.done:
+                # Every chunk finished in an earlier run: no decode, no Speech calls
+                result.checkpoint["resumed_chunks"] = len(checkpoint.record["chunks"])
+                print(f"Job {checkpoint.job_id} already transcribed - using its checkpoint")
+                result.preprocessing = {"chain": "checkpoint", "timings_ms": {}}
+                result.speaker_turns = [SpeakerTurn(**turn) for turn in checkpoint.record["speaker_turns"]]
+                result.segments = [TranscriptSegment(**segment) for segment in checkpoint.record.get("segments", [])]
+                return checkpoint.record["transcript"]
+
+        # Fast path: Speech can read mono 16-bit WAV/FLAC as uploaded
+        if preprocessing is None and AUDIO_PASSTHROUGH:
+            probe = probe_passthrough(file_bytes)
+            if probe and (probe.container == "wav" or probe.duration_seconds <= CHUNK_DURATION_SECONDS):
+                timings_ms["probe"] = round((time.perf_counter() - stage_start) * 1000, 2)
+                result.preprocessing = {"chain": "passthrough", "timings_ms": timings_ms}
+                return self._transcribe_passthrough(
+                    result, file_bytes, probe, language_code, diarize, on_chunk, on_chunk_done, checkpoint
+                )
+
+        # ffmpeg containers are chunked while they decode, so uploads start early
+        if STREAM_DECODE and needs_ffmpeg(file_bytes):
+            result.preprocessing = {"chain": chain.name, "streamed": True, "timings_ms": timings_ms}
+            return self._transcribe_stream(
+                result, file_bytes, chain, timings_ms, language_code, diarize, on_chunk, on_chunk_done, checkpoint
+            )
+
+        audio_data, target_sample_rate, stats = self._decode_for_speech(file_bytes, timings_ms, stage_start)
+        
+        if stats.is_silent:
+            print("WARNING: Audio is completely silent - nothing to transcribe")
+            return None
+        
+        # Run the selected preprocessing chain (in place where possible)
+        with timed("preprocess"):
+            audio_data, chain_state = chain.run(audio_data, target_sample_rate, stats)
+        timings_ms.update(chain_state.timings_ms)
+        result.preprocessing = {"chain": chain.name, "timings_ms": timings_ms}
+        print(f"Preprocessing '{chain.name}': {timings_ms}")
+        
+        # Calculate duration
+        duration_seconds = len(audio_data) / target_sample_rate
+        
+        print(f"Audio duration: {duration_seconds:.1f} seconds")
+        print(f"Audio samples: {len(audio_data):,} at {target_sample_rate}Hz")
+        
+        # Validate audio quality
+        if duration_seconds < 10:
+            print("WARNING: Very short audio detected. Check if file uploaded correctly.")
+        elif duration_seconds > 3600:  # More than 1 hour
+            print("WARNING: Very long audio (>1 hour). Processing may take significant time.")
+        else:
+            print(f"Audio duration looks good: {duration_seconds/60:.1f} minutes")
+        
+        # If audio is longer than 3 minutes, use chunking (reduced threshold)
+        if duration_seconds > CHUNK_DURATION_SECONDS:
+            print("Large file detected - using chunking approach")
+            return self._transcribe_large_file_chunked(
+                result, audio_data, target_sample_rate, language_code, diarize, on_chunk, on_chunk_done, checkpoint
+            )
+        
+        # For smaller files, process normally but with timeout handling
+        return self._transcribe_small_file(result, audio_data, target_sample_rate, language_code, diarize)
+
+    def _decode_for_speech(self, file_bytes, timings_ms=None, stage_start=None):
+        """Decode ``file_bytes`` to mono float32 at a rate Speech accepts; returns ``(audio, rate, stats)``."""
+        timings_ms = {} if timings_ms is None else timings_ms
+        stage_start = time.perf_counter() if stage_start is None else stage_start
+        with timed("decode"):
+            audio_data, original_sample_rate, container = get_transcoding_pool().decode(file_bytes)
+        timings_ms["decode"] = round((time.perf_counter() - stage_start) * 1000, 2)
+        
+        print(f"Original ({container}): {len(audio_data)} samples at {original_sample_rate}Hz")
+        
+        # Mono downmix + level measurement in one pass
+        stage_start = time.perf_counter()
+        audio_data, stats = downmix_and_measure(audio_data)
+        timings_ms["downmix"] = round((time.perf_counter() - stage_start) * 1000, 2)
+        
+        # Keep original sample rate to avoid any data loss
+        target_sample_rate = original_sample_rate  # No resampling = no data loss
+        
+        # Optional: Only resample if really needed (very high sample rates)
+        if original_sample_rate > 48000:
+            target_sample_rate = 16000
+            try:
+                from scipy import signal
+                # Use scipy for proper resampling
+                num_samples = int(len(audio_data) * target_sample_rate / original_sample_rate)
+                audio_data = signal.resample(audio_data, num_samples).astype(np.float32, copy=False)
+                stats = measure(audio_data)
+                print(f"Resampled: {original_sample_rate}Hz -> {target_sample_rate}Hz (SciPy)")
+            except ImportError:
+                # Fallback: keep original rate to avoid data loss
+                target_sample_rate = original_sample_rate
+                print(f"Keeping original sample rate: {original_sample_rate}Hz (no SciPy)")
+        else:
+            print(f"Using original sample rate: {original_sample_rate}Hz (optimal)")
+        return audio_data, target_sample_rate, stats
+
+    def refine_low_confidence(
+        self,
+        uploaded_file,
+        transcription: TranscriptionResult,
+        language_code: str = "hi-IN",
+        preprocessing: Optional[str] = None,
+        threshold: float = REFINE_CONFIDENCE_THRESHOLD,
+    ) -> Optional[str]:
+        """
+        Re-transcribe the low-confidence parts of a transcript and splice them in.
+
+        ``transcription`` is what ``transcribe_full_file`` returned for
+        ``uploaded_file``. Spans of its ``segments`` less confident than
+        ``threshold`` are cut from the audio and recognized concurrently with
+        ``REFINE_MODEL``. Returns the refined transcript (None if chunks of
+        that call failed), updates ``transcription.segments`` and records what
+        was refined in ``transcription.refinement``. Speaker turns keep their
+        first-pass text.
+        """
+        segments = transcription.segments
+        spans = low_confidence_spans(segments, threshold)
+        refine_seconds = sum(segments[last - 1].end - segments[first].start for first, last in spans)
+        audio_seconds = segments[-1].end if segments else 0.0
+        transcription.refinement = {
+            "model": REFINE_MODEL,
+            "threshold": threshold,
+            "spans": len(spans),
+            "replaced_spans": 0,
+            "refined_seconds": round(refine_seconds, 1),
+            "audio_seconds": round(audio_seconds, 1),
+            "refined_share": round(refine_seconds / audio_seconds, 3) if audio_seconds else 0.0,
+        }
+        if transcription.failed_chunks:
+            print("Not refining: chunks of the last run failed, transcribe the file again first")
             return None
+        if not spans:
+            print(f"Nothing to refine: no segments below confidence {threshold}")
+            return transcript_from_segments(segments)
+        print(
+            f"Refining {len(spans)} low-confidence spans with {REFINE_MODEL}: "
+            f"{refine_seconds:.0f}s of {audio_seconds:.0f}s"
+        )
 
-    def _transcribe_small_file(self, audio_data, sample_rate, language_code):
+        with timed("refine"):
+            if hasattr(uploaded_file, 'getvalue'):
+                file_bytes = uploaded_file.getvalue()
+            elif hasattr(uploaded_file, 'read'):
+                uploaded_file.seek(0)
+                file_bytes = uploaded_file.read()
+            else:
+                file_bytes = uploaded_file
+            audio_data, sample_rate, stats = self._decode_for_speech(file_bytes)
+            if preprocessing:
+                audio_data, _ = build_preprocessing_chain(preprocessing).run(audio_data, sample_rate, stats)
+
+            config = speech.RecognitionConfig(
+                language_code=language_code,
+                enable_automatic_punctuation=True,
+                model=REFINE_MODEL,
+                use_enhanced=REFINE_USE_ENHANCED,
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            )
+            poller = get_operation_poller()
+            scheduler = get_work_scheduler()
+            speech_backend = get_backend("speech")
+
+            def start_span(first, last):
+                start, end = segments[first].start, segments[last - 1].end
+                with span("refine_span", start=start, end=end):
+                    span_buffer = BytesIO()
+                    with timed("encode"):
+                        sf.write(
+                            span_buffer, audio_data[int(start * sample_rate):int(end * sample_rate)],
+                            sample_rate, format='WAV',
+                        )
+                    slot = scheduler.acquire("speech")
+                    try:
+                        unique_filename = f"refine-{uuid.uuid4()}.wav"
+                        audio = speech.RecognitionAudio(uri=self._upload_to_gcs(span_buffer, unique_filename))
+                        recognition = speech_backend.submit(
+                            lambda: poller.recognize(self.speech_client, config, audio, audio_seconds=end - start),
+                            units=end - start,
+                        )
+                    except Exception:
+                        slot.release()
+                        raise
+                    recognition.add_done_callback(lambda _: slot.release())
+                    return unique_filename, recognition
+
+            recognitions = {}  # recognition future -> (span, blob name)
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                uploads = {executor.submit(propagate(start_span), *item): item for item in spans}
+                for future in as_completed(uploads):
+                    try:
+                        unique_filename, recognition = future.result()
+                    except Exception as e:
+                        print(f"Refinement upload failed: {e}")
+                        continue
+                    recognitions[recognition] = (uploads[future], unique_filename)
+
+            replacements = {}
+            for recognition in as_completed(recognitions):
+                (first, last), unique_filename = recognitions[recognition]
+                try:
+                    replacements[(first, last)] = segments_from_response(
+                        recognition.result(), segments[first].chunk_index, segments[first].start
+                    )
+                except Exception as e:
+                    # The span keeps its first-pass text and is tried again next time
+                    print(f"Refinement of {segments[first].start:.1f}s - {segments[last - 1].end:.1f}s failed: {e}")
+                finally:
+                    try:
+                        self.storage_client.bucket(self.gcs_bucket_name).blob(unique_filename).delete()
+                    except Exception:
+                        pass
+
+        transcription.segments, replaced = splice_segments(segments, replacements)
+        transcription.refinement["replaced_spans"] = replaced
+        transcript = transcript_from_segments(transcription.segments)
+        print(f"Refinement replaced {replaced}/{len(spans)} spans")
+
+        # A re-run of the same job then starts from the refined transcript
+        checkpoint = transcription.job_checkpoint
+        if checkpoint and checkpoint.done:
+            checkpoint.finish(
+                "done", transcript, checkpoint.record["speaker_turns"],
+                [segment.to_dict() for segment in transcription.segments],
+            )
+        return transcript
+
+    def _transcribe_small_file(self, result, audio_data, sample_rate, language_code, diarize=False):
         """Transcribe smaller files directly with word-level timestamps."""
-        unique_filename = f"interview-audio-{uuid.uuid4()}.wav"
-        try:
-            # Create WAV file
-            normalized_wav = BytesIO()
+        # Create WAV file
+        normalized_wav = BytesIO()
+        with timed("encode"):
             sf.write(normalized_wav, audio_data, sample_rate, format='WAV')
-            normalized_wav.seek(0)
-            
+        normalized_wav.seek(0)
+        return self._transcribe_encoded(
+            result, normalized_wav, sample_rate, language_code, diarize=diarize,
+            duration_seconds=len(audio_data) / sample_rate,
+        )
+
+    def _transcribe_encoded(
+        self, result, audio_buffer, sample_rate, language_code, encoding="LINEAR16", diarize=False, duration_seconds=0.0
+    ):
+        """Upload an already-encoded mono WAV/FLAC buffer and transcribe it with word timestamps."""
+        extension = "flac" if encoding == "FLAC" else "wav"
+        unique_filename = f"interview-audio-{uuid.uuid4()}.{extension}"
+        slot = get_work_scheduler().acquire("speech")
+        try:
             # Upload with retry
-            gcs_uri = self._upload_to_gcs_with_retry(normalized_wav, unique_filename)
+            gcs_uri = self._upload_to_gcs_with_retry(
+                audio_buffer, unique_filename, content_type=f"audio/{extension}"
+            )
             if not gcs_uri:
                 return None
             
@@ -276,25 +605,31 @@ class TranscriptionService:
                 enable_automatic_punctuation=True,
                 enable_word_time_offsets=True,  # Enable word timestamps
                 model="telephony",
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                encoding=speech.RecognitionConfig.AudioEncoding[encoding],
                 sample_rate_hertz=int(sample_rate),
                 audio_channel_count=1,
+                diarization_config=self._diarization_config(diarize),
             )
             
             audio = speech.RecognitionAudio(uri=gcs_uri)
             
             print("Transcribing audio with timestamps...")
-            operation = self.speech_client.long_running_recognize(config=config, audio=audio)
-            response = operation.result()
+            # Deadline, retries, hedging and circuit breaker (services/resilience.py)
+            response = get_backend("speech").submit(
+                lambda: get_operation_poller().recognize(
+                    self.speech_client, config, audio, audio_seconds=duration_seconds
+                ),
+                units=duration_seconds,
+            ).result()
             
             # Extract transcript with word timestamps
             if response.results:
                 word_details = []
                 full_text = []
                 
-                for result in response.results:
-                    if result.alternatives:
-                        alternative = result.alternatives[0]
+                for speech_result in response.results:
+                    if speech_result.alternatives:
+                        alternative = speech_result.alternatives[0]
                         full_text.append(alternative.transcript)
                         
                         # Extract word-level timestamps
@@ -310,6 +645,9 @@ class TranscriptionService:
                 
                 # Store word details
                 self.word_timestamps = word_details
+                result.segments = segments_from_response(response)
+                if diarize:
+                    result.speaker_turns = reconcile_speakers([turns_from_response(response)])
                 return " ".join(full_text)
             else:
                 print("WARNING: No speech detected in audio")
@@ -319,6 +657,7 @@ class TranscriptionService:
             print(f"Small file transcription failed: {e}")
             return None
         finally:
+            slot.release()
             # Cleanup
             try:
                 bucket = self.storage_client.bucket(self.gcs_bucket_name)
@@ -327,10 +666,106 @@ class TranscriptionService:
             except:
                 pass
     
-    def _transcribe_large_file_chunked(self, audio_data, sample_rate, language_code):
+    def _transcribe_passthrough(
+        self, result, file_bytes, probe, language_code, diarize=False, on_chunk=None, on_chunk_done=None, checkpoint=None
+    ):
+        """Transcribe original WAV/FLAC bytes without decoding or re-encoding."""
+        print(
+            f"Passthrough {probe.container.upper()}: {probe.duration_seconds:.1f}s "
+            f"at {probe.sample_rate}Hz (no decode/re-encode)"
+        )
+        if probe.duration_seconds <= CHUNK_DURATION_SECONDS:
+            return self._transcribe_encoded(
+                result, BytesIO(file_bytes), probe.sample_rate, language_code,
+                encoding=probe.encoding, diarize=diarize,
+                duration_seconds=probe.duration_seconds,
+            )
+
+        # Long WAV: slice the data chunk into byte ranges behind fresh headers
+        chunks = [
+            (reader, f"{start:.1f}s - {end:.1f}s", index)
+            for index, (reader, start, end) in enumerate(
+                wav_chunk_readers(file_bytes, probe, CHUNK_DURATION_SECONDS)
+            )
+        ]
+        print(f"Processing {len(chunks)} passthrough chunks in parallel")
+        return self._transcribe_chunks_parallel(
+            result, chunks, language_code, diarize, on_chunk, on_chunk_done, checkpoint
+        )
+
+    def _transcribe_stream(
+        self, result, file_bytes, chain, timings_ms, language_code, diarize=False, on_chunk=None, on_chunk_done=None,
+        checkpoint=None,
+    ):
+        """
+        Transcribe an ffmpeg-decoded upload chunk by chunk while it is decoded.
+
+        ffmpeg output is already mono at ``TRANSCODE_SAMPLE_RATE``. Every
+        ``CHUNK_DURATION_SECONDS`` of it is preprocessed on its own (levels are
+        measured per chunk, not over the whole file) and uploaded as soon as
+        it is complete. Files that fit in one chunk take the small-file path.
+        """
+        sample_rate = TRANSCODE_SAMPLE_RATE
+        chunks = self._stream_chunks(file_bytes, chain, sample_rate, timings_ms)
+        audio, stats, last = next(chunks)
+        if last:
+            print(f"Streamed decode: {len(audio) / sample_rate:.1f} seconds at {sample_rate}Hz")
+            if stats.is_silent:
+                print("WARNING: Audio is completely silent - nothing to transcribe")
+                return None
+            return self._transcribe_small_file(result, audio, sample_rate, language_code, diarize)
+
+        print("Large file detected - chunking while decoding")
+
+        def encoded(first):
+            # Encoded in this thread while the pool uploads the chunks before
+            for index, (chunk, _, _) in enumerate(itertools.chain([first], chunks)):
+                start_time = index * CHUNK_DURATION_SECONDS
+                chunk_buffer = BytesIO()
+                with timed("encode"):
+                    sf.write(chunk_buffer, chunk, sample_rate, format='WAV')
+                chunk_buffer.seek(0)
+                yield chunk_buffer, f"{start_time:.1f}s - {start_time + len(chunk) / sample_rate:.1f}s", index
+
+        return self._transcribe_chunks_parallel(
+            result, encoded((audio, stats, last)), language_code, diarize, on_chunk, on_chunk_done, checkpoint
+        )
+
+    def _stream_chunks(self, file_bytes, chain, sample_rate, timings_ms):
+        """Yield ``(audio, stats, last)`` per preprocessed chunk as ffmpeg decodes ``file_bytes``."""
+        chunk_size = CHUNK_DURATION_SECONDS * sample_rate
+        timings_ms.setdefault("decode", 0.0)
+
+        def prepare(audio, last):
+            stats = measure(audio)
+            audio, chain_state = chain.run(audio, sample_rate, stats)
+            for stage, elapsed in chain_state.timings_ms.items():
+                timings_ms[stage] = round(timings_ms.get(stage, 0.0) + elapsed, 2)
+            return audio, stats, last
+
+        blocks = get_transcoding_pool().stream(file_bytes, sample_rate)
+        pending, pending_samples = [], 0
+        while True:
+            stage_start = time.perf_counter()
+            block = next(blocks, None)
+            timings_ms["decode"] = round(timings_ms["decode"] + (time.perf_counter() - stage_start) * 1000, 2)
+            if block is None:
+                break
+            pending.append(block)
+            pending_samples += len(block)
+            # Cut a chunk only once audio past it has arrived: the last chunk is flagged as such
+            while pending_samples > chunk_size:
+                audio = np.concatenate(pending)
+                pending, pending_samples = [audio[chunk_size:]], len(audio) - chunk_size
+                yield prepare(audio[:chunk_size], False)
+        yield prepare(np.concatenate(pending), True)
+
+    def _transcribe_large_file_chunked(
+        self, result, audio_data, sample_rate, language_code, diarize=False, on_chunk=None, on_chunk_done=None, checkpoint=None
+    ):
         """Transcribe large files using parallel chunking."""
         # Use 3-minute chunks to preserve content better
-        chunk_duration = 180  # seconds (balanced for quality vs speed)
+        chunk_duration = CHUNK_DURATION_SECONDS  # balanced for quality vs speed
         chunk_size = chunk_duration * sample_rate
         
         chunks = []
@@ -341,7 +776,8 @@ class TranscriptionService:
             
             # Create chunk buffer
             chunk_buffer = BytesIO()
-            sf.write(chunk_buffer, chunk, sample_rate, format='WAV')
+            with timed("encode"):
+                sf.write(chunk_buffer, chunk, sample_rate, format='WAV')
             chunk_buffer.seek(0)
             
             chunks.append((chunk_buffer, f"{start_time:.1f}s - {end_time:.1f}s", i // chunk_size))
@@ -360,30 +796,193 @@ class TranscriptionService:
             print("Full audio coverage confirmed")
         
         # Use parallel processing
-        return self._transcribe_chunks_parallel(chunks, language_code)
+        return self._transcribe_chunks_parallel(
+            result, chunks, language_code, diarize, on_chunk, on_chunk_done, checkpoint
+        )
     
-    def _transcribe_chunks_parallel(self, chunks, language_code):
-        """Process multiple chunks in parallel."""
-        results = [None] * len(chunks)
+    def _transcribe_chunks_parallel(
+        self, result, chunks, language_code, diarize=False, on_chunk=None, on_chunk_done=None, checkpoint=None
+    ):
+        """
+        Process multiple chunks in parallel.
+
+        Three threads upload chunks and start their recognitions; waiting for
+        the recognitions is left to the shared operation poller, so all chunks
+        are recognized concurrently without holding a thread each. A slow or
+        failing recognition is hedged or retried by the Speech backend policy
+        (services/resilience.py). Each chunk
+        holds a Speech slot of the work scheduler from upload until its
+        recognition finishes, so the caller's priority class and tenant decide
+        how chunks share the quota with other jobs.
+
+        With a ``checkpoint``, every chunk's progress is saved, chunks finished
+        by an earlier run are reused and their running operations reattached.
+
+        ``chunks`` may be a generator (see ``_transcribe_stream``): each chunk
+        is uploaded as soon as it is produced, and ``on_chunk_done`` gets a
+        chunk count of None until the last chunk has been produced.
+        """
+        results = []
+        chunk_turns = []
+        chunk_segments = []
+        finished = []
+        failed = set()
+        chunk_count = len(chunks) if isinstance(chunks, list) else None
+        next_to_report = 0
+        poller = get_operation_poller()
+        scheduler = get_work_scheduler()
+        speech_backend = get_backend("speech")
         
-        def process_single_chunk(chunk_data):
+        def report_done(chunk_index, time_label):
+            if on_chunk_done:
+                try:
+                    transcript = None if chunk_index in failed else results[chunk_index]
+                    on_chunk_done(chunk_index, chunk_count, time_label, transcript)
+                except Exception as e:
+                    print(f"Chunk listener failed: {e}")
+        
+        def report_in_order():
+            # Hand finished chunks to on_chunk without gaps, in chunk order
+            nonlocal next_to_report
+            while on_chunk and next_to_report < len(finished) and finished[next_to_report]:
+                index = next_to_report
+                next_to_report += 1
+                try:
+                    on_chunk(index, None if index in failed else results[index])
+                except Exception as e:
+                    print(f"Chunk listener failed: {e}")
+        
+        def save_chunk(chunk_index, **fields):
+            if checkpoint:
+                checkpoint.update_chunk(chunk_index, **fields)
+        
+        def start_chunk(chunk_data, saved):
             chunk_buffer, time_label, chunk_index = chunk_data
+            with span("chunk", chunk_index=chunk_index, time_label=time_label):
+                # Held until the recognition finishes (released by the poller callback)
+                slot = scheduler.acquire("speech")
+                try:
+                    # An operation started before a restart is picked up where it is
+                    saved_operations = []
+                    operation = self._reattach_operation(saved)
+                    if operation is not None:
+                        reattached.append(chunk_index)
+                        saved_operations.append(operation)
+                        unique_filename, gcs_uri = saved["blob"], saved["gcs_uri"]
+                    # Upload chunk (unless an earlier run's blob is still there)
+                    elif saved.get("blob") and self._blob_exists(saved["blob"]):
+                        unique_filename, gcs_uri = saved["blob"], saved["gcs_uri"]
+                    else:
+                        unique_filename = f"chunk-{uuid.uuid4()}.wav"
+                        gcs_uri = self._upload_to_gcs(chunk_buffer, unique_filename)
+                        save_chunk(
+                            chunk_index, status="uploaded", time_label=time_label,
+                            audio_hash=chunk_hashes.get(chunk_index), blob=unique_filename, gcs_uri=gcs_uri,
+                        )
+                    
+                    # Configure transcription with proper encoding
+                    config = speech.RecognitionConfig(
+                        language_code=language_code,
+                        enable_automatic_punctuation=True,
+                        model="telephony",
+                        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                        diarization_config=self._diarization_config(diarize),
+                    )
+                    
+                    audio = speech.RecognitionAudio(uri=gcs_uri)
+                    
+                    def start_recognition():
+                        # The first attempt of a reattached chunk polls its saved operation,
+                        # retries and hedges recognize the uploaded blob again
+                        try:
+                            return poller.track(saved_operations.pop(), "recognize", CHUNK_DURATION_SECONDS)
+                        except IndexError:
+                            pass
+                        operation = self.speech_client.long_running_recognize(config=config, audio=audio)
+                        save_chunk(chunk_index, status="running", operation=_operation_name(operation))
+                        return poller.track(operation, "recognize", CHUNK_DURATION_SECONDS)
+                    
+                    recognition = speech_backend.submit(start_recognition, units=CHUNK_DURATION_SECONDS)
+                except Exception:
+                    slot.release()
+                    raise
+                recognition.add_done_callback(lambda _: slot.release())
+                return unique_filename, recognition
+        
+        def chunk_failed(chunk_index, time_label, error):
+            CHUNKS.inc(result="failed")
+            print(f"Chunk {time_label} failed: {error}")
+            results[chunk_index] = f"[Chunk failed: {error}]"
+            failed.add(chunk_index)
+            result.failed_chunks.append({
+                "chunk_index": chunk_index,
+                "time_range": time_label,
+                "error_type": type(error).__name__,
+                "error": str(error),
+                "retryable": is_retryable(error),
+            })
+            finished[chunk_index] = True
+            save_chunk(chunk_index, status="failed", error=f"{type(error).__name__}: {error}")
+            report_done(chunk_index, time_label)
+        
+        chunk_hashes = {}
+        reattached = []
+        resumed = 0
+        decode_error = None
+        
+        # Upload chunks and start recognitions (max 3 uploads at a time)
+        recognitions = {}  # recognition future -> (chunk_index, time_label, blob name)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            uploads = {}
             try:
-                # Upload chunk
-                unique_filename = f"chunk-{uuid.uuid4()}.wav"
-                gcs_uri = self._upload_to_gcs(chunk_buffer, unique_filename)
-                
-                # Configure transcription with proper encoding
-                config = speech.RecognitionConfig(
-                    language_code=language_code,
-                    enable_automatic_punctuation=True,
-                    model="telephony",
-                    encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                )
-                
-                audio = speech.RecognitionAudio(uri=gcs_uri)
-                operation = self.speech_client.long_running_recognize(config=config, audio=audio)
-                response = operation.result()
+                for chunk in chunks:
+                    chunk_buffer, time_label, chunk_index = chunk
+                    results.append(None)
+                    chunk_turns.append([])
+                    chunk_segments.append([])
+                    finished.append(False)
+                    
+                    # Chunks finished by an earlier run of this job are reused as they are
+                    saved = {}
+                    if checkpoint:
+                        chunk_hashes[chunk_index] = audio_hash(chunk_buffer)
+                        saved = checkpoint.chunk(chunk_index, chunk_hashes[chunk_index])
+                    if saved.get("status") == "done":
+                        results[chunk_index] = saved["transcript"]
+                        chunk_turns[chunk_index] = [SpeakerTurn(**turn) for turn in saved.get("turns", [])]
+                        chunk_segments[chunk_index] = [
+                            TranscriptSegment(**segment) for segment in saved.get("segments", [])
+                        ]
+                        finished[chunk_index] = True
+                        resumed += 1
+                        CHUNKS.inc(result="resumed")
+                        report_done(chunk_index, time_label)
+                        continue
+                    # propagate() keeps each chunk span under the caller's job span and work class
+                    uploads[executor.submit(propagate(start_chunk), chunk, saved)] = chunk
+            except Exception as e:
+                # A streamed decode failed: finish the chunks already started, then fail the job
+                print(f"Decoding stopped after {len(results)} chunks: {e}")
+                decode_error = e
+            chunk_count = len(results)
+            if checkpoint and resumed:
+                print(f"Resuming job {checkpoint.job_id}: {resumed}/{chunk_count} chunks already done")
+            
+            for future in as_completed(uploads):
+                _, time_label, chunk_index = uploads[future]
+                try:
+                    unique_filename, recognition = future.result()
+                except Exception as e:
+                    chunk_failed(chunk_index, time_label, e)
+                    continue
+                recognitions[recognition] = (chunk_index, time_label, unique_filename)
+        
+        report_in_order()
+        completed = chunk_count - len(recognitions)
+        for recognition in as_completed(recognitions):
+            chunk_index, time_label, unique_filename = recognitions[recognition]
+            try:
+                response = recognition.result()
                 
                 # Extract transcript
                 transcript = ""
@@ -391,34 +990,66 @@ class TranscriptionService:
                     transcript = " ".join(
                         result.alternatives[0].transcript for result in response.results
                     )
+                results[chunk_index] = transcript
                 
-                # Cleanup
-                try:
-                    bucket = self.storage_client.bucket(self.gcs_bucket_name)
-                    blob = bucket.blob(unique_filename)
-                    blob.delete()
-                except:
-                    pass
-                
-                return chunk_index, transcript, time_label
-                
+                if diarize:
+                    chunk_turns[chunk_index] = turns_from_response(
+                        response, chunk_index, chunk_index * CHUNK_DURATION_SECONDS
+                    )
+                chunk_segments[chunk_index] = segments_from_response(
+                    response, chunk_index, chunk_index * CHUNK_DURATION_SECONDS
+                )
+                finished[chunk_index] = True
+                save_chunk(
+                    chunk_index, status="done", transcript=transcript,
+                    turns=[turn.to_dict() for turn in chunk_turns[chunk_index]],
+                    segments=[segment.to_dict() for segment in chunk_segments[chunk_index]],
+                )
+                CHUNKS.inc(result="ok")
+                report_done(chunk_index, time_label)
             except Exception as e:
-                return chunk_index, f"[Chunk failed: {e}]", time_label
-        
-        # Process chunks in parallel (max 3 concurrent)
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_chunk = {executor.submit(process_single_chunk, chunk): chunk for chunk in chunks}
+                chunk_failed(chunk_index, time_label, e)
+            finally:
+                # Cleanup (a checkpointed failed chunk keeps its blob for the retry)
+                if not (checkpoint and chunk_index in failed):
+                    try:
+                        bucket = self.storage_client.bucket(self.gcs_bucket_name)
+                        blob = bucket.blob(unique_filename)
+                        blob.delete()
+                    except:
+                        pass
             
-            completed = 0
-            for future in as_completed(future_to_chunk):
-                chunk_index, transcript, time_label = future.result()
-                results[chunk_index] = transcript
-                
-                completed += 1
-                print(f"Completed {completed}/{len(chunks)} - {time_label}")
+            completed += 1
+            print(f"Completed {completed}/{chunk_count} - {time_label}")
+            report_in_order()
+        
+        if decode_error is not None:
+            # Finished chunks are checkpointed and reused when the file is sent again
+            if checkpoint:
+                checkpoint.finish("partial")
+            raise decode_error
         
         # Combine results and validate
         final_transcript = " ".join(filter(None, results))
+        result.segments = [segment for segments in chunk_segments for segment in segments]
+        if diarize:
+            result.speaker_turns = reconcile_speakers(chunk_turns)
+            print(f"Diarization: {len(result.speaker_turns)} speaker turns")
+        
+        if checkpoint:
+            result.checkpoint = {
+                "job_id": checkpoint.job_id,
+                "resumed_chunks": resumed,
+                "reattached_chunks": len(reattached),
+            }
+            if failed:
+                checkpoint.finish("partial")
+            else:
+                checkpoint.finish(
+                    "done", final_transcript,
+                    [turn.to_dict() for turn in result.speaker_turns] if diarize else [],
+                    [segment.to_dict() for segment in result.segments],
+                )
         
         # Validation
         if len(final_transcript.strip()) < 50:  # Very short transcript
@@ -429,12 +1060,56 @@ class TranscriptionService:
         
         return final_transcript
     
-    def _upload_to_gcs_with_retry(self, audio_bytes, filename, max_retries=2):
+    def _reattach_operation(self, saved):
+        """The recognize operation saved in a chunk checkpoint, or None if there is none to poll."""
+        if saved.get("status") != "running" or not saved.get("operation") or not saved.get("gcs_uri"):
+            return None
+        try:
+            operations_client = self.speech_client.transport.operations_client
+            operation = api_operation.from_gapic(
+                operations_client.get_operation(saved["operation"]),
+                operations_client,
+                speech.LongRunningRecognizeResponse,
+                metadata_type=speech.LongRunningRecognizeMetadata,
+            )
+        except Exception as e:
+            print(f"Cannot reattach to operation {saved['operation']}, recognizing again: {e}")
+            return None
+        print(f"Reattached to operation {saved['operation']}")
+        return operation
+    
+    def _blob_exists(self, name):
+        try:
+            return self.storage_client.bucket(self.gcs_bucket_name).blob(name).exists()
+        except Exception:
+            return False
+    
+    def _delete_checkpoint_blobs(self, record):
+        """Remove the uploaded chunks an expired, unfinished checkpoint left behind."""
+        bucket = self.storage_client.bucket(self.gcs_bucket_name)
+        for entry in record["chunks"].values():
+            if entry.get("blob") and entry.get("status") != "done":
+                try:
+                    bucket.blob(entry["blob"]).delete()
+                except Exception:
+                    pass
+    
+    def _diarization_config(self, diarize):
+        """Speaker diarization settings, or None when diarization is off."""
+        if not diarize:
+            return None
+        return speech.SpeakerDiarizationConfig(
+            enable_speaker_diarization=True,
+            min_speaker_count=DIARIZATION_MIN_SPEAKERS,
+            max_speaker_count=DIARIZATION_MAX_SPEAKERS,
+        )
+
+    def _upload_to_gcs_with_retry(self, audio_bytes, filename, max_retries=2, content_type="audio/wav"):
         """Upload to GCS with retry logic (reduced retries for speed)."""
         for attempt in range(max_retries):
             try:
                 audio_bytes.seek(0)
-                return self._upload_to_gcs(audio_bytes, filename)
+                return self._upload_to_gcs(audio_bytes, filename, content_type=content_type)
             except Exception as e:
                 if "timeout" in str(e).lower() and attempt < max_retries - 1:
                     print(f"Retry {attempt + 1}/{max_retries}...")
@@ -444,10 +1119,8 @@ class TranscriptionService:
                     print(f"Upload failed: {e}")
                     return None
         return None
-    
-    def _simple_noise_reduction(self, audio_data):
-        """Simple noise reduction to improve transcription accuracy."""
-        # Remove very quiet parts (likely noise)
-        threshold = np.max(np.abs(audio_data)) * 0.02
-        audio_data[np.abs(audio_data) < threshold] = 0
-        return audio_data
+
+
+def _operation_name(operation):
+    """Server-side name of a started long-running operation (None if unknown)."""
+    return getattr(getattr(operation, "operation", None), "name", None)
@@ -0,0 +1,225 @@
+# services/work_scheduler.py
+"""
+Process-wide scheduler for Speech and Gemini calls.
+
+Live sessions, interactive uploads and bulk backfills share the same Speech
+and Gemini quota. Every call takes a slot of its resource (``speech``: one
+recognition from upload until its result, ``gemini``: one extraction), and
+when a resource is full the waiting calls are granted in this order:
+
+1. priority class: ``live`` > ``interactive`` > ``batch``. A waiter moves up
+   one class for every ``SCHEDULER_AGING_SECONDS`` it has waited, so batch
+   work still progresses under sustained interactive load;
+2. within a class, weighted fair queuing across tenants: each tenant's
+   waiters get virtual finish times ``start + cost / weight`` (start-time
+   fair queuing), so a tenant with many queued chunks cannot starve another,
+   and a tenant of weight 2 gets twice the share of weight 1.
+
+Slots are not preempted, so batch work may hold at most
+``SCHEDULER_BATCH_MAX_SHARE`` of a resource: the rest stays free for live
+and interactive calls arriving while a backfill saturates the system.
+
+The class and tenant come from the caller's context (``work_class``), which
+follows the work into pool threads via ``utils.tracing.propagate``.
+"""
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    SCHEDULER_AGING_SECONDS,
+    SCHEDULER_BATCH_MAX_SHARE,
+    SCHEDULER_SLOTS,
+    SCHEDULER_TENANT_WEIGHTS,
+)
+from utils.metrics import SCHEDULER_QUEUED, SCHEDULER_WAIT_SECONDS
+
+PRIORITY_CLASSES = ("live", "interactive", "batch")  # highest first
+DEFAULT_TENANT = "default"
+
+_work_class = contextvars.ContextVar("work_class", default=("interactive", DEFAULT_TENANT))
+
+
+@contextmanager
+def work_class(priority: str, tenant: Optional[str] = None):
+    """Schedule the Speech/Gemini calls made in this block as ``priority`` work of ``tenant``."""
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class '{priority}'")
+    token = _work_class.set((priority, tenant or DEFAULT_TENANT))
+    try:
+        yield
+    finally:
+        _work_class.reset(token)
+
+
+def current_work_class() -> Tuple[str, str]:
+    return _work_class.get()
+
+
+class _Waiter:
+    __slots__ = ("priority", "tenant", "start_tag", "finish_tag", "sequence", "enqueued", "granted")
+
+    def __init__(self, priority, tenant, start_tag, finish_tag, sequence):
+        self.priority = priority
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class Slot:
+    """A granted slot; ``release()`` is idempotent and may run on any thread."""
+
+    def __init__(self, resource: "_Resource", priority: str):
+        self._resource = resource
+        self._priority = priority
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._resource.release(self._priority)
+
+
+class _Resource:
+    """Slots of one resource with per-class fair queues."""
+
+    def __init__(
+        self, name: str, capacity: int, weights: Dict[str, float], aging_seconds: float, batch_max_share: float
+    ):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.batch_capacity = max(1, int(self.capacity * batch_max_share))
+        self.weights = weights
+        self.aging_seconds = aging_seconds
+        self.in_use = 0
+        self.batch_in_use = 0
+        self._queues: Dict[str, List] = {priority: [] for priority in PRIORITY_CLASSES}
+        self._virtual_time = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def acquire(self, priority: str, tenant: str, cost: float = 1.0) -> Slot:
+        with self._condition:
+            start_tag = max(self._virtual_time[priority], self._last_finish.get((priority, tenant), 0.0))
+            finish_tag = start_tag + cost / self.weights.get(tenant, 1.0)
+            self._last_finish[(priority, tenant)] = finish_tag
+            waiter = _Waiter(priority, tenant, start_tag, finish_tag, next(self._sequence))
+            heapq.heappush(self._queues[priority], (finish_tag, waiter.sequence, waiter))
+            SCHEDULER_QUEUED.inc(resource=self.name, priority=priority)
+            self._grant()  # free slots go to the best waiter, not necessarily this one
+            while not waiter.granted:
+                self._condition.wait()
+        SCHEDULER_WAIT_SECONDS.observe(
+            time.monotonic() - waiter.enqueued, resource=self.name, priority=priority
+        )
+        return Slot(self, priority)
+
+    def _admissible(self, priority: str) -> bool:
+        if self.in_use >= self.capacity:
+            return False
+        return priority != "batch" or self.batch_in_use < self.batch_capacity
+
+    def _take(self, priority: str):
+        self.in_use += 1
+        if priority == "batch":
+            self.batch_in_use += 1
+
+    def release(self, priority: str):
+        with self._condition:
+            self.in_use -= 1
+            if priority == "batch":
+                self.batch_in_use -= 1
+            self._grant()
+
+    def _effective_class(self, waiter: _Waiter, now: float) -> int:
+        rank = PRIORITY_CLASSES.index(waiter.priority)
+        if self.aging_seconds > 0:
+            rank -= int((now - waiter.enqueued) / self.aging_seconds)
+        return max(0, rank)
+
+    def _grant(self):
+        # Called with the condition held: hand free slots to the best queue heads
+        now = time.monotonic()
+        granted = False
+        while self.in_use < self.capacity:
+            heads = [
+                queue[0] for priority, queue in self._queues.items() if queue and self._admissible(priority)
+            ]
+            if not heads:
+                break
+            _, _, waiter = min(
+                heads,
+                key=lambda head: (self._effective_class(head[2], now), head[2].enqueued, head[1]),
+            )
+            heapq.heappop(self._queues[waiter.priority])
+            self._virtual_time[waiter.priority] = max(self._virtual_time[waiter.priority], waiter.start_tag)
+            if not self._queues[waiter.priority]:
+                # Idle class: forget finish tags so returning tenants start level
+                self._last_finish = {
+                    key: tag for key, tag in self._last_finish.items() if key[0] != waiter.priority
+                }
+            waiter.granted = True
+            self._take(waiter.priority)
+            granted = True
+            SCHEDULER_QUEUED.dec(resource=self.name, priority=waiter.priority)
+        if granted:
+            self._condition.notify_all()
+
+
+class WorkScheduler:
+    """Priority classes, fair share across tenants and aging, per resource."""
+
+    def __init__(
+        self,
+        slots: Dict[str, int] = SCHEDULER_SLOTS,
+        tenant_weights: Dict[str, float] = SCHEDULER_TENANT_WEIGHTS,
+        aging_seconds: float = SCHEDULER_AGING_SECONDS,
+        batch_max_share: float = SCHEDULER_BATCH_MAX_SHARE,
+    ):
+        self._resources = {
+            name: _Resource(name, capacity, tenant_weights, aging_seconds, batch_max_share)
+            for name, capacity in slots.items()
+        }
+
+    def acquire(self, resource: str, cost: float = 1.0) -> Slot:
+        """Block until a slot of ``resource`` is granted to the caller's work class."""
+        priority, tenant = current_work_class()
+        return self._resources[resource].acquire(priority, tenant, cost)
+
+    @contextmanager
+    def slot(self, resource: str, cost: float = 1.0):
+        held = self.acquire(resource, cost)
+        try:
+            yield
+        finally:
+            held.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                "in_use": resource.in_use,
+                "batch_in_use": resource.batch_in_use,
+                "capacity": resource.capacity,
+                "queued": resource.queued(),
+            }
+            for name, resource in self._resources.items()
+        }
+
+
+_scheduler = WorkScheduler()
+
+
+def get_work_scheduler() -> WorkScheduler:
+    """Process-wide scheduler shared by every TranscriptionService and GeminiService."""
+    return _scheduler
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Tests of the live transcript emitter in utils/emit_scheduler.py.
+
+Run from backend/:
+    python -m pytest test_emit_scheduler.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.emit_scheduler import TranscriptEmitter
+
+
+def test_since_clamps_negative_sequence_numbers():
+    emitter = TranscriptEmitter(lambda event, payload: None)
+    for text in ("ek", "do", "teen"):
+        emitter.final(text)
+    assert emitter.since(-2) == emitter.since(0) == [
+        {"seq": 0, "transcript": "ek"},
+        {"seq": 1, "transcript": "do"},
+        {"seq": 2, "transcript": "teen"},
+    ]
+    assert emitter.since(2) == [{"seq": 2, "transcript": "teen"}]
+
+
+def test_stats_count_every_final_sent_from_concurrent_threads():
+    emitter = TranscriptEmitter(lambda event, payload: None)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: emitter.final("shabd"), range(2000)))
+    assert emitter.stats["finals_sent"] == 2000
+    assert emitter.stats["bytes_sent"] == 2000 * len("shabd")
+    assert [item["seq"] for item in emitter.since(0)] == list(range(2000))
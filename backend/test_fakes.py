@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Contract tests of the offline fakes in benchmarks/fakes.py.
+
+The benchmarks and tests only mean something while the fakes behave like the
+cloud clients they replace, so the parts the backend relies on are pinned here.
+
+Run from backend/:
+    python -m pytest test_fakes.py
+"""
+import json
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+from google.cloud import speech
+from langchain_core.prompt_values import StringPromptValue
+
+from benchmarks.bench_e2e import make_wav
+from benchmarks.fakes import (
+    RESULT_SECONDS,
+    WORDS_PER_SECOND,
+    FakeSpeechClient,
+    FakeStorageClient,
+    LatencyModel,
+    fake_gemini_llm,
+)
+
+
+def upload_wav(storage, seconds, name="audio/test.wav"):
+    storage.bucket("bucket").blob(name).upload_from_string(make_wav(seconds))
+    return f"gs://bucket/{name}"
+
+
+def recognize(speech_client, uri, **config):
+    return speech_client.long_running_recognize(
+        speech.RecognitionConfig(language_code="hi-IN", **config), speech.RecognitionAudio(uri=uri)
+    )
+
+
+def test_storage_round_trips_blobs_under_gs_uris(tmp_path):
+    storage = FakeStorageClient(str(tmp_path))
+    blob = storage.bucket("bucket").blob("a/b.txt")
+    assert not blob.exists()
+    blob.upload_from_string("hello")
+    assert blob.download_as_bytes() == b"hello"
+    assert storage.path_for("gs://bucket/a/b.txt") == blob.path
+    blob.delete()
+    assert not blob.exists()
+
+
+def test_speech_operations_finish_and_can_be_fetched_by_name(tmp_path):
+    storage = FakeStorageClient(str(tmp_path))
+    speech_client = FakeSpeechClient(storage, latency=0.0, realtime_factor=0.0)
+    operation = recognize(speech_client, upload_wav(storage, 30))
+
+    response = operation.result()
+    assert len(response.results) == 30 // RESULT_SECONDS
+    assert len(response.results[0].alternatives[0].words) == RESULT_SECONDS * WORDS_PER_SECOND
+    assert speech_client.calls == 1
+    assert speech_client.audio_seconds == pytest.approx(30, abs=0.1)
+
+    operations = speech_client.transport.operations_client
+    fetched = operations.get_operation(operation.operation.name)
+    assert fetched.done
+    with pytest.raises(api_exceptions.NotFound):
+        operations.get_operation("fake-operation-unknown")
+
+
+def test_speech_diarizes_and_stronger_models_are_confident(tmp_path):
+    storage = FakeStorageClient(str(tmp_path))
+    speech_client = FakeSpeechClient(storage, latency=0.0, realtime_factor=0.0, low_confidence_rate=1.0)
+    uri = upload_wav(storage, 30)
+
+    plain = recognize(speech_client, uri).result()
+    assert {word.speaker_tag for word in plain.results[-1].alternatives[0].words} == {0}
+
+    diarized = recognize(
+        speech_client, uri, diarization_config=speech.SpeakerDiarizationConfig(enable_speaker_diarization=True)
+    ).result()
+    assert {word.speaker_tag for word in diarized.results[-1].alternatives[0].words} == {1, 2}
+    assert all(result.alternatives[0].confidence < 0.5 for result in diarized.results)
+
+    stronger = recognize(speech_client, uri, model="latest_long").result()
+    assert all(result.alternatives[0].confidence > 0.9 for result in stronger.results)
+
+
+def test_failing_calls_raise_service_unavailable(tmp_path):
+    storage = FakeStorageClient(str(tmp_path))
+    speech_client = FakeSpeechClient(storage, error_rate=1.0)
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        recognize(speech_client, upload_wav(storage, 10))
+    assert speech_client.model.failures == 1
+
+
+def test_gemini_fills_every_schema_key():
+    llm = fake_gemini_llm(latency=0.0, seconds_per_kchar=0.0)
+    prompt = 'Schema:\n```json\n{"farmer_name": "", "village": ""}\n```\nTranscript: kisan ne bataya'
+    payload = json.loads(llm.invoke(StringPromptValue(text=prompt)).content)["payload"]
+    assert payload["farmer_name"] is None and payload["village"] is None
+    assert payload["extra_details"]["transcript_words"] > 0
+
+    failing = fake_gemini_llm(latency=0.0, seconds_per_kchar=0.0, model=LatencyModel(error_rate=1.0))
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        failing.invoke(StringPromptValue(text=prompt))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests of the progress event hub of utils/job_progress.py.
+
+Run from backend/:
+    python -m pytest test_job_progress.py
+"""
+import threading
+import time
+
+from utils.job_progress import ProgressHub
+
+
+def test_subscription_to_a_job_that_never_runs_expires():
+    hub = ProgressHub(retention_seconds=0.3)
+    start = time.monotonic()
+    items = list(hub.subscribe("never-published", keepalive=0.05))
+    assert time.monotonic() - start < 1.0
+    assert items and all(item is None for item in items)  # keepalives only
+    assert "never-published" not in hub._jobs
+
+
+def test_events_keep_a_subscription_alive_until_the_job_is_done():
+    hub = ProgressHub(retention_seconds=0.3)
+
+    def publish():
+        for chunk_index in range(4):
+            time.sleep(0.15)
+            hub.publish("running-job", "chunk", {"chunk_index": chunk_index})
+        hub.publish("running-job", "done", {"status": 200})
+
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    events = [item[1] for item in hub.subscribe("running-job", keepalive=0.05) if item]
+    publisher.join()
+    assert events == ["chunk"] * 4 + ["done"]
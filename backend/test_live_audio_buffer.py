@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests of the overflow handling of services/live_audio_buffer.py.
+
+Run from backend/:
+    python -m pytest test_live_audio_buffer.py
+"""
+import threading
+import time
+
+import pytest
+
+from services.live_audio_buffer import LiveAudioBuffer, StreamRestart
+from services.live_transcription_service import LiveTranscriptionService
+
+HEADER = b"H" * 100
+
+
+def frame(index, size=300):
+    return bytes([index]) * size
+
+
+def test_drop_discards_the_backlog_and_restarts_at_the_next_frame():
+    buffer = LiveAudioBuffer(max_bytes=1000, request_bytes=1, coalesce_wait=0)
+    buffer.put(HEADER)
+    assert buffer.get_nowait() == HEADER
+    for index in range(1, 6):
+        buffer.put(frame(index))
+
+    # Frames 1-3 filled the buffer; frame 4 dropped them instead of cutting the stream
+    with pytest.raises(StreamRestart):
+        buffer.get_nowait()
+    assert buffer.get_nowait() == frame(4) + frame(5)
+    stats = buffer.stats()
+    assert stats["dropped_frames"] == 3
+    assert stats["stream_restarts"] == 1
+
+
+class StallingClient:
+    """Sync streaming_recognize whose first stream stalls after two requests."""
+
+    def __init__(self):
+        self.streams = []
+        self.resume = threading.Event()
+
+    def streaming_recognize(self, config, requests):
+        stream = []
+        self.streams.append(stream)
+        for request in requests:
+            stream.append(request.audio_content)
+            if len(self.streams) == 1 and len(stream) == 2:
+                self.resume.wait(2.0)
+        return
+        yield
+
+
+def test_dropped_audio_restarts_the_stream_from_the_header():
+    client = StallingClient()
+    buffer = LiveAudioBuffer(max_bytes=1000, request_bytes=1, coalesce_wait=0)
+    service = LiveTranscriptionService(client=client, audio_buffer=buffer)
+    service.start_streaming(lambda text, is_final: None)
+
+    service.add_audio_chunk(HEADER)
+    service.add_audio_chunk(frame(1))
+    deadline = time.monotonic() + 2.0
+    while not (client.streams and len(client.streams[0]) == 2) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for index in range(2, 7):
+        service.add_audio_chunk(frame(index))
+    client.resume.set()
+
+    deadline = time.monotonic() + 2.0
+    while len(client.streams) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    service.stop_streaming()
+
+    first, second = client.streams[:2]
+    assert first == [HEADER, frame(1)]
+    assert second[0] == HEADER
+    assert b"".join(second[1:]) == frame(5) + frame(6)
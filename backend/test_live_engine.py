@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests of the asyncio live stream engine of services/live_engine.py.
+
+Run from backend/:
+    python -m pytest test_live_engine.py
+"""
+import threading
+import time
+
+from benchmarks.bench_live_streams import FRAME, REQUESTS_PER_RESULT, FakeAsyncClient
+from services.live_audio_buffer import LiveAudioBuffer
+from services.live_engine import LiveStreamEngine
+from services.live_transcription_service import LiveTranscriptionService
+
+
+def start(engine, callback):
+    service = LiveTranscriptionService(audio_buffer=LiveAudioBuffer(coalesce_wait=0), engine=engine)
+    service.start_streaming(callback)
+    return service
+
+
+def test_slow_callback_does_not_stall_other_streams():
+    engine = LiveStreamEngine(client_factory=FakeAsyncClient)
+    fast_finals = []
+    slow_finals = []
+    fast_done = threading.Event()
+
+    def slow(text, is_final):
+        time.sleep(0.5)  # e.g. a store write hanging on a slow disk
+        slow_finals.append(text)
+
+    def fast(text, is_final):
+        fast_finals.append(text)
+        if len(fast_finals) == 2:
+            fast_done.set()
+
+    slow_service, fast_service = start(engine, slow), start(engine, fast)
+    started = time.monotonic()
+    for _ in range(4 * REQUESTS_PER_RESULT):
+        slow_service.add_audio_chunk(FRAME)
+        fast_service.add_audio_chunk(FRAME)
+        time.sleep(0.02)  # one request per frame, as frames arrive in real time
+    assert fast_done.wait(2.0)
+    assert time.monotonic() - started < 1.0
+
+    # Stopping waits for the queued callbacks, which ran in order
+    slow_service.stop_streaming()
+    fast_service.stop_streaming()
+    assert slow_finals == fast_finals
+    assert engine.active_streams == 0
+    engine.shutdown()
+
+
+def test_stream_that_ends_at_once_is_not_left_registered():
+    engine = LiveStreamEngine(client_factory=FakeAsyncClient)
+    service = start(engine, lambda text, is_final: None)
+    service.stop_streaming()
+    assert engine.active_streams == 0
+    engine.shutdown()
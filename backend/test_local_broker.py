@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests of the local Socket.IO message broker.
+
+Run from backend/:
+    python -m pytest test_local_broker.py
+"""
+import threading
+import time
+from multiprocessing.connection import Client
+
+from utils.local_broker import AUTHKEY, PUBLISH, SUBSCRIBE, LocalBroker
+
+
+def start_broker(**options):
+    broker = LocalBroker("127.0.0.1", 0, **options)
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    return broker
+
+
+def connect(broker, role):
+    conn = Client(broker.listener.address, authkey=AUTHKEY)
+    conn.send_bytes(role)
+    return conn
+
+
+def wait_for_subscribers(broker, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while len(broker.subscribers) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(broker.subscribers) == count
+
+
+def test_publishers_that_never_read_do_not_stall_the_fan_out():
+    broker = start_broker()
+    subscriber = connect(broker, SUBSCRIBE)
+    wait_for_subscribers(broker, 1)
+    publishers = [connect(broker, PUBLISH) for _ in range(2)]
+
+    # Far more than a socket buffer: relaying to the other publisher would block
+    message = b"x" * 10_000
+    count = 500
+    received = []
+
+    def read():
+        while len(received) < 2 * count:
+            received.append(subscriber.recv_bytes())
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    for publisher in publishers:
+        threading.Thread(target=lambda p=publisher: [p.send_bytes(message) for _ in range(count)], daemon=True).start()
+    reader.join(timeout=10)
+    assert len(received) == 2 * count
+
+
+def test_a_subscriber_that_stops_reading_is_dropped():
+    broker = start_broker(queue_size=100)
+    slow = connect(broker, SUBSCRIBE)
+    fast = connect(broker, SUBSCRIBE)
+    wait_for_subscribers(broker, 2)
+    publisher = connect(broker, PUBLISH)
+
+    received = []
+    reader = threading.Thread(target=lambda: [received.append(fast.recv_bytes()) for _ in range(2000)], daemon=True)
+    reader.start()
+    for _ in range(2000):
+        publisher.send_bytes(b"y" * 10_000)
+        time.sleep(0.0005)  # a steady stream the reading subscriber keeps up with
+    reader.join(timeout=10)
+    assert len(received) == 2000
+    assert slow not in broker.subscribers
+    wait_for_subscribers(broker, 1)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests of the long-running operation poller of services/operation_poller.py.
+
+Run from backend/:
+    python -m pytest test_operation_poller.py
+"""
+import threading
+
+from services.operation_poller import OperationPoller
+from utils.metrics import STAGE_FAILURES
+
+
+class FlakyOperation:
+    """Status RPC fails ``failures`` times, then reports the operation done."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.status_calls = 0
+        self._lock = threading.Lock()
+
+    def done(self):
+        with self._lock:
+            self.status_calls += 1
+            if self.status_calls <= self.failures:
+                raise ConnectionError("status unavailable")
+        return True
+
+    def result(self):
+        return "response"
+
+
+def test_failed_status_polls_are_retried_and_counted(capsys):
+    poller = OperationPoller(poll_workers=8, initial_interval=0.001, max_interval=0.001)
+    failures_before = STAGE_FAILURES.value(stage="poll")
+    operations = [FlakyOperation(failures=3) for _ in range(50)]
+    futures = [poller.track(operation, "recognize") for operation in operations]
+
+    assert [future.result(timeout=5) for future in futures] == ["response"] * 50
+    assert poller.polls == sum(operation.status_calls for operation in operations) == 200
+    assert STAGE_FAILURES.value(stage="poll") - failures_before == 150
+    # One line per operation, not one per failed poll
+    assert capsys.readouterr().out.count("failed status polls") == 50
+    poller.shutdown()
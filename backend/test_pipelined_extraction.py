@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests of PipelinedExtractor with the deterministic Gemini stand-in of benchmarks/fakes.py.
+
+Run from backend/:
+    python -m pytest test_pipelined_extraction.py
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import fake_gemini_llm
+from services.gemini_service import GeminiService
+from services.pipelined_extraction import PipelinedExtractor
+
+SCHEMA = json.dumps({"farmer_name": "string", "age": "number", "crops": "list of strings"})
+INTERVIEWS = [
+    ["मेरा नाम रामलाल पटेल है।", "मेरी उम्र 45 साल है।", "हम गेहूं बोते हैं।"],
+    ["मेरा नाम गीताबाई है।", "फसल में कपास लगाते हैं।", "मैं 52 साल की हूं।"],
+]
+
+
+def run(service, chunks):
+    extractor = PipelinedExtractor(service, SCHEMA, segment_chunks=1)
+    for chunk_index, chunk in enumerate(chunks):
+        extractor.feed(chunk_index, chunk)
+    return extractor.finish()
+
+
+def test_concurrent_extractions_report_their_own_rule_fields():
+    service = GeminiService(llm=fake_gemini_llm(0.01, 0.0), rules=True)
+    with ThreadPoolExecutor(len(INTERVIEWS)) as pool:
+        results = list(pool.map(lambda chunks: run(service, chunks), INTERVIEWS))
+
+    (first, first_report), (second, second_report) = results
+    assert (first["age"], second["age"]) == (45, 52)
+    assert first_report["segments"] == second_report["segments"] == 3
+    assert first_report["rule_fields"]["age"]["value"] == 45
+    assert second_report["rule_fields"]["age"]["value"] == 52
+    assert "age" not in first_report["llm_fields"] + second_report["llm_fields"]
+
+
+class BlockingGemini:
+    """extract() that waits until released and counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def extract(self, schema_json, transcript):
+        self.calls += 1
+        self.release.wait(2.0)
+        return {}, None
+
+
+def test_close_cancels_partial_extractions_that_have_not_started():
+    service = BlockingGemini()
+    extractor = PipelinedExtractor(service, SCHEMA, segment_chunks=1, max_workers=1)
+    for chunk_index, chunk in enumerate(INTERVIEWS[0]):
+        extractor.feed(chunk_index, chunk)
+    deadline = time.monotonic() + 2.0
+    while not service.calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    extractor.close()
+    service.release.set()
+    time.sleep(0.1)
+    assert service.calls == 1
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests of the per-request profiler of utils/profiling.py.
+
+Run from backend/:
+    python -m pytest test_profiling.py
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.profiling import RequestProfiler
+from utils.tracing import propagate, trace_job
+
+JOB_ID = "a" * 32
+OTHER_JOB_ID = "b" * 32
+
+
+def busy(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def profiled_job_work():
+    busy(0.3)
+
+
+def other_job_work():
+    busy(0.3)
+
+
+def test_sampling_profile_keeps_to_the_threads_of_its_job(tmp_path):
+    other_started = threading.Event()
+
+    def other_request():
+        with trace_job("other", job_id=OTHER_JOB_ID):
+            other_started.set()
+            with ThreadPoolExecutor(1) as pool:
+                pool.submit(propagate(other_job_work)).result()
+
+    other = threading.Thread(target=other_request)
+    other.start()
+    other_started.wait(1.0)
+    with trace_job("profiled", job_id=JOB_ID):
+        profiler = RequestProfiler("sampling", JOB_ID, directory=str(tmp_path))
+        profiler.start()
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(propagate(profiled_job_work)).result()
+        files = profiler.stop()
+    other.join()
+
+    with open(files["speedscope"]) as f:
+        names = {frame["name"] for frame in json.load(f)["shared"]["frames"]}
+    assert "profiled_job_work" in names
+    assert "other_job_work" not in names
+    assert profiler.other_jobs == {OTHER_JOB_ID}
+    with open(files["summary"]) as f:
+        assert OTHER_JOB_ID in f.read()
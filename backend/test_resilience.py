@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests of the circuit breaker and call policy of services/resilience.py.
+
+Run from backend/:
+    python -m pytest test_resilience.py
+"""
+import time
+from concurrent.futures import Future
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from services.resilience import Backend, CircuitOpenError
+
+
+def make_backend(**options):
+    return Backend(
+        "test", **{"deadline": 1.0, "max_attempts": 1, "hedge_budget": 0, "failure_threshold": 2,
+                   "reset_seconds": 0.05, **options}
+    )
+
+
+def settled(value=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    return future
+
+
+def trip(backend):
+    for _ in range(backend.breaker.failure_threshold):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            backend.submit(lambda: settled(error=api_exceptions.ServiceUnavailable("down"))).result()
+    assert backend.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        backend.submit(lambda: settled("unused")).result()
+    time.sleep(backend.breaker.reset_seconds * 2)
+
+
+def test_non_retryable_probe_closes_the_circuit():
+    backend = make_backend()
+    trip(backend)
+    with pytest.raises(api_exceptions.InvalidArgument):
+        backend.submit(lambda: settled(error=api_exceptions.InvalidArgument("bad config"))).result()
+    assert backend.breaker.state == "closed"
+    assert backend.submit(lambda: settled("ok")).result() == "ok"
+
+
+def test_retryable_probe_reopens_the_circuit():
+    backend = make_backend()
+    trip(backend)
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        backend.submit(lambda: settled(error=api_exceptions.ServiceUnavailable("still down"))).result()
+    assert backend.breaker.state == "open"
+
+
+def test_probe_dropped_by_the_deadline_reopens_the_circuit():
+    backend = make_backend(deadline=0.1)
+    trip(backend)
+    with pytest.raises(TimeoutError):
+        backend.submit(Future).result()  # never answers
+    assert backend.breaker.state == "open"
+
+    time.sleep(backend.breaker.reset_seconds * 2)
+    assert backend.submit(lambda: settled("ok")).result() == "ok"
+    assert backend.breaker.state == "closed"
@@ -94,7 +94,7 @@ def test_transcription(service, audio_buffer):
     print("\n=== Testing Transcription ===")
     
     try:
-        transcript = service.transcribe_full_file(audio_buffer, language_code='hi-IN')
+        transcript = service.transcribe_full_file(audio_buffer, language_code='hi-IN').transcript
         print(f"Transcription result: {transcript}")
         return transcript
         
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests of the file backend of services/session_store.py.
+
+Run from backend/:
+    python -m pytest test_session_store.py
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.session_store import FileSessionStore, claim, new_record
+
+
+def released_session(store, session_id="session-1"):
+    record = new_record(session_id, "hi-IN")
+    record.update(owner=None, status="released")
+    store.save(record)
+    return session_id
+
+
+def test_only_one_of_concurrent_claims_wins(tmp_path, monkeypatch):
+    store = FileSessionStore(str(tmp_path))
+    session_id = released_session(store)
+    load = store.load
+
+    def slow_load(session_id):
+        record = load(session_id)
+        time.sleep(0.02)  # widen the window between reading and writing the record
+        return record
+
+    monkeypatch.setattr(store, "load", slow_load)
+    workers = [f"worker-{index}" for index in range(8)]
+    with ThreadPoolExecutor(len(workers)) as pool:
+        claims = list(pool.map(lambda worker_id: claim(store, session_id, worker_id), workers))
+
+    winners = [record["owner"] for record in claims if record]
+    assert len(winners) == 1
+    assert load(session_id)["owner"] == winners[0]
+
+
+def test_finals_are_appended_and_survive_heartbeats(tmp_path):
+    store = FileSessionStore(str(tmp_path))
+    session_id = released_session(store)
+    record = claim(store, session_id, "worker-1")
+    for seq, text in enumerate(["pehla", "doosra"]):
+        store.append_final(session_id, seq, text)
+    store.save({**record, "heartbeat": time.time()})
+    store.append_final(session_id, 1, "doosra")  # repeated by a worker handing over
+
+    assert store.load(session_id)["finals"] == ["pehla", "doosra"]
+    with open(store._path(session_id)) as f:
+        assert "pehla" not in f.read()
+
+
+def test_heartbeat_of_a_former_owner_does_not_undo_a_take_over(tmp_path):
+    store = FileSessionStore(str(tmp_path))
+    record = new_record("session-1", "hi-IN")
+    record["owner"] = "worker-1"
+    assert store.save_owned(record, "worker-1")
+
+    # worker-1 stalls past the lease and worker-2 resumes the session
+    store.save({**record, "heartbeat": time.time() - 60})
+    assert claim(store, "session-1", "worker-2")
+
+    assert not store.save_owned({**record, "heartbeat": time.time()}, "worker-1")
+    assert store.load("session-1")["owner"] == "worker-2"
+
+
+def test_prune_keeps_resumable_sessions(tmp_path):
+    store = FileSessionStore(str(tmp_path))
+    ages = {"recent-released": 60, "old-released": 2 * 3600, "stopped": 60}
+    for session_id, age in ages.items():
+        record = new_record(session_id, "hi-IN")
+        record.update(
+            owner=None, heartbeat=time.time() - age, status="stopped" if session_id == "stopped" else "released"
+        )
+        store.save(record)
+        store.append_final(session_id, 0, "pehla")
+
+    assert store.prune(3600) == 2
+    assert store.load("recent-released")["finals"] == ["pehla"]
+    assert store.load("old-released") is None and store.load("stopped") is None
+    assert sorted(os.listdir(tmp_path)) == ["recent-released.finals.jsonl", "recent-released.json"]
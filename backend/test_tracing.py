@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Tests of the trace exporter in utils/tracing.py.
+
+Run from backend/:
+    python -m pytest test_tracing.py
+"""
+from utils import tracing
+from utils.tracing import FileSpanExporter, load_trace, span, trace_files, trace_job
+
+
+def test_exporter_rotates_past_max_bytes_and_load_trace_reads_backups(tmp_path, monkeypatch):
+    path = str(tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "_exporter", FileSpanExporter(path, max_bytes=1, backup_count=2))
+
+    job_ids = [f"{index:032x}" for index in range(1, 5)]
+    for job_id in job_ids:
+        with trace_job("job", job_id=job_id):
+            with span("stage"):
+                pass
+
+    # Every export rotates (max_bytes=1); only the current file and two backups remain.
+    assert trace_files(path) == [path + ".2", path + ".1", path]
+    assert load_trace(job_ids[0], path) == []
+    for job_id in job_ids[1:]:
+        assert {s["name"] for s in load_trace(job_id, path)} == {"job", "stage"}
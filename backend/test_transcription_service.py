@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests of TranscriptionService against the offline fakes of benchmarks/fakes.py.
+
+Run from backend/:
+    python -m pytest test_transcription_service.py
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.bench_e2e import make_wav
+from benchmarks.fakes import FakeSpeechClient, FakeStorageClient
+from config.settings import CHUNK_DURATION_SECONDS
+from services import job_checkpoint, transcription_service
+from services.transcription_service import TranscriptionService
+from utils import transcoding
+from services.work_scheduler import get_work_scheduler
+
+
+def make_service(tmp_path, monkeypatch, **speech_options):
+    monkeypatch.setattr(job_checkpoint, "_store", job_checkpoint.FileCheckpointStore(str(tmp_path / "jobs")))
+    storage = FakeStorageClient(str(tmp_path / "gcs"))
+    speech_client = FakeSpeechClient(storage, **{"latency": 0.05, "realtime_factor": 0.0, **speech_options})
+    service = TranscriptionService("bucket", "project", "local", speech_client=speech_client, storage_client=storage)
+    return service, speech_client
+
+
+def speech_slots_in_use(timeout=2.0):
+    # Slots are released by done-callbacks, which may run just after the caller wakes up
+    deadline = time.monotonic() + timeout
+    while get_work_scheduler().stats()["speech"]["in_use"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return get_work_scheduler().stats()["speech"]["in_use"]
+
+
+def test_reattached_chunks_release_their_speech_slots(tmp_path, monkeypatch):
+    service, speech_client = make_service(tmp_path, monkeypatch)
+    wav = make_wav(3 * CHUNK_DURATION_SECONDS)
+    first = service.transcribe_full_file(BytesIO(wav))
+    assert speech_slots_in_use() == 0
+
+    # The job looks like the process restarted while its recognitions were running
+    store = job_checkpoint._store
+    record = store.load(first.checkpoint["job_id"])
+    record["status"] = "running"
+    for entry in record["chunks"].values():
+        entry["status"] = "running"
+    store.save(record)
+
+    calls = speech_client.calls
+    second = service.transcribe_full_file(BytesIO(wav))
+    assert second.transcript == first.transcript
+    assert second.checkpoint["reattached_chunks"] == 3
+    assert speech_client.calls == calls
+    assert speech_slots_in_use() == 0
+
+
+def test_concurrent_calls_keep_their_own_speaker_turns(tmp_path, monkeypatch):
+    service, _ = make_service(tmp_path, monkeypatch)
+    durations = [60, 2 * CHUNK_DURATION_SECONDS + 30]
+    with ThreadPoolExecutor(len(durations)) as pool:
+        results = list(pool.map(
+            lambda duration: service.transcribe_full_file(BytesIO(make_wav(duration)), diarize=True), durations
+        ))
+    for duration, result in zip(durations, results):
+        assert result.transcript
+        assert result.speaker_turns
+        assert max(turn.end for turn in result.speaker_turns) <= duration + 1
+
+
+def test_refinement_uses_the_segments_of_its_own_call(tmp_path, monkeypatch):
+    service, _ = make_service(tmp_path, monkeypatch, low_confidence_rate=0.5)
+    durations = [60, 2 * CHUNK_DURATION_SECONDS + 30]
+    wavs = [make_wav(duration) for duration in durations]
+    with ThreadPoolExecutor(len(wavs)) as pool:
+        results = list(pool.map(lambda wav: service.transcribe_full_file(BytesIO(wav)), wavs))
+        refined = list(pool.map(
+            lambda item: service.refine_low_confidence(BytesIO(item[0]), item[1]), zip(wavs, results)
+        ))
+    for duration, result, transcript in zip(durations, results, refined):
+        assert transcript
+        assert result.refinement["spans"]
+        assert result.refinement["audio_seconds"] <= duration + 1
+
+
+def test_refinement_resamples_high_rate_uploads_like_the_main_path(tmp_path, monkeypatch):
+    service, _ = make_service(tmp_path, monkeypatch, low_confidence_rate=1.0)
+    wav = make_wav(60, sample_rate=96000)
+    result = service.transcribe_full_file(BytesIO(wav), preprocessing="default")
+
+    rates = []
+    upload = service._upload_to_gcs
+
+    def recording_upload(buffer, name):
+        rates.append(sf.info(BytesIO(buffer.getvalue())).samplerate)
+        return upload(buffer, name)
+
+    monkeypatch.setattr(service, "_upload_to_gcs", recording_upload)
+    assert service.refine_low_confidence(BytesIO(wav), result, preprocessing="default")
+    assert rates and set(rates) == {16000}
+
+
+def test_streamed_decode_uploads_chunks_before_decoding_finishes(tmp_path, monkeypatch):
+    service, speech_client = make_service(tmp_path, monkeypatch, latency=0.0)
+    observed = {}
+
+    def fake_ffmpeg(data, container, sample_rate):
+        # Stands in for the ffmpeg pipe of a WebM upload: one-second blocks
+        audio, rate = sf.read(BytesIO(data), dtype="float32")
+        assert rate == sample_rate
+        for start in range(0, len(audio), rate):
+            if start == 2 * CHUNK_DURATION_SECONDS * rate:
+                deadline = time.monotonic() + 2.0
+                while not speech_client.calls and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                observed["calls_while_decoding"] = speech_client.calls
+            yield np.array(audio[start:start + rate])
+
+    monkeypatch.setattr(transcription_service, "needs_ffmpeg", lambda data: True)
+    monkeypatch.setattr(transcoding, "iter_ffmpeg_pcm", fake_ffmpeg)
+    counts = []
+    result = service.transcribe_full_file(
+        BytesIO(make_wav(2 * CHUNK_DURATION_SECONDS + 30)), preprocessing="default",
+        on_chunk_done=lambda index, count, label, text: counts.append(count),
+    )
+    assert result.preprocessing["streamed"]
+    assert observed["calls_while_decoding"] >= 1
+    assert speech_client.calls == 3
+    assert result.transcript and not result.failed_chunks
+    assert len(counts) == 3 and counts[-1] == 3
@@ -0,0 +1,161 @@
+# utils/admission.py
+"""
+Admission control for uploads and live streams.
+
+Every heavy request (upload, transcription, analysis) asks ``admit()``
+before its body is read. It is rejected straight away, so the client gets
+``429`` with ``Retry-After`` instead of a worker piling up threads and
+memory, when any of these is over its limit:
+
+- ``inflight``: admitted requests still running (``ADMISSION_MAX_INFLIGHT``)
+- ``queue``: Speech/Gemini calls waiting in the work scheduler
+  (``ADMISSION_MAX_QUEUED_CALLS``)
+- ``memory``: resident memory of the process (``ADMISSION_MAX_RSS_MB``,
+  by default 85% of the container memory limit when there is one)
+
+Live streams are capped separately (``ADMISSION_MAX_LIVE_STREAMS``).
+``Retry-After`` follows the average duration of recently admitted requests.
+"""
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config.settings import (
+    ADMISSION_MAX_INFLIGHT,
+    ADMISSION_MAX_LIVE_STREAMS,
+    ADMISSION_MAX_QUEUED_CALLS,
+    ADMISSION_MAX_RSS_MB,
+    ADMISSION_RETRY_AFTER_SECONDS,
+)
+from utils.metrics import ADMISSION_REJECTIONS
+
+CGROUP_MEMORY_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def default_rss_limit_bytes() -> int:
+    """``ADMISSION_MAX_RSS_MB``, else 85% of the cgroup memory limit, else 0 (no limit)."""
+    if ADMISSION_MAX_RSS_MB:
+        return int(ADMISSION_MAX_RSS_MB * 2**20)
+    for path in CGROUP_MEMORY_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if value.isdigit() and int(value) < 2**60:
+            return int(int(value) * 0.85)
+    return 0
+
+
+class Rejected(Exception):
+    """Work not admitted; ``reason`` is inflight, queue, memory or live_streams."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted request; ``release()`` when it finishes (idempotent)."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Fast accept/reject decisions from in-flight work, scheduler queue depth and RSS."""
+
+    def __init__(
+        self,
+        max_inflight: int = ADMISSION_MAX_INFLIGHT,
+        max_queued_calls: int = ADMISSION_MAX_QUEUED_CALLS,
+        max_rss_bytes: Optional[int] = None,
+        max_live_streams: int = ADMISSION_MAX_LIVE_STREAMS,
+        queued_calls: Optional[Callable[[], int]] = None,
+        rss_bytes: Callable[[], int] = current_rss_bytes,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queued_calls = max_queued_calls
+        self.max_rss_bytes = default_rss_limit_bytes() if max_rss_bytes is None else max_rss_bytes
+        self.max_live_streams = max_live_streams
+        self.queued_calls = queued_calls or (lambda: 0)
+        self.rss_bytes = rss_bytes
+        self.inflight = 0
+        self.average_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _overload_reason(self) -> Optional[str]:
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return "inflight"
+        if self.max_queued_calls and self.queued_calls() >= self.max_queued_calls:
+            return "queue"
+        if self.max_rss_bytes and self.rss_bytes() >= self.max_rss_bytes:
+            return "memory"
+        return None
+
+    def retry_after(self) -> int:
+        if self.average_seconds is None:
+            return ADMISSION_RETRY_AFTER_SECONDS
+        return max(1, math.ceil(self.average_seconds))
+
+    def admit(self, kind: str = "request") -> Ticket:
+        """Admit one request or raise ``Rejected``."""
+        with self._lock:
+            reason = self._overload_reason()
+            if reason is None:
+                self.inflight += 1
+                return Ticket(self)
+        ADMISSION_REJECTIONS.inc(kind=kind, reason=reason)
+        raise Rejected(reason, self.retry_after())
+
+    def admit_live_stream(self, active_streams: int):
+        """Raise ``Rejected`` if another live stream would exceed the cap (or memory is short)."""
+        reason = None
+        if self.max_live_streams and active_streams >= self.max_live_streams:
+            reason = "live_streams"
+        elif self.max_rss_bytes and self.rss_bytes() >= self.max_rss_bytes:
+            reason = "memory"
+        if reason:
+            ADMISSION_REJECTIONS.inc(kind="live", reason=reason)
+            raise Rejected(reason, ADMISSION_RETRY_AFTER_SECONDS)
+
+    def _release(self, elapsed: float):
+        with self._lock:
+            self.inflight -= 1
+            previous = self.average_seconds
+            self.average_seconds = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+
+    def load(self, live_streams: int = 0) -> Dict:
+        """Current load against the limits, for /api/health."""
+        rss = self.rss_bytes()
+        return {
+            "overloaded": self._overload_reason() is not None,
+            "inflight_requests": self.inflight,
+            "max_inflight_requests": self.max_inflight,
+            "queued_calls": self.queued_calls(),
+            "max_queued_calls": self.max_queued_calls,
+            "rss_mb": round(rss / 2**20, 1),
+            "max_rss_mb": round(self.max_rss_bytes / 2**20, 1) if self.max_rss_bytes else None,
+            "live_streams": live_streams,
+            "max_live_streams": self.max_live_streams,
+        }
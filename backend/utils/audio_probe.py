@@ -0,0 +1,159 @@
+# utils/audio_probe.py
+"""
+Header probing for uploads that Speech-to-Text can consume as-is.
+
+Phone recorders usually produce mono 16-bit WAV or FLAC at 8-48 kHz. Those
+files need no decode/normalize/re-encode round trip: the original bytes
+(or byte-range slices of the WAV data chunk, for long files) are uploaded
+directly.
+"""
+import io
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+import soundfile as sf
+
+from utils.transcoding import detect_container
+
+# Sample rates accepted by Speech-to-Text for LINEAR16/FLAC
+MIN_SPEECH_SAMPLE_RATE = 8000
+MAX_SPEECH_SAMPLE_RATE = 48000
+
+WAV_HEADER_SIZE = 44
+
+
+@dataclass
+class PassthroughProbe:
+    """Result of probing an upload that can skip decoding."""
+
+    container: str  # "wav" or "flac"
+    encoding: str  # RecognitionConfig.AudioEncoding name
+    sample_rate: int
+    frames: int
+    data_offset: int = 0  # WAV only: start of the PCM data chunk
+    data_size: int = 0  # WAV only: size of the PCM data chunk
+    block_align: int = 2
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frames / self.sample_rate
+
+
+def _find_wav_data_chunk(data: bytes):
+    """Return (offset, size) of the RIFF 'data' chunk, or None."""
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id = data[position : position + 4]
+        (chunk_size,) = struct.unpack_from("<I", data, position + 4)
+        body = position + 8
+        if chunk_id == b"data":
+            # Streamed WAVs may carry a placeholder size; trust the actual length
+            return body, min(chunk_size, len(data) - body)
+        position = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def probe_passthrough(data: bytes) -> Optional[PassthroughProbe]:
+    """Return a probe when ``data`` is mono 16-bit WAV/FLAC at a Speech-friendly rate."""
+    container = detect_container(bytes(data[:16]))
+    if container not in ("wav", "flac"):
+        return None
+
+    try:
+        info = sf.info(BytesIO(data))
+    except Exception:
+        return None
+
+    if info.channels != 1 or info.subtype != "PCM_16":
+        return None
+    if not MIN_SPEECH_SAMPLE_RATE <= info.samplerate <= MAX_SPEECH_SAMPLE_RATE:
+        return None
+
+    if container == "flac":
+        return PassthroughProbe("flac", "FLAC", info.samplerate, info.frames)
+
+    data_chunk = _find_wav_data_chunk(data)
+    if data_chunk is None:
+        return None
+    offset, size = data_chunk
+    return PassthroughProbe(
+        "wav", "LINEAR16", info.samplerate, size // 2, data_offset=offset, data_size=size
+    )
+
+
+def wav_header(sample_rate: int, num_frames: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Build a canonical 44-byte PCM WAV header."""
+    data_size = num_frames * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Read-only file over a sequence of byte buffers, without concatenating them."""
+
+    def __init__(self, *parts):
+        self._parts = [memoryview(part).cast("B") for part in parts]
+        self._size = sum(len(part) for part in self._parts)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, min(offset, self._size))
+        return self._position
+
+    def readinto(self, buffer):
+        target = memoryview(buffer).cast("B")
+        written = 0
+        start = 0
+        for part in self._parts:
+            end = start + len(part)
+            if self._position < end and written < len(target):
+                local = self._position - start
+                count = min(len(part) - local, len(target) - written)
+                target[written : written + count] = part[local : local + count]
+                written += count
+                self._position += count
+            start = end
+        return written
+
+
+def wav_chunk_readers(data: bytes, probe: PassthroughProbe, chunk_seconds: float):
+    """
+    Split a passthrough WAV into chunk readers over the original buffer.
+
+    Yields ``(reader, start_seconds, end_seconds)``; each reader is a fresh
+    44-byte header followed by a zero-copy view of the PCM data.
+    """
+    view = memoryview(data)
+    frames_per_chunk = int(chunk_seconds * probe.sample_rate)
+    for start_frame in range(0, probe.frames, frames_per_chunk):
+        num_frames = min(frames_per_chunk, probe.frames - start_frame)
+        byte_start = probe.data_offset + start_frame * probe.block_align
+        byte_end = byte_start + num_frames * probe.block_align
+        reader = ByteRangeReader(
+            wav_header(probe.sample_rate, num_frames), view[byte_start:byte_end]
+        )
+        yield (
+            reader,
+            start_frame / probe.sample_rate,
+            (start_frame + num_frames) / probe.sample_rate,
+        )
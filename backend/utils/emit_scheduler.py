@@ -0,0 +1,105 @@
+# utils/emit_scheduler.py
+"""
+Per-client scheduling of live ``transcript_update`` events.
+
+Interim results arrive many times per second and each one supersedes the
+previous, so they are rate-limited with latest-wins semantics: at most one
+interim per ``interval`` is sent and anything newer replaces a pending one.
+Final results are sent immediately as deltas carrying a sequence number;
+clients rebuild the transcript from the sequence and can ask for the finals
+they missed instead of receiving the whole transcript every time.
+"""
+import threading
+import time
+from typing import Callable, Dict, List
+
+from config.settings import INTERIM_EMIT_INTERVAL_SECONDS
+
+
+class TranscriptEmitter:
+    """Throttles interim updates and sequences final deltas for one client."""
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict], None],
+        interval: float = INTERIM_EMIT_INTERVAL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.send = send
+        self.interval = interval
+        self.clock = clock
+        self.finals: List[str] = []
+        self.stats = {"interim_received": 0, "interim_sent": 0, "finals_sent": 0, "bytes_sent": 0}
+
+        self._lock = threading.Lock()
+        self._pending_interim = None
+        self._last_interim_at = float("-inf")
+        self._timer = None
+        self._closed = False
+
+    def _emit(self, payload: Dict):
+        with self._lock:
+            self.stats["bytes_sent"] += len(payload.get("transcript", ""))
+        self.send("transcript_update", payload)
+
+    def interim(self, text: str):
+        """Queue an interim result; sent now if the frame budget allows, else latest-wins."""
+        with self._lock:
+            if self._closed:
+                return
+            self.stats["interim_received"] += 1
+            payload = {"transcript": text, "is_final": False, "seq": len(self.finals)}
+            wait = self._last_interim_at + self.interval - self.clock()
+            if wait <= 0 and self._timer is None:
+                self._last_interim_at = self.clock()
+                self.stats["interim_sent"] += 1
+            else:
+                self._pending_interim = payload
+                if self._timer is None:
+                    self._timer = threading.Timer(max(wait, 0), self._flush_interim)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self._emit(payload)
+
+    def _flush_interim(self):
+        with self._lock:
+            self._timer = None
+            payload, self._pending_interim = self._pending_interim, None
+            if payload is None or self._closed:
+                return
+            self._last_interim_at = self.clock()
+            self.stats["interim_sent"] += 1
+        self._emit(payload)
+
+    def final(self, text: str) -> int:
+        """Send a final result as a sequenced delta; drops any pending interim."""
+        with self._lock:
+            self._pending_interim = None
+            seq = len(self.finals)
+            self.finals.append(text)
+            self.stats["finals_sent"] += 1
+        self._emit({"transcript": text, "is_final": True, "seq": seq})
+        return seq
+
+    def since(self, from_seq: int) -> List[Dict]:
+        """Finals from ``from_seq`` onwards, for clients that missed updates."""
+        from_seq = max(from_seq, 0)
+        with self._lock:
+            return [
+                {"seq": seq, "transcript": text}
+                for seq, text in enumerate(self.finals[from_seq:], start=from_seq)
+            ]
+
+    @property
+    def full_transcript(self) -> str:
+        with self._lock:
+            return " ".join(self.finals)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pending_interim = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,109 @@
+# utils/job_progress.py
+"""
+In-process progress events of running jobs, streamed to clients as SSE.
+
+A job publishes numbered events (``chunk``, ``stable``, ``done``, ...) under
+an id chosen by the client; subscribers get every event from the start (or
+after ``Last-Event-ID``), then new ones as they are published, so a client
+may subscribe before, during or shortly after the job. A job is kept for
+``JOB_PROGRESS_RETENTION_SECONDS`` after its last event (or its first
+subscriber, if nothing was published yet); then it expires and its
+subscribers stop, so a subscription to a job that never runs does not last
+forever.
+
+Events live in the worker that runs the job: with several workers, the
+event stream must reach the same worker as the upload (sticky routing).
+"""
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import JOB_PROGRESS_KEEPALIVE_SECONDS, JOB_PROGRESS_RETENTION_SECONDS
+
+PROGRESS_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+FINAL_EVENTS = ("done", "error")
+
+
+class _JobEvents:
+    def __init__(self):
+        self.events: List[Tuple[str, Dict]] = []
+        self.finished = False
+        self.touched = time.monotonic()  # creation or last event
+
+
+class ProgressHub:
+    """Numbered event log per job id, with blocking subscribers."""
+
+    def __init__(self, retention_seconds: float = JOB_PROGRESS_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, _JobEvents] = {}
+        self._condition = threading.Condition()
+
+    def _job(self, job_id: str) -> _JobEvents:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._jobs[job_id] = _JobEvents()
+        return job
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.touched < cutoff]:
+            del self._jobs[job_id]
+
+    def publish(self, job_id: str, event: str, data: Dict):
+        with self._condition:
+            self._prune()
+            job = self._job(job_id)
+            if job.finished:
+                return
+            job.events.append((event, data))
+            job.finished = event in FINAL_EVENTS
+            job.touched = time.monotonic()
+            self._condition.notify_all()
+
+    def subscribe(
+        self, job_id: str, after: int = -1, keepalive: float = JOB_PROGRESS_KEEPALIVE_SECONDS
+    ) -> Iterator[Optional[Tuple[int, str, Dict]]]:
+        """
+        Yield ``(index, event, data)`` for events after index ``after``.
+
+        Yields None after ``keepalive`` seconds without events, and stops
+        after a final event or when the job expires unfinished.
+        """
+        next_index = after + 1
+        while True:
+            with self._condition:
+                self._prune()
+                job = self._job(job_id)
+                if len(job.events) <= next_index and not job.finished:
+                    expires_in = job.touched + self.retention_seconds - time.monotonic()
+                    self._condition.wait(max(0.0, min(keepalive, expires_in)))
+                    self._prune()
+                    job = self._jobs.get(job_id)
+                    if job is None:
+                        return
+                pending = job.events[next_index:]
+                finished = job.finished
+            if not pending:
+                if finished:
+                    return
+                yield None
+                continue
+            for event, data in pending:
+                yield next_index, event, data
+                next_index += 1
+            if finished and next_index >= len(job.events):
+                return
+
+
+def format_sse(index: int, event: str, data: Dict) -> str:
+    return f"id: {index}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+_hub = ProgressHub()
+
+
+def get_progress_hub() -> ProgressHub:
+    return _hub
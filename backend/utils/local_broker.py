@@ -0,0 +1,169 @@
+# utils/local_broker.py
+"""
+Local stand-in for Redis/AMQP as the Socket.IO message queue.
+
+Several backend workers on one machine can share Socket.IO events through
+this broker instead of a real Redis: every message a worker publishes is
+fanned out to all subscribed workers. It uses only the standard library
+(``multiprocessing.connection``) and is meant for local testing, not
+production.
+
+Run it with:
+    python -m utils.local_broker --port 6390
+
+and point workers at it with ``SOCKETIO_MESSAGE_QUEUE=local://127.0.0.1:6390``.
+"""
+import argparse
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+AUTHKEY = b"singaji-setu-local-broker"
+PUBLISH = b"PUBLISH"
+SUBSCRIBE = b"SUBSCRIBE"
+# Messages a subscriber may fall behind by before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 10000
+
+
+def parse_address(url: str):
+    parsed = urlparse(url)
+    return parsed.hostname or "127.0.0.1", parsed.port or 6390
+
+
+class LocalBroker:
+    """
+    Fans out every published message to all subscribers.
+
+    Each connection first sends ``PUBLISH`` or ``SUBSCRIBE``. Publishers are
+    only read from; subscribers are only written to, each by its own sender
+    thread from a bounded queue, so one slow worker cannot stall the others.
+    A subscriber whose queue overflows is disconnected (it reconnects).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.listener = Listener((host, port), authkey=AUTHKEY)
+        self.queue_size = queue_size
+        self.subscribers = {}  # connection -> queue of pending messages
+        self.lock = threading.Lock()
+
+    def serve_forever(self):
+        print(f"Local broker listening on {self.listener.address}")
+        while True:
+            conn = self.listener.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            role = conn.recv_bytes()
+        except (OSError, EOFError):
+            conn.close()
+            return
+        if role == SUBSCRIBE:
+            pending = queue.Queue(self.queue_size)
+            with self.lock:
+                self.subscribers[conn] = pending
+            self._send(conn, pending)
+        elif role == PUBLISH:
+            self._relay(conn)
+        else:
+            print(f"Local broker: unknown handshake {role[:20]!r}")
+            conn.close()
+
+    def _relay(self, conn):
+        try:
+            while True:
+                message = conn.recv_bytes()
+                with self.lock:
+                    targets = list(self.subscribers.items())
+                for target, pending in targets:
+                    try:
+                        pending.put_nowait(message)
+                    except queue.Full:
+                        print("Local broker: dropping a subscriber that stopped reading")
+                        self._drop(target)
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+
+    def _send(self, conn, pending):
+        try:
+            while True:
+                message = pending.get()
+                if message is None:
+                    break
+                conn.send_bytes(message)
+        except (OSError, EOFError):
+            pass
+        finally:
+            self._drop(conn)
+            conn.close()
+
+    def _drop(self, conn):
+        with self.lock:
+            pending = self.subscribers.pop(conn, None)
+        if pending is not None:
+            # Wake the sender thread; it closes the connection
+            while True:
+                try:
+                    pending.put_nowait(None)
+                    break
+                except queue.Full:
+                    try:
+                        pending.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+class LocalBrokerManager(PubSubManager):
+    """Socket.IO client manager that publishes through a ``LocalBroker``."""
+
+    name = "local"
+
+    def __init__(self, url: str = "local://127.0.0.1:6390", channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = parse_address(url)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _publish(self, data):
+        message = self.json.dumps(data).encode("utf-8")
+        with self._publish_lock:
+            for _ in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = Client(self.address, authkey=AUTHKEY)
+                        self._publisher.send_bytes(PUBLISH)
+                    self._publisher.send_bytes(message)
+                    return
+                except (OSError, EOFError):
+                    self._publisher = None
+            self._get_logger().error("Cannot publish to local broker")
+
+    def _listen(self):
+        while True:
+            try:
+                subscriber = Client(self.address, authkey=AUTHKEY)
+                subscriber.send_bytes(SUBSCRIBE)
+                while True:
+                    yield subscriber.recv_bytes()
+            except (OSError, EOFError):
+                # Broker restarted or dropped this worker for falling behind
+                self._get_logger().warning("Lost local broker subscription, reconnecting")
+                time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Socket.IO message broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    LocalBroker(args.host, args.port).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# utils/metrics.py
+"""
+Minimal Prometheus-style metrics for the transcription pipeline.
+
+Counters, gauges and histograms live in a process-wide registry and are
+rendered in the Prometheus text exposition format by ``/metrics``. Updates
+are a dict lookup plus a few additions under a per-metric lock, so they
+are cheap enough for per-chunk and per-frame call sites. Implemented here
+instead of depending on ``prometheus_client`` to keep the backend's
+dependency list unchanged.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.tracing import span
+
+# Seconds; spans a 10 ms preprocessing stage up to a 10 minute recognize call
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabelled) value from ``function`` whenever metrics are rendered."""
+        self._function = function
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = super().render()
+        if self._function is not None:
+            try:
+                lines.append(f"{self.name} {self._function()}")
+            except Exception:
+                pass
+            return lines
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------- pipeline metrics
+
+STAGE_SECONDS = Histogram(
+    "singaji_stage_duration_seconds",
+    "Time spent per pipeline stage (decode, preprocess, encode, gcs_upload, recognize, rule_extraction, gemini, persist).",
+    ["stage"],
+)
+STAGE_FAILURES = Counter("singaji_stage_failures_total", "Pipeline stage failures.", ["stage"])
+AUDIO_BYTES = Counter("singaji_audio_bytes_total", "Audio bytes received or uploaded.", ["source"])
+CHUNKS = Counter("singaji_chunks_total", "Transcription chunks processed.", ["result"])
+CACHE_REQUESTS = Counter("singaji_cache_requests_total", "Cache lookups.", ["cache", "result"])
+INFLIGHT_JOBS = Gauge("singaji_inflight_jobs", "Jobs currently running.", ["kind"])
+PENDING_OPERATIONS = Gauge("singaji_pending_operations", "Long-running recognize operations being polled.")
+SCHEDULER_QUEUED = Gauge("singaji_scheduler_queued", "Calls waiting for a scheduler slot.", ["resource", "priority"])
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "singaji_scheduler_wait_seconds", "Time calls waited for a scheduler slot.", ["resource", "priority"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "singaji_admission_rejections_total", "Requests and live streams rejected under load.", ["kind", "reason"]
+)
+RESILIENCE_EVENTS = Counter(
+    "singaji_resilience_events_total", "Hedged, retried and deadline-expired cloud calls.", ["backend", "event"]
+)
+RULE_EXTRACTION_FIELDS = Counter(
+    "singaji_rule_extraction_fields_total", "Schema fields filled by rules or left to Gemini.", ["source"]
+)
+BREAKER_STATE = Gauge("singaji_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open).", ["backend"])
+LIVE_STREAMS = Gauge("singaji_live_streams", "Active live transcription streams.")
+LIVE_BUFFER_BYTES = Gauge("singaji_live_buffer_bytes", "Audio queued in live buffers, all streams.")
+
+
+@contextmanager
+def timed(stage: str, **attributes):
+    """Time a pipeline stage (also as a trace span) and count it as failed if it raises."""
+    start = time.perf_counter()
+    try:
+        with span(stage, **attributes):
+            yield
+    except Exception:
+        STAGE_FAILURES.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
@@ -0,0 +1,245 @@
+# utils/profiling.py
+"""
+Opt-in profiling of a single request.
+
+Two CPU modes:
+
+- ``cpu``: cProfile of the request thread, saved as a ``.pstats`` file
+  (``python -m pstats``, snakeviz). Work done in thread pools (chunk
+  uploads/recognition) is not included.
+- ``sampling``: the stacks of the request thread and of the pool threads
+  working for its job (tagged by utils/tracing.py) are sampled each
+  ``PROFILE_SAMPLE_INTERVAL_MS``, saved as a speedscope file
+  (https://www.speedscope.app) with one profile per thread.
+
+Both modes also record tracemalloc: the peak traced memory and the lines
+that allocated the most during the request, in a ``.txt`` summary.
+tracemalloc sees the whole process, so when other jobs ran during the
+profile the summary lists them and the response is flagged with
+``X-Profile-Shared``. Only one request is profiled at a time; a second one
+runs unprofiled.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set
+
+from config.settings import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_TOP_ALLOCATIONS
+from utils.tracing import active_jobs, threads_of_job
+
+PROFILE_MODES = ("cpu", "sampling")
+PROFILE_KINDS = {"pstats": ".pstats", "speedscope": ".speedscope.json", "summary": ".txt"}
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{16,32}$")
+
+_profiling_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Samples thread stacks on a background thread.
+
+    ``threads`` returns the ids of the threads to sample (all others if
+    None); without ``collect_stacks`` only the jobs other than ``job_id``
+    that were active at some sample are recorded in ``other_jobs``.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+        threads: Optional[Callable[[], Set[int]]] = None,
+        job_id: Optional[str] = None,
+        collect_stacks: bool = True,
+    ):
+        self.interval = interval_ms / 1000
+        self.threads = threads
+        self.job_id = job_id
+        self.collect_stacks = collect_stacks
+        self.other_jobs: Set[str] = set()
+        self.frames: List[Dict] = []
+        self._frame_index: Dict[tuple, int] = {}
+        self._samples: Dict[int, list] = {}  # thread id -> [(stack, weight ms)]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = (now - last) * 1000
+            last = now
+            self.other_jobs |= active_jobs() - {self.job_id}
+            if not self.collect_stacks:
+                continue
+            wanted = self.threads() if self.threads else None
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (wanted is not None and thread_id not in wanted):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame))
+                    frame = frame.f_back
+                stack.reverse()  # speedscope wants root first
+                self._samples.setdefault(thread_id, []).append((stack, weight))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def to_speedscope(self, name: str) -> Dict:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            total = sum(weight for _, weight in samples)
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": names.get(thread_id, f"thread-{thread_id}"),
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(total, 3),
+                    "samples": [stack for stack, _ in samples],
+                    "weights": [round(weight, 3) for _, weight in samples],
+                }
+            )
+        profiles.sort(key=lambda profile: -profile["endValue"])
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "singaji-setu",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class RequestProfiler:
+    """CPU profile plus tracemalloc allocations for one request."""
+
+    def __init__(self, mode: str, profile_id: str, directory: str = PROFILE_DIR):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.profile_id = profile_id
+        self.directory = directory
+        self.files: Dict[str, str] = {}
+        self._cprofile = cProfile.Profile() if mode == "cpu" else None
+        self._sampler = None
+        self._owns_tracemalloc = False
+        self.other_jobs: Set[str] = set()
+
+    def start(self):
+        request_thread = threading.get_ident()
+        # In cpu mode the sampler only watches for concurrent jobs
+        self._sampler = StackSampler(
+            threads=lambda: {request_thread} | threads_of_job(self.profile_id),
+            job_id=self.profile_id,
+            collect_stacks=self.mode == "sampling",
+        )
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._sampler.start()
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self) -> Dict[str, str]:
+        """Stop profiling and write the result files; returns kind -> path."""
+        if self._cprofile:
+            self._cprofile.disable()
+        self._sampler.stop()
+        self.other_jobs = self._sampler.other_jobs | (active_jobs() - {self.profile_id})
+        elapsed = time.perf_counter() - self._started
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        summary = [
+            f"profile {self.profile_id} mode={self.mode} wall={elapsed:.3f}s",
+            f"peak traced memory: {peak / 2**20:.1f} MiB",
+        ]
+        if self.other_jobs:
+            summary.append(
+                f"WARNING: {len(self.other_jobs)} other job(s) ran during the profile "
+                f"({', '.join(sorted(self.other_jobs))}); memory figures include their allocations"
+            )
+        summary.append("")
+        if self._cprofile:
+            self.files["pstats"] = self._path("pstats")
+            self._cprofile.dump_stats(self.files["pstats"])
+            text = io.StringIO()
+            pstats.Stats(self._cprofile, stream=text).sort_stats("cumulative").print_stats(25)
+            summary += ["top functions by cumulative time:", text.getvalue()]
+        else:
+            self.files["speedscope"] = self._path("speedscope")
+            with open(self.files["speedscope"], "w") as f:
+                json.dump(self._sampler.to_speedscope(self.profile_id), f)
+
+        summary.append(f"top {PROFILE_TOP_ALLOCATIONS} allocations during the request (net, by line):")
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        diff = snapshot.filter_traces(filters).compare_to(self._baseline.filter_traces(filters), "lineno")
+        summary += [str(stat) for stat in diff[:PROFILE_TOP_ALLOCATIONS]]
+
+        self.files["summary"] = self._path("summary")
+        with open(self.files["summary"], "w") as f:
+            f.write("\n".join(summary) + "\n")
+        return self.files
+
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{self.profile_id}{PROFILE_KINDS[kind]}")
+
+
+@contextmanager
+def profile_request(mode: str, profile_id: str):
+    """Profile the enclosed block; yields None if another request is being profiled."""
+    if not _profiling_lock.acquire(blocking=False):
+        print(f"Profiling busy, request {profile_id} runs unprofiled")
+        yield None
+        return
+    try:
+        profiler = RequestProfiler(mode, profile_id)
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            files = profiler.stop()
+            print(f"Profile {profile_id} saved: {', '.join(sorted(files))}")
+    finally:
+        _profiling_lock.release()
+
+
+def profile_path(profile_id: str, kind: str, directory: str = PROFILE_DIR) -> Optional[str]:
+    """Path of a stored profile file, or None if the id/kind is invalid or missing."""
+    if not PROFILE_ID_PATTERN.match(profile_id) or kind not in PROFILE_KINDS:
+        return None
+    path = os.path.join(directory, f"{profile_id}{PROFILE_KINDS[kind]}")
+    return path if os.path.exists(path) else None
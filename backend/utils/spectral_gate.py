@@ -0,0 +1,144 @@
+# utils/spectral_gate.py
+"""
+Streaming STFT spectral-gating denoiser.
+
+Frames are built with ``sliding_window_view`` (no copies until the window is
+applied), the noise floor is tracked per frequency bin from the quietest
+frames of each block, and the signal is rebuilt by vectorised overlap-add.
+Audio can be fed block by block, so hour-long recordings never need a full
+spectrogram in memory.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class SpectralGate:
+    """Block-wise spectral gate with a slowly adapting noise profile."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_ms: float = 32.0,
+        threshold: float = 1.5,
+        reduction_floor: float = 0.1,
+        noise_percentile: float = 20.0,
+        noise_smoothing: float = 0.9,
+    ):
+        # Power-of-two frame close to frame_ms, 75% overlap (Hann COLA)
+        self.n_fft = int(2 ** np.ceil(np.log2(max(sample_rate * frame_ms / 1000.0, 64))))
+        self.hop = self.n_fft // 4
+        self.sample_rate = sample_rate
+        self.threshold = np.float32(threshold)
+        self.reduction_floor = np.float32(reduction_floor)
+        self.noise_percentile = noise_percentile
+        self.noise_smoothing = np.float32(noise_smoothing)
+
+        self.window = np.hanning(self.n_fft + 1)[:-1].astype(np.float32)
+        self._ola_scale = np.float32(self.hop / self.window.sum())
+        self.noise_profile = None
+        self.reset()
+
+    def reset(self):
+        """Forget buffered audio (the learned noise profile is kept)."""
+        latency = self.n_fft - self.hop
+        self._pending = np.zeros(latency, dtype=np.float32)
+        self._overlap = np.zeros(latency, dtype=np.float32)
+        self._to_skip = latency
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def _update_noise(self, magnitude):
+        block_noise = np.percentile(magnitude, self.noise_percentile, axis=0).astype(np.float32)
+        if self.noise_profile is None:
+            self.noise_profile = block_noise
+        else:
+            # Drop quickly to quieter floors, rise slowly when noise increases
+            smoothed = self.noise_smoothing * self.noise_profile + (1 - self.noise_smoothing) * block_noise
+            self.noise_profile = np.minimum(block_noise, smoothed)
+
+    def _gain(self, magnitude):
+        noise = self.threshold * self.noise_profile
+        ratio = noise / np.maximum(magnitude, np.float32(1e-10))
+        gain = 1.0 - ratio * ratio
+        np.maximum(gain, self.reduction_floor * self.reduction_floor, out=gain)
+        np.sqrt(gain, out=gain)
+
+        # Light time/frequency smoothing to avoid "musical noise"
+        if gain.shape[0] > 2:
+            gain[1:-1] = (gain[:-2] + gain[1:-1] + gain[2:]) / 3
+        if gain.shape[1] > 2:
+            gain[:, 1:-1] = (gain[:, :-2] + gain[:, 1:-1] + gain[:, 2:]) / 3
+        return gain
+
+    def _process_frames(self, buffer):
+        """Gate every complete frame in buffer; return emitted samples."""
+        frames = sliding_window_view(buffer, self.n_fft)[:: self.hop]
+        num_frames = frames.shape[0]
+
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        magnitude = np.abs(spectrum).astype(np.float32, copy=False)
+        self._update_noise(magnitude)
+        spectrum *= self._gain(magnitude)
+        gated = np.fft.irfft(spectrum, n=self.n_fft, axis=1).astype(np.float32, copy=False)
+
+        # Overlap-add: each frame spans n_fft / hop consecutive hop-sized segments
+        segments = self.n_fft // self.hop
+        out = np.zeros((num_frames + segments - 1, self.hop), dtype=np.float32)
+        gated = gated.reshape(num_frames, segments, self.hop)
+        for j in range(segments):
+            out[j : j + num_frames] += gated[:, j, :]
+        out = out.reshape(-1)
+        out *= self._ola_scale
+
+        latency = self.n_fft - self.hop
+        out[:latency] += self._overlap
+        emitted_len = num_frames * self.hop
+        self._overlap = out[emitted_len:].copy()
+        return out[:emitted_len], emitted_len
+
+    def _trim(self, emitted):
+        if self._to_skip:
+            skip = min(self._to_skip, emitted.shape[0])
+            emitted = emitted[skip:]
+            self._to_skip -= skip
+        remaining = self._samples_in - self._samples_out
+        emitted = emitted[:remaining]
+        self._samples_out += emitted.shape[0]
+        return emitted
+
+    def process_block(self, block: np.ndarray) -> np.ndarray:
+        """Feed a block of mono samples; returns the denoised samples ready so far."""
+        block = np.asarray(block, dtype=np.float32)
+        self._samples_in += block.shape[0]
+        buffer = np.concatenate([self._pending, block])
+        if buffer.shape[0] < self.n_fft:
+            self._pending = buffer
+            return np.empty(0, dtype=np.float32)
+
+        emitted, consumed = self._process_frames(buffer)
+        self._pending = buffer[consumed:]
+        return self._trim(emitted)
+
+    def flush(self) -> np.ndarray:
+        """Emit the tail still held in the overlap buffers."""
+        tail = np.concatenate([self._pending, np.zeros(self.n_fft, dtype=np.float32)])
+        emitted, _ = self._process_frames(tail)
+        out = self._trim(np.concatenate([emitted, self._overlap]))
+        self.reset()
+        return out
+
+    def process(self, audio: np.ndarray, block_size: int = 1 << 16) -> np.ndarray:
+        """
+        Denoise a whole mono float32 array block by block, writing in place.
+
+        Output always lags input, so results can overwrite already-consumed
+        samples without a second full-length buffer.
+        """
+        write_pos = 0
+        for start in range(0, audio.shape[0], block_size):
+            out = self.process_block(audio[start : start + block_size])
+            audio[write_pos : write_pos + out.shape[0]] = out
+            write_pos += out.shape[0]
+        out = self.flush()
+        audio[write_pos : write_pos + out.shape[0]] = out
+        return audio
@@ -0,0 +1,322 @@
+# utils/tracing.py
+"""
+Per-job tracing with stage spans, exported as OpenTelemetry JSON.
+
+A job (an ``/api/process`` request, a live-session stop, ...) opens a root
+span with ``trace_job``; code underneath opens child spans with ``span``.
+The current span travels in a ``contextvars`` variable, so spans nest
+naturally within a thread; work handed to a thread pool keeps its parent
+when submitted through ``propagate``. Outside a job ``span`` is a no-op.
+While a thread works for a job it is tagged with the job id
+(``threads_of_job`` / ``active_jobs``), so a profiler can tell the job's
+threads from those of concurrent requests.
+
+When the root span ends, the whole trace is appended as one line of OTLP
+JSON (``resourceSpans``) to ``TRACE_EXPORT_PATH``. Past ``TRACE_MAX_BYTES``
+the file is rotated (``traces.jsonl.1`` ... ``.TRACE_BACKUP_COUNT``, oldest
+dropped). The job id is the trace id, so a slow request can be found and
+rendered as a waterfall:
+
+    python -m utils.tracing <job_id> [--file uploads/traces/traces.jsonl]
+"""
+import argparse
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
+
+from config.settings import TRACE_BACKUP_COUNT, TRACE_EXPORT_PATH, TRACE_MAX_BYTES, TRACING_ENABLED
+
+SERVICE_NAME = "singaji-setu-backend"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_thread_jobs: Dict[int, str] = {}  # thread id -> job id it is working for
+
+
+class Span:
+    """One timed operation inside a job."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """Finished spans of one job, collected from any thread."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class FileSpanExporter:
+    """Appends each finished trace as one OTLP JSON line, rotating the file past ``max_bytes``."""
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH, max_bytes: int = TRACE_MAX_BYTES,
+                 backup_count: int = TRACE_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def _rotate(self):
+        """Shift traces.jsonl -> .1 -> .2 ...; the oldest backup is dropped (lock held)."""
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        if self.backup_count < 1:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def export(self, trace: Trace):
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                    "scopeSpans": [
+                        {"scope": {"name": "singaji-setu"}, "spans": [span.to_otlp() for span in trace.spans]}
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_exporter = FileSpanExporter()
+
+
+@contextmanager
+def _open_span(trace: Trace, name: str, parent_id: Optional[str], attributes: Dict):
+    current = Span(trace, name, parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+@contextmanager
+def trace_job(name: str, job_id: Optional[str] = None, **attributes):
+    """Root span of a job; the trace is exported when it ends. Yields the span."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    trace = Trace(job_id or secrets.token_hex(16))
+    try:
+        with _tag_thread(trace.trace_id), _open_span(trace, name, None, attributes) as root:
+            yield root
+    finally:
+        try:
+            _exporter.export(trace)
+        except Exception as e:
+            print(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of the current one; does nothing outside a job."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _open_span(parent.trace, name, parent.span_id, attributes) as current:
+        yield current
+
+
+def record_span(name: str, start_ns: int, error: Optional[str] = None, **attributes):
+    """Add a span that started at ``start_ns`` and ends now under the current span (for callbacks)."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(parent.trace, name, parent.span_id, attributes)
+    finished.start_ns = start_ns
+    finished.end_ns = time.time_ns()
+    finished.error = error
+    parent.trace.add(finished)
+
+
+def current_job_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace.trace_id if current else None
+
+
+def propagate(fn):
+    """Bind ``fn`` to the caller's context so spans opened in a pool thread keep their parent."""
+    context = contextvars.copy_context()
+    job_id = current_job_id()
+    if job_id is None:
+        return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+    def run(*args, **kwargs):
+        with _tag_thread(job_id):
+            return context.run(fn, *args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def _tag_thread(job_id: str):
+    ident = threading.get_ident()
+    previous = _thread_jobs.get(ident)
+    _thread_jobs[ident] = job_id
+    try:
+        yield
+    finally:
+        if previous is None:
+            _thread_jobs.pop(ident, None)
+        else:
+            _thread_jobs[ident] = previous
+
+
+def threads_of_job(job_id: str) -> Set[int]:
+    """Ids of the threads currently working for ``job_id``."""
+    return {ident for ident, job in list(_thread_jobs.items()) if job == job_id}
+
+
+def active_jobs() -> Set[str]:
+    """Ids of the jobs some thread is working for right now."""
+    return set(list(_thread_jobs.values()))
+
+
+# ---------------------------------------------------------------------- waterfall CLI
+
+def trace_files(path: str = TRACE_EXPORT_PATH) -> List[str]:
+    """The trace file and its rotated backups, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+
+def load_trace(job_id: str, path: str = TRACE_EXPORT_PATH) -> List[Dict]:
+    """Spans of the job whose trace id starts with ``job_id`` (latest match wins, rotated files included)."""
+    found = []
+    for name in trace_files(path):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                if job_id not in line:
+                    continue
+                for resource in json.loads(line)["resourceSpans"]:
+                    for scope in resource["scopeSpans"]:
+                        spans = scope["spans"]
+                        if spans and spans[0]["traceId"].startswith(job_id):
+                            found = spans
+    return found
+
+
+def render_waterfall(spans: List[Dict], width: int = 50) -> str:
+    """Spans as an indented tree with a time bar per span."""
+    if not spans:
+        return "No spans found"
+    start = min(int(s["startTimeUnixNano"]) for s in spans)
+    end = max(int(s["endTimeUnixNano"]) for s in spans)
+    total = max(end - start, 1)
+
+    children: Dict[Optional[str], List[Dict]] = {}
+    for s in spans:
+        children.setdefault(s.get("parentSpanId"), []).append(s)
+    for items in children.values():
+        items.sort(key=lambda s: int(s["startTimeUnixNano"]))
+
+    lines = [f"job {spans[0]['traceId']}  total {total / 1e9:.3f}s"]
+
+    def walk(parent_id, depth):
+        for s in children.get(parent_id, []):
+            s_start = int(s["startTimeUnixNano"]) - start
+            s_end = int(s["endTimeUnixNano"]) - start
+            left = int(s_start / total * width)
+            bar = max(1, int(s_end / total * width) - left)
+            attributes = {a["key"]: list(a["value"].values())[0] for a in s.get("attributes", [])}
+            detail = " ".join(f"{k}={v}" for k, v in attributes.items())
+            failed = " FAILED" if s.get("status", {}).get("code") == 2 else ""
+            lines.append(
+                f"{s_start / 1e9:8.3f}s |{' ' * left}{'#' * bar}{' ' * (width - left - bar)}| "
+                f"{(s_end - s_start) / 1e9:8.3f}s  {'  ' * depth}{s['name']}{failed} {detail}".rstrip()
+            )
+            walk(s["spanId"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the span waterfall of one traced job")
+    parser.add_argument("job_id", help="job/trace id (a unique prefix is enough)")
+    parser.add_argument("--file", default=TRACE_EXPORT_PATH)
+    parser.add_argument("--width", type=int, default=50)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        sys.exit(f"Trace file not found: {args.file}")
+    print(render_waterfall(load_trace(args.job_id, args.file), args.width))
+
+
+if __name__ == "__main__":
+    main()
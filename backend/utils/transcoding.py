@@ -0,0 +1,248 @@
+# utils/transcoding.py
+"""
+Server-side decoding of uploaded audio to mono float32 PCM.
+
+The container is detected from magic bytes (file names from browsers are
+unreliable: MediaRecorder uploads arrive as "recording.webm" whatever they
+contain). Formats libsndfile understands are decoded in-process; everything
+else (WebM/Opus, M4A/AAC, ...) goes through an ``ffmpeg`` pipe and no
+temporary WAV files are written.
+
+``TranscodingPool.stream`` yields PCM blocks as ffmpeg produces them, so the
+chunk pipeline of ``TranscriptionService`` can encode and upload the first
+chunks while the rest of the file is still being decoded. ``decode`` returns
+the whole file; the calling thread waits for it while a process pool worker
+runs ffmpeg.
+"""
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import soundfile as sf
+
+from config.settings import FFMPEG_BINARY, TRANSCODE_SAMPLE_RATE, TRANSCODE_WORKERS
+
+# Bytes read from ffmpeg's stdout per step (~1 s of 16 kHz float32 audio)
+PIPE_READ_SIZE = 64 * 1024
+
+
+class UnsupportedAudioFormat(Exception):
+    """Raised when an upload cannot be decoded with the available decoders."""
+
+
+def detect_container(header: bytes) -> str:
+    """Identify the audio container from the first bytes of a file."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"  # EBML header: WebM / Matroska
+    if header[4:8] == b"ftyp":
+        return "mp4"  # M4A / MP4 / 3GP
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if header[:4] == b"caff":
+        return "caf"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    return "unknown"
+
+
+def _soundfile_containers():
+    formats = sf.available_formats()
+    containers = {"wav", "flac", "ogg", "aiff", "caf"}
+    if "MP3" in formats:  # libsndfile >= 1.1
+        containers.add("mp3")
+    return containers
+
+
+SOUNDFILE_CONTAINERS = _soundfile_containers()
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def iter_ffmpeg_pcm(data: bytes, container: str, sample_rate: int = TRANSCODE_SAMPLE_RATE):
+    """
+    Stream-decode ``data`` through ffmpeg, yielding mono float32 blocks.
+
+    MP4/M4A files frequently keep their index (moov atom) at the end, which
+    ffmpeg cannot reach through a pipe, so those are handed over as a
+    seekable temporary input file; all other containers are piped.
+    """
+    input_path = None
+    if container == "mp4":
+        with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as tmp:
+            tmp.write(data)
+            input_path = tmp.name
+
+    source = ["-nostdin", "-i", input_path] if input_path else ["-i", "pipe:0"]
+    command = [
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", *source,
+        "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1",
+    ]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL if input_path else subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    def feed_stdin():
+        try:
+            process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    # Feed stdin from a helper thread so a full stdout pipe can never deadlock us
+    feeder = None
+    if not input_path:
+        feeder = threading.Thread(target=feed_stdin, daemon=True)
+        feeder.start()
+
+    try:
+        leftover = b""
+        while True:
+            raw = process.stdout.read(PIPE_READ_SIZE)
+            if not raw:
+                break
+            raw = leftover + raw
+            usable = len(raw) - len(raw) % 4
+            leftover = raw[usable:]
+            if usable:
+                yield np.frombuffer(raw[:usable], dtype=np.float32)
+
+        stderr = process.stderr.read().decode("utf-8", "replace").strip()
+        if process.wait() != 0:
+            raise UnsupportedAudioFormat(f"ffmpeg failed to decode {container}: {stderr}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if feeder:
+            feeder.join(timeout=1)
+        if input_path:
+            os.unlink(input_path)
+
+
+def _decode_with_ffmpeg(data: bytes, container: str, sample_rate: int):
+    """Decode ``data`` to one PCM array (runs in a pool worker)."""
+    blocks = list(iter_ffmpeg_pcm(data, container, sample_rate))
+    if not blocks:
+        raise UnsupportedAudioFormat(f"ffmpeg produced no audio for {container} input")
+    return np.concatenate(blocks), sample_rate
+
+
+def decode_to_pcm(data: bytes, sample_rate: int = TRANSCODE_SAMPLE_RATE):
+    """
+    Decode encoded audio bytes to float32 PCM.
+
+    Returns ``(audio, sample_rate, container)``. libsndfile formats keep their
+    native layout and rate; ffmpeg output is mono at ``sample_rate``.
+    """
+    container = detect_container(bytes(data[:16]))
+
+    if container in SOUNDFILE_CONTAINERS:
+        try:
+            audio, rate = sf.read(BytesIO(data), dtype="float32")
+            return audio, rate, container
+        except Exception as e:
+            if not ffmpeg_available():
+                raise UnsupportedAudioFormat(f"Could not decode {container} audio: {e}")
+
+    if ffmpeg_available():
+        audio, rate = _decode_with_ffmpeg(data, container, sample_rate)
+        return audio, rate, container
+
+    raise UnsupportedAudioFormat(
+        f"Cannot decode '{container}' audio: ffmpeg is not installed. "
+        f"Install ffmpeg or upload WAV/FLAC/OGG/MP3."
+    )
+
+
+def needs_ffmpeg(data: bytes) -> bool:
+    """True when ``data`` is in a container libsndfile cannot read and ffmpeg can."""
+    return detect_container(bytes(data[:16])) not in SOUNDFILE_CONTAINERS and ffmpeg_available()
+
+
+class TranscodingPool:
+    """Bounds concurrent ffmpeg decodes; whole-file decodes run in a process pool."""
+
+    def __init__(self, max_workers: int = TRANSCODE_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._streams = threading.BoundedSemaphore(max(1, max_workers))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def submit(self, data: bytes, sample_rate: int = TRANSCODE_SAMPLE_RATE):
+        """Schedule decoding; the future resolves to ``(audio, rate, container)``."""
+        return self._get_executor().submit(decode_to_pcm, data, sample_rate)
+
+    def decode(self, data: bytes, sample_rate: int = TRANSCODE_SAMPLE_RATE):
+        """
+        Decode ``data``, using the pool only when a transcode is needed.
+
+        WAV/FLAC and other libsndfile formats are cheap to read and are
+        decoded inline to avoid pickling large arrays between processes.
+        The calling thread blocks until the whole file is decoded.
+        """
+        container = detect_container(bytes(data[:16]))
+        if container in SOUNDFILE_CONTAINERS or self.max_workers < 1:
+            return decode_to_pcm(data, sample_rate)
+        return self.submit(data, sample_rate).result()
+
+    def stream(self, data: bytes, sample_rate: int = TRANSCODE_SAMPLE_RATE):
+        """
+        Yield mono float32 blocks at ``sample_rate`` as ffmpeg decodes ``data``.
+
+        Only for containers that need ffmpeg (see ``needs_ffmpeg``). ffmpeg
+        does the decoding in its own process, so the caller only reads the
+        pipe; at most ``max_workers`` streams decode at once.
+        """
+        container = detect_container(bytes(data[:16]))
+        with self._streams:
+            produced = False
+            for block in iter_ffmpeg_pcm(data, container, sample_rate):
+                produced = True
+                yield block
+            if not produced:
+                raise UnsupportedAudioFormat(f"ffmpeg produced no audio for {container} input")
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_default_pool = None
+
+
+def get_transcoding_pool() -> TranscodingPool:
+    """Process-wide shared transcoding pool."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = TranscodingPool()
+        atexit.register(_default_pool.shutdown)
+    return _default_pool
@@ -9,6 +9,8 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
   const [recording, setRecording] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [partialChunks, setPartialChunks] = useState({});
+  const [stableThrough, setStableThrough] = useState(-1);
   const mediaRecorderRef = useRef(null);
   const chunksRef = useRef([]);
 
@@ -62,6 +64,21 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
 
     setLoading(true);
     setError(null);
+    setPartialChunks({});
+    setStableThrough(-1);
+
+    // Chunk transcripts arrive over Server-Sent Events while the upload is processed
+    const progressId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+    const events = new EventSource(`${api.defaults.baseURL}/api/process/${progressId}/events`);
+    events.addEventListener('chunk', (e) => {
+      const chunk = JSON.parse(e.data);
+      setPartialChunks(prev => ({ ...prev, [chunk.chunk_index]: chunk }));
+    });
+    events.addEventListener('stable', (e) => {
+      setStableThrough(JSON.parse(e.data).through_chunk);
+    });
+    events.addEventListener('done', () => events.close());
+    events.addEventListener('error', () => events.close());
 
     const formData = new FormData();
     // For recorded audio (blob), create proper file
@@ -72,7 +89,8 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
     }
 
     try {
-      const res = await api.post('/api/process', formData, {
+      // progress_id in the query string, so an overload rejection also ends the event stream
+      const res = await api.post(`/api/process?progress_id=${progressId}`, formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
 
@@ -87,10 +105,13 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
     } catch (err) {
       setError(err.response?.data?.error || 'Processing failed');
     } finally {
+      events.close();
       setLoading(false);
     }
   };
 
+  const chunkList = Object.values(partialChunks).sort((a, b) => a.chunk_index - b.chunk_index);
+
   return (
     <div className="audio-input">
       <h2>Step 2: Provide Audio Input</h2>
@@ -114,7 +135,7 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
             </div>
             <div className="info-box orange">
               <p><strong>⚠️ Note</strong></p>
-              <p>M4A files need conversion first</p>
+              <p>MP3, M4A and WebM are converted on the server</p>
             </div>
           </div>
 
@@ -138,6 +159,21 @@ const AudioInput = ({ workflowType, onComplete, updateSessionData }) => {
               </button>
             </div>
           )}
+
+          {loading && chunkList.length > 0 && (
+            <div className="transcript-display">
+              <h4>📝 Transcript so far ({chunkList.length}/{Math.max(...chunkList.map(chunk => chunk.chunk_count || 0)) || '?'} chunks)</h4>
+              {chunkList.map(chunk => (
+                <p
+                  key={chunk.chunk_index}
+                  style={{ opacity: chunk.chunk_index <= stableThrough ? 1 : 0.6 }}
+                >
+                  <strong>[{chunk.time_range}]</strong>{' '}
+                  {chunk.failed ? <em>Chunk failed</em> : chunk.transcript}
+                </p>
+              ))}
+            </div>
+          )}
         </div>
       )}
 
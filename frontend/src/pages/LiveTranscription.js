@@ -2,6 +2,29 @@ import React, { useState, useRef, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import io from 'socket.io-client';
 
+// Record in 250 ms WebM chunks and stream them to the backend
+const createRecorder = (stream, socket) => {
+  const mediaRecorder = new MediaRecorder(stream, {
+    mimeType: 'audio/webm'
+  });
+  
+  mediaRecorder.ondataavailable = (event) => {
+    if (event.data.size > 0) {
+      // Convert to base64 and send
+      const reader = new FileReader();
+      reader.onloadend = () => {
+        const base64 = reader.result.split(',')[1];
+        socket.emit('audio_data', { audio: base64 });
+      };
+      reader.readAsDataURL(event.data);
+    }
+  };
+  
+  // Send audio chunks every 250ms
+  mediaRecorder.start(250);
+  return mediaRecorder;
+};
+
 const LiveTranscription = ({ updateSessionData }) => {
   const navigate = useNavigate();
   const [isRecording, setIsRecording] = useState(false);
@@ -14,6 +37,10 @@ const LiveTranscription = ({ updateSessionData }) => {
   const socketRef = useRef(null);
   const mediaRecorderRef = useRef(null);
   const streamRef = useRef(null);
+  const finalsRef = useRef([]);  // final segments indexed by their server sequence number
+  const sessionIdRef = useRef(null);  // live session id, used to resume after a reconnect
+  const isRecordingRef = useRef(false);
+  const resumingRef = useRef(false);
 
   useEffect(() => {
     // Create socket connection only once
@@ -29,28 +56,75 @@ const LiveTranscription = ({ updateSessionData }) => {
         forceNew: false
       });
       
+      // Continue the live session after a reconnect, possibly on another worker
+      const resumeStream = () => {
+        if (!isRecordingRef.current || !sessionIdRef.current || resumingRef.current) return;
+        resumingRef.current = true;
+        socketRef.current.emit('resume_stream', {
+          session_id: sessionIdRef.current,
+          from_seq: finalsRef.current.length
+        });
+      };
+
       socketRef.current.on('connect', () => {
         console.log('✅ Connected to server');
         setError(null);
+        resumeStream();
       });
       
       socketRef.current.on('connected', (data) => {
         console.log('✅ Server ready:', data);
       });
 
-      socketRef.current.on('stream_started', () => {
+      socketRef.current.on('stream_started', (data) => {
         console.log('🎙️ Stream started');
+        sessionIdRef.current = data.session_id;
       });
 
+      socketRef.current.on('session_moved', resumeStream);
+
+      socketRef.current.on('session_busy', (data) => {
+        resumingRef.current = false;
+        setTimeout(resumeStream, data.retry_after * 1000);
+      });
+
+      // Finals arrive as deltas with sequence numbers; rebuild the transcript from them
+      const applyFinal = (seq, text) => {
+        finalsRef.current[seq] = text;
+        setTranscript(finalsRef.current.filter(Boolean).join(' '));
+      };
+
       socketRef.current.on('transcript_update', (data) => {
         if (data.is_final) {
-          setTranscript(data.full_transcript);
+          const expected = finalsRef.current.length;
+          applyFinal(data.seq, data.transcript);
           setInterimTranscript('');
+          if (data.seq > expected) {
+            // Missed some finals (e.g. after a reconnect) - ask for them again
+            socketRef.current.emit('transcript_resync', { from_seq: expected });
+          }
         } else {
           setInterimTranscript(data.transcript);
         }
       });
 
+      socketRef.current.on('transcript_resync', (data) => {
+        data.finals.forEach((item) => applyFinal(item.seq, item.transcript));
+      });
+
+      socketRef.current.on('stream_resumed', (data) => {
+        console.log('🔄 Stream resumed on', data.worker_id);
+        resumingRef.current = false;
+        data.finals.forEach((item) => applyFinal(item.seq, item.transcript));
+        
+        // The new recognizer needs a fresh WebM header, so restart the recorder
+        if (mediaRecorderRef.current && streamRef.current) {
+          mediaRecorderRef.current.ondataavailable = null;
+          mediaRecorderRef.current.stop();
+          mediaRecorderRef.current = createRecorder(streamRef.current, socketRef.current);
+        }
+      });
+
       socketRef.current.on('analysis_complete', (data) => {
         console.log('✅ Analysis complete received:', data);
         
@@ -111,31 +185,16 @@ const LiveTranscription = ({ updateSessionData }) => {
       
       streamRef.current = stream;
       
-      // Create MediaRecorder
-      const mediaRecorder = new MediaRecorder(stream, {
-        mimeType: 'audio/webm'
-      });
-      
-      mediaRecorderRef.current = mediaRecorder;
-      
       // Start streaming to backend
+      finalsRef.current = [];
+      sessionIdRef.current = null;
+      setTranscript('');
+      setInterimTranscript('');
       socketRef.current.emit('start_stream');
       
-      mediaRecorder.ondataavailable = (event) => {
-        if (event.data.size > 0) {
-          // Convert to base64 and send
-          const reader = new FileReader();
-          reader.onloadend = () => {
-            const base64 = reader.result.split(',')[1];
-            socketRef.current.emit('audio_data', { audio: base64 });
-          };
-          reader.readAsDataURL(event.data);
-        }
-      };
-      
-      // Send audio chunks every 250ms
-      mediaRecorder.start(250);
+      mediaRecorderRef.current = createRecorder(stream, socketRef.current);
       
+      isRecordingRef.current = true;
       setIsRecording(true);
       setTranscript('');
       setInterimTranscript('');
@@ -154,6 +213,7 @@ const LiveTranscription = ({ updateSessionData }) => {
         streamRef.current.getTracks().forEach(track => track.stop());
       }
       
+      isRecordingRef.current = false;
       setIsRecording(false);
       setAnalyzing(true);
       